@@ -1,53 +1,48 @@
-import os
-import pandas as pd
-import numpy as np
-from extract_data import extract_accuracy_data, find_files_by_extension
-
-# Directory to traverse
-data_dir = 'data'
-
-# Find all files ending with _accuracy.xlsx
-accuracy_files = find_files_by_extension(data_dir, '_accuracy.xlsx')
-
-# Dictionary to hold combined detections for each model type
-detections_data = {}
-
-# Process each accuracy file
-for file_path in accuracy_files:
-    data = extract_accuracy_data(file_path)
-
-    # Extract model type from the 'Main' data
-    main_data = data['Main']
-    model_type = main_data['model']
-
-    # Extract detections dataframe
-    detections_df = data['Detections']
-
-    # Add detections dataframe to the dictionary
-    if model_type not in detections_data:
-        detections_data[model_type] = detections_df
-    else:
-        detections_data[model_type] = pd.concat([detections_data[model_type], detections_df])
-
-# Calculate metrics for each model type
-for model_type, detections_df in detections_data.items():
-    average_detection_time = detections_df['time'].mean()
-    detection_time_std = detections_df['time'].std()
-    average_accuracy = detections_df['is_correct'].mean()
-
-    # Filter out rows where is_correct is False (0) before calculating score metrics
-    correct_detections_df = detections_df[detections_df['is_correct'] == True]
-    average_score = correct_detections_df['score'].mean()
-    score_std = correct_detections_df['score'].std()
-
-    # Calculate FPS as 1 / average detection time
-    fps = 1 / average_detection_time
-
-    print(f'Model: {model_type}')
-    print(f'Average Detection Time: {average_detection_time}')
-    print(f'Detection Time Std Dev: {detection_time_std}')
-    print(f'Average Accuracy: {average_accuracy}')
-    print(f'Average Score: {average_score}')
-    print(f'Score Std Dev: {score_std}')
-    print(f'FPS: {fps}')
-    print('-----------------------------------')
+from detection_stats import LATENCY_PERCENTILES, accuracy_file_stats, merge_stats_by_key
+from extract_data import extract_files_parallel, find_files_by_extension, report_failures
+
+
+def print_latency_percentiles(summary):
+    percentiles = ', '.join(f'p{p}: {summary[f"detection_time_p{p}"]}' for p in LATENCY_PERCENTILES)
+    print(f'Detection Time Percentiles: {percentiles}, max: {summary["detection_time_max"]}')
+
+
+def print_summary(file_stats):
+    """Print the metrics of every model, then its tail latency on every machine, from ((model, cpu), stats)."""
+    file_stats = list(file_stats)
+    detection_stats = merge_stats_by_key((model, stats) for (model, cpu), stats in file_stats)
+    detection_stats_by_cpu = merge_stats_by_key(file_stats)
+
+    # Calculate metrics for each model type
+    for model_type, stats in detection_stats.items():
+        summary = stats.summary()
+
+        print(f'Model: {model_type}')
+        print(f'Average Detection Time: {summary["average_detection_time"]}')
+        print(f'Detection Time Std Dev: {summary["detection_time_std"]}')
+        print_latency_percentiles(summary)
+        print(f'Average Accuracy: {summary["average_accuracy"]}')
+        print(f'Average Score: {summary["average_score"]}')
+        print(f'Score Std Dev: {summary["score_std"]}')
+        print(f'FPS: {summary["fps"]}')
+        print('-----------------------------------')
+
+    # Tail latency of every model on every machine
+    for (model_type, cpu), stats in sorted(detection_stats_by_cpu.items(), key=lambda item: str(item[0])):
+        print(f'Model: {model_type}, CPU: {cpu}')
+        print_latency_percentiles(stats.summary())
+        print('-----------------------------------')
+
+
+if __name__ == "__main__":
+    # Directory to traverse
+    data_dir = 'data'
+
+    # Find all files ending with _accuracy.xlsx
+    accuracy_files = find_files_by_extension(data_dir, '_accuracy.xlsx')
+
+    # Every file is reduced to per-model statistics in a worker, the detections themselves are never combined
+    results, failures = extract_files_parallel(accuracy_files, accuracy_file_stats)
+    report_failures(failures)
+
+    print_summary(file_stats for file_path, file_stats in results)
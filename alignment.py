@@ -0,0 +1,126 @@
+import os
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+from extract_data import SECONDS_PER_TIME_UNIT, extract_accuracy_data, extract_performance_data, \
+    extract_files_parallel, find_performance_files, report_failures
+from performance_catalog import CPU_SHORT_NAMES, MODEL_SHORT_NAMES
+
+ALIGN_DIRECTIONS = ('backward', 'nearest', 'forward')
+
+POWER_COLUMNS = ['power_watt']
+DETECTION_COLUMNS = ['time', 'is_correct', 'score']
+CORRELATION_METRICS = ['cpu_usage', 'cpu_freq', 'cpu_package_power', 'cpu_package_temp']
+
+
+def _sorted_by_time(df, time_column):
+    df = df.dropna(subset=[time_column])
+    if not df[time_column].is_monotonic_increasing:
+        df = df.sort_values(time_column, kind='stable')
+    return df.reset_index(drop=True)
+
+
+def detection_timeline(detections_df):
+    """
+    Place the detections of an accuracy run on the elapsed time axis. Detections are recorded back to back,
+    so each one completes at the running sum of the detection times before it (seconds, converted to the
+    elapsed_time unit).
+    """
+    timeline = detections_df[[column for column in DETECTION_COLUMNS if column in detections_df]].copy()
+    timeline['elapsed_time'] = timeline['time'].fillna(0).astype(np.float64).cumsum() / SECONDS_PER_TIME_UNIT
+    if 'is_correct' in timeline:
+        # Samples before the first detection get NaN, which a bool column could only hold as objects
+        timeline['is_correct'] = timeline['is_correct'].astype(np.float32)
+    timeline['detection_index'] = np.arange(len(timeline))
+    return timeline
+
+
+def align_traces(resource_df, power_df, detections_df=None, direction='nearest', tolerance=None,
+                 time_column='elapsed_time'):
+    """
+    As-of join of one run's 'Power Usages' (and optionally its detections) onto its 'Resource Usages' samples.
+    Both sides are sorted once and merged in a single pass, each resource sample taking the power sample
+    chosen by `direction` within `tolerance` (same unit as elapsed_time, None for no limit) and the last
+    detection completed at or before it. Returns one frame indexed by elapsed_time.
+    """
+    if direction not in ALIGN_DIRECTIONS:
+        raise ValueError(f'Unknown direction {direction!r}, expected one of {ALIGN_DIRECTIONS}')
+
+    aligned = _sorted_by_time(resource_df, time_column)
+    power_df = _sorted_by_time(power_df[[time_column] + POWER_COLUMNS], time_column)
+    aligned = pd.merge_asof(aligned.astype({time_column: np.float64}), power_df.astype({time_column: np.float64}),
+                            on=time_column, direction=direction, tolerance=tolerance)
+
+    if detections_df is not None:
+        timeline = detection_timeline(detections_df).rename(
+            columns={'elapsed_time': time_column, 'time': 'detection_time'})
+        aligned = pd.merge_asof(aligned, timeline.astype({time_column: np.float64}), on=time_column,
+                                direction='backward')
+
+    return aligned.set_index(time_column)
+
+
+def accuracy_file_for(performance_file):
+    """Accuracy workbook recorded in the same run as a performance workbook or trace."""
+    return performance_file[:performance_file.rindex('_performance.')] + '_accuracy.xlsx'
+
+
+def align_runs(performance_results, accuracy_results=None, direction='nearest', tolerance=None):
+    """
+    Align every performance run; detections are joined when the run's accuracy workbook is among
+    accuracy_results. Returns {performance file path: aligned frame}.
+    """
+    detections_by_file = {}
+    for file_path, data in accuracy_results or []:
+        detections_by_file[os.path.abspath(file_path)] = data['Detections']
+
+    aligned_runs = {}
+    for file_path, data in performance_results:
+        detections_df = detections_by_file.get(os.path.abspath(accuracy_file_for(file_path)))
+        aligned_runs[file_path] = align_traces(data['Resource Usages'], data['Power Usages'], detections_df,
+                                               direction, tolerance)
+    return aligned_runs
+
+
+def power_correlations(aligned_runs, metrics=CORRELATION_METRICS):
+    """Pearson correlation of wall power with each resource metric, one row per aligned run."""
+    correlations = {
+        file_path: aligned[list(metrics)].corrwith(aligned['power_watt'])
+        for file_path, aligned in aligned_runs.items()
+    }
+    return pd.DataFrame.from_dict(correlations, orient='index', columns=list(metrics))
+
+
+def correlation_table(performance_results, direction='nearest', tolerance=None, metrics=CORRELATION_METRICS):
+    """power_correlations of every performance run labelled with its file, cpu and model, sorted by them."""
+    correlations = power_correlations(align_runs(performance_results, direction=direction, tolerance=tolerance),
+                                      metrics)
+    mains = [data['Main'] for _, data in performance_results]
+    labels = pd.DataFrame({
+        'file': [os.path.basename(file_path) for file_path, _ in performance_results],
+        'cpu_short_name': [CPU_SHORT_NAMES.get(main.get('cpu'), main.get('cpu')) for main in mains],
+        'model_short_name': [MODEL_SHORT_NAMES.get(main.get('model'), main.get('model')) for main in mains]
+    }, index=[file_path for file_path, _ in performance_results])
+
+    table = labels.join(correlations)
+    return table.sort_values(['cpu_short_name', 'model_short_name', 'file'], ignore_index=True)
+
+
+def load_aligned_runs(data_directory, include_detections=False, direction='nearest', tolerance=None,
+                      max_workers=None):
+    performance_files = find_performance_files(data_directory)
+    performance_results, failures = extract_files_parallel(
+        performance_files, extract_performance_data, max_workers)
+    report_failures(failures)
+
+    accuracy_results = None
+    if include_detections:
+        accuracy_files = [accuracy_file for accuracy_file in map(accuracy_file_for, performance_files)
+                          if os.path.exists(accuracy_file)]
+        accuracy_results, failures = extract_files_parallel(
+            accuracy_files, partial(extract_accuracy_data, columns={'Detections': DETECTION_COLUMNS}), max_workers)
+        report_failures(failures)
+
+    return align_runs(performance_results, accuracy_results, direction, tolerance)
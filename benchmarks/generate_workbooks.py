@@ -0,0 +1,116 @@
+import argparse
+import os
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from performance_catalog import CPU_SHORT_NAMES, MODEL_SHORT_NAMES
+
+
+def _write_workbook(file_path, main_data, sheets):
+    with pd.ExcelWriter(file_path, engine='openpyxl') as writer:
+        # 'Main' is a headerless key/value sheet, read back with index_col=0, header=None
+        pd.Series(main_data).to_frame().to_excel(writer, sheet_name='Main', header=False)
+        for sheet_name, sheet in sheets.items():
+            sheet.to_excel(writer, sheet_name=sheet_name, index=False)
+
+
+def generate_performance_workbook(file_path, rng, date, cpu, model, resource_rows, power_rows):
+    detection_time = rng.uniform(0.02, 0.5)
+    # One resource sample every 500 ms, elapsed_time being recorded in milliseconds
+    duration = resource_rows * 500.0
+
+    elapsed_time = np.linspace(0, duration, resource_rows)
+    warm_up = 1 - np.exp(-elapsed_time / max(duration * 0.05, 1e-9))
+    resource_df = pd.DataFrame({
+        'elapsed_time': elapsed_time,
+        'cpu_usage': np.clip(rng.uniform(30, 90) * warm_up + rng.normal(0, 3, resource_rows), 0, 100),
+        'cpu_freq': rng.uniform(2000, 4200) - 300 * warm_up + rng.normal(0, 40, resource_rows),
+        'cpu_package_power': rng.uniform(10, 65) * warm_up + rng.normal(0, 1, resource_rows),
+        'cpu_package_temp': 40 + rng.uniform(15, 45) * warm_up + rng.normal(0, 0.5, resource_rows),
+        'memory_mb': rng.uniform(300, 2500) + rng.normal(0, 5, resource_rows)
+    })
+
+    power_df = pd.DataFrame({
+        'elapsed_time': np.linspace(0, duration, power_rows),
+        'power_watt': rng.uniform(30, 120) + rng.normal(0, 4, power_rows)
+    })
+
+    main_data = {
+        'date': date.strftime('%Y-%m-%d %H:%M:%S'),
+        'cpu': cpu,
+        'model': model,
+        'average_detection_time': detection_time,
+        'avg_cpu_usage': resource_df['cpu_usage'].mean(),
+        'cpu_usage_std': resource_df['cpu_usage'].std(),
+        'cpu_freq_avg': resource_df['cpu_freq'].mean(),
+        'cpu_freq_std': resource_df['cpu_freq'].std(),
+        'avg_cpu_package_power': resource_df['cpu_package_power'].mean(),
+        'cpu_package_power_std': resource_df['cpu_package_power'].std(),
+        'avg_cpu_package_temp': resource_df['cpu_package_temp'].mean(),
+        'cpu_package_temp_std': resource_df['cpu_package_temp'].std(),
+        'avg_memory_usage': resource_df['memory_mb'].mean(),
+        'memory_usage_std': resource_df['memory_mb'].std(),
+        'avg_power_usage': power_df['power_watt'].mean(),
+        'power_usage_std': power_df['power_watt'].std(),
+        'fps': 1 / detection_time
+    }
+
+    _write_workbook(file_path, main_data, {'Resource Usages': resource_df, 'Power Usages': power_df})
+
+
+def generate_accuracy_workbook(file_path, rng, date, cpu, model, detections_rows):
+    detections_df = pd.DataFrame({
+        'time': rng.gamma(4, rng.uniform(0.005, 0.1), detections_rows),
+        'is_correct': rng.random(detections_rows) < rng.uniform(0.5, 0.95),
+        'score': rng.beta(5, 2, detections_rows)
+    })
+
+    main_data = {
+        'date': date.strftime('%Y-%m-%d %H:%M:%S'),
+        'cpu': cpu,
+        'model': model
+    }
+
+    _write_workbook(file_path, main_data, {'Detections': detections_df})
+
+
+def generate_dataset(directory, runs, detections_rows, resource_rows, power_rows, seed=0):
+    """
+    Write `runs` pairs of synthetic _performance.xlsx / _accuracy.xlsx files into directory,
+    cycling through the known CPUs and models. Returns the list of written files.
+    """
+    os.makedirs(directory, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    cpus = list(CPU_SHORT_NAMES)
+    models = list(MODEL_SHORT_NAMES)
+    start_date = datetime(2024, 6, 1)
+
+    files = []
+    for run in range(runs):
+        cpu = cpus[run % len(cpus)]
+        model = models[(run // len(cpus)) % len(models)]
+        date = start_date + timedelta(hours=run)
+        prefix = os.path.join(directory, f'run_{run:05d}_{model}')
+
+        generate_performance_workbook(f'{prefix}_performance.xlsx', rng, date, cpu, model, resource_rows, power_rows)
+        generate_accuracy_workbook(f'{prefix}_accuracy.xlsx', rng, date, cpu, model, detections_rows)
+        files.extend([f'{prefix}_performance.xlsx', f'{prefix}_accuracy.xlsx'])
+
+    return files
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Generate synthetic benchmark workbooks')
+    parser.add_argument('directory')
+    parser.add_argument('--runs', type=int, default=24)
+    parser.add_argument('--detections-rows', type=int, default=1000)
+    parser.add_argument('--resource-rows', type=int, default=500)
+    parser.add_argument('--power-rows', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    written_files = generate_dataset(args.directory, args.runs, args.detections_rows, args.resource_rows,
+                                     args.power_rows, args.seed)
+    print(f'Generated {len(written_files)} files in {args.directory}')
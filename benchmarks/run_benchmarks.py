@@ -0,0 +1,177 @@
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import tempfile
+import time
+import warnings
+from datetime import datetime
+
+import matplotlib
+
+matplotlib.use('Agg')
+
+
+def _git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _measure(name, func, repeat, setup=None):
+    timings = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+
+    return {
+        'name': name,
+        'repeat': repeat,
+        'min_seconds': min(timings),
+        'median_seconds': statistics.median(timings),
+        'max_seconds': max(timings)
+    }
+
+
+def run_benchmarks(data_directory, repeat, max_workers):
+    from matplotlib import pyplot as plt
+
+    from detection_stats import accuracy_file_stats, merge_stats_by_key
+    from extract_data import clear_cache, extract_accuracy_data, extract_files_parallel, extract_performance_data, \
+        find_files_by_extension
+    from performance_catalog import CATALOG_DIR, load_performance_data
+    from plots.fps_per_package_power import draw_dot_charts
+    from plots.performance_bar_charts_horizontal_v2 import BAR_CHART_STATS, aggregate_stat, draw_bar_charts
+    from rollup import build_cube
+
+    performance_files = find_files_by_extension(data_directory, '_performance.xlsx')
+    accuracy_files = find_files_by_extension(data_directory, '_accuracy.xlsx')
+
+    def reset_cache():
+        clear_cache()
+        shutil.rmtree(CATALOG_DIR, ignore_errors=True)
+
+    def ingest_performance():
+        extract_files_parallel(performance_files, extract_performance_data, max_workers)
+
+    def ingest_accuracy():
+        extract_files_parallel(accuracy_files, extract_accuracy_data, max_workers)
+
+    def load_catalog():
+        load_performance_data(data_directory, max_workers=max_workers)
+
+    def summarize_accuracy():
+        results, _ = extract_files_parallel(accuracy_files, accuracy_file_stats, max_workers)
+        merge_stats_by_key(file_stats for _, file_stats in results)
+
+    results = [
+        _measure('find_files', lambda: find_files_by_extension(data_directory, '.xlsx'), repeat),
+        _measure('ingest_performance_cold', ingest_performance, repeat, setup=reset_cache),
+        _measure('ingest_performance_warm', ingest_performance, repeat),
+        _measure('ingest_accuracy_cold', ingest_accuracy, repeat, setup=reset_cache),
+        _measure('ingest_accuracy_warm', ingest_accuracy, repeat),
+        _measure('run_catalog_cold', load_catalog, repeat, setup=reset_cache),
+        _measure('run_catalog_warm', load_catalog, repeat),
+        _measure('accuracy_summary', summarize_accuracy, repeat)
+    ]
+
+    run_table = load_performance_data(data_directory, max_workers=max_workers)
+
+    def aggregate_bar_charts():
+        # As draw_bar_charts does: the runs are rolled up once, every stat is sliced out of the same cube
+        cube = build_cube(run_table)
+        for stat, std in BAR_CHART_STATS.items():
+            aggregate_stat(cube, stat, std)
+
+    def render(draw_func):
+        def render_and_close():
+            with warnings.catch_warnings():
+                # plt.show() only warns under the non-interactive backend
+                warnings.simplefilter('ignore')
+                draw_func(run_table)
+            plt.close('all')
+        return render_and_close
+
+    results += [
+        _measure('bar_chart_aggregation', aggregate_bar_charts, repeat),
+        _measure('render_bar_charts', render(draw_bar_charts), repeat),
+        _measure('render_dot_charts', render(draw_dot_charts), repeat)
+    ]
+
+    return results, len(performance_files), len(accuracy_files)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Time ingestion, aggregation and rendering on synthetic workbooks')
+    parser.add_argument('--runs', type=int, default=24)
+    parser.add_argument('--detections-rows', type=int, default=1000)
+    parser.add_argument('--resource-rows', type=int, default=500)
+    parser.add_argument('--power-rows', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--workers', type=int, default=None, help='worker processes used for ingestion')
+    parser.add_argument('--data-dir', default=None,
+                        help='benchmark an existing data directory instead of generating one')
+    parser.add_argument('--output', default=None, help='write the JSON report here instead of stdout')
+    args = parser.parse_args()
+
+    work_directory = tempfile.mkdtemp(prefix='webcam_benchmarks_')
+    # The workbook cache location is read when extract_data is first imported, so the project modules
+    # are only imported after pointing it at a scratch directory
+    os.environ['EXTRACT_DATA_CACHE_DIR'] = os.path.join(work_directory, 'cache', 'workbooks')
+    try:
+        data_directory = args.data_dir
+        generation_seconds = None
+        if data_directory is None:
+            from benchmarks.generate_workbooks import generate_dataset
+
+            data_directory = os.path.join(work_directory, 'data')
+            start = time.perf_counter()
+            generate_dataset(data_directory, args.runs, args.detections_rows, args.resource_rows, args.power_rows,
+                             args.seed)
+            generation_seconds = time.perf_counter() - start
+
+        results, performance_files, accuracy_files = run_benchmarks(data_directory, args.repeat, args.workers)
+    finally:
+        shutil.rmtree(work_directory, ignore_errors=True)
+
+    report = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'git_revision': _git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'config': {
+            'runs': args.runs if args.data_dir is None else None,
+            'detections_rows': args.detections_rows,
+            'resource_rows': args.resource_rows,
+            'power_rows': args.power_rows,
+            'seed': args.seed,
+            'repeat': args.repeat,
+            'workers': args.workers,
+            'data_dir': args.data_dir,
+            'performance_files': performance_files,
+            'accuracy_files': accuracy_files,
+            'generation_seconds': generation_seconds
+        },
+        'results': results
+    }
+
+    report_json = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(report_json)
+    else:
+        print(report_json)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from performance_catalog import load_performance_data
+
+CAPACITY_COLUMNS = ['cpu_short_name', 'model_short_name', 'runs', 'fps', 'cpu_usage_per_stream',
+                    'memory_per_stream', 'power_per_stream', 'max_streams', 'limiting_factor', 'cpu_streams',
+                    'memory_streams', 'power_streams', 'temp_streams', 'cpu', 'model']
+
+
+def plan_capacity(run_table, target_fps, max_cpu_usage=90.0, memory_budget_mb=None, power_budget=None,
+                  temp_budget=None, ambient_temp=25.0):
+    """
+    Estimate how many streams of target_fps every (cpu, model) configuration can serve concurrently.
+
+    A stream needs target_fps / fps of the measured run, so it costs that share of the run's CPU usage,
+    wall power (avg_power_usage) and package power, and every stream keeps its own model in memory
+    (avg_memory_usage). The streams are bounded by:
+        cpu    - CPU usage stays under max_cpu_usage percent
+        memory - resident memory stays under memory_budget_mb
+        power  - wall power stays under power_budget watts
+        temp   - package temperature, assumed to rise linearly with package power above ambient_temp,
+                 stays under temp_budget degrees
+    Budgets left as None do not limit the plan. Configurations missing a measurement one of the bounds needs
+    (e.g. no fps) get NaN max_streams and limiting_factor. Returns one row per configuration with
+    CAPACITY_COLUMNS, most streams first.
+    """
+    configs = run_table.groupby(['cpu', 'model'], dropna=False).agg(
+        cpu_short_name=('cpu_short_name', 'first'),
+        model_short_name=('model_short_name', 'first'),
+        runs=('path', 'size'),
+        fps=('fps', 'mean'),
+        avg_cpu_usage=('avg_cpu_usage', 'mean'),
+        avg_memory_usage=('avg_memory_usage', 'mean'),
+        avg_power_usage=('avg_power_usage', 'mean'),
+        avg_cpu_package_power=('avg_cpu_package_power', 'mean'),
+        avg_cpu_package_temp=('avg_cpu_package_temp', 'mean')
+    ).reset_index()
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        share = target_fps / configs['fps'].to_numpy(dtype=np.float64)
+        configs['cpu_usage_per_stream'] = configs['avg_cpu_usage'] * share
+        configs['memory_per_stream'] = configs['avg_memory_usage']
+        configs['power_per_stream'] = configs['avg_power_usage'] * share
+        package_power_per_stream = configs['avg_cpu_package_power'] * share
+
+        bounds = {'cpu': max_cpu_usage / configs['cpu_usage_per_stream']}
+        if memory_budget_mb is not None:
+            bounds['memory'] = memory_budget_mb / configs['memory_per_stream']
+        if power_budget is not None:
+            bounds['power'] = power_budget / configs['power_per_stream']
+        if temp_budget is not None:
+            # Package power at which the measured temperature rise would reach the budget
+            heating = (configs['avg_cpu_package_temp'] - ambient_temp) / configs['avg_cpu_package_power']
+            bounds['temp'] = (temp_budget - ambient_temp) / heating / package_power_per_stream
+
+    # NaN where a measurement is missing, inf where a factor does not limit the streams at all
+    stream_bounds = pd.DataFrame({factor: np.floor(bound).clip(lower=0) for factor, bound in bounds.items()})
+    for factor in ['cpu', 'memory', 'power', 'temp']:
+        configs[f'{factor}_streams'] = stream_bounds[factor].replace(np.inf, np.nan) if factor in stream_bounds \
+            else np.nan
+
+    # A configuration missing any measurement its bounds need gets no plan rather than one from the other bounds
+    max_streams = stream_bounds.min(axis=1, skipna=False)
+    planned = np.isfinite(max_streams)
+    configs['max_streams'] = max_streams.where(planned)
+    configs['limiting_factor'] = stream_bounds[planned].idxmin(axis=1).reindex(configs.index)
+
+    configs = configs.sort_values(['max_streams', 'power_per_stream'], ascending=[False, True],
+                                  na_position='last', ignore_index=True)
+    return configs[CAPACITY_COLUMNS]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Concurrent webcam streams every machine can serve per model')
+    parser.add_argument('--data-dir', default='data')
+    parser.add_argument('--target-fps', type=float, required=True, help='FPS every stream needs')
+    parser.add_argument('--max-cpu-usage', type=float, default=90.0, help='CPU usage ceiling (%%)')
+    parser.add_argument('--memory-budget-mb', type=float, default=None)
+    parser.add_argument('--power-budget', type=float, default=None, help='Wall power budget (W)')
+    parser.add_argument('--temp-budget', type=float, default=None, help='Package temperature budget (°C)')
+    parser.add_argument('--ambient-temp', type=float, default=25.0)
+    parser.add_argument('--steady-state', action='store_true', help='Leave out the warm-up of every run')
+    parser.add_argument('--output', default=None, help='CSV file for the capacity table')
+    args = parser.parse_args()
+
+    run_table = load_performance_data(args.data_dir, steady_state=args.steady_state)
+    plan = plan_capacity(run_table, args.target_fps, args.max_cpu_usage, args.memory_budget_mb, args.power_budget,
+                         args.temp_budget, args.ambient_temp)
+    print(plan.drop(columns=['cpu', 'model']).to_string(index=False))
+
+    if args.output:
+        plan.to_csv(args.output, index=False)
@@ -0,0 +1,123 @@
+import argparse
+
+from accuracy_summary import print_summary
+from alignment import ALIGN_DIRECTIONS, correlation_table
+from compact_data import print_memory_footprint
+from pareto import print_cheapest_configuration
+from profiling import enable as enable_profiling, print_stage_summary, write_profile
+from render_all import CHART_GROUPS, ReportData, render_groups
+from rendering import DEFAULT_FORMATS
+from watch import DEFAULT_INTERVAL, IncrementalReport, watch
+
+# Subcommand -> chart groups it renders (see render_all.CHART_GROUPS)
+COMMAND_GROUPS = {
+    'bars': ['bars'],
+    'normalized': ['normalized'],
+    'lines': ['lines'],
+    'boxes': ['boxes'],
+    'power': ['power', 'dots'],
+    'pareto': ['pareto'],
+    'all': list(CHART_GROUPS)
+}
+
+
+def summary(data, args):
+    print_summary(data.detection_stats)
+
+
+def pareto(data, args):
+    frontier = data.frontier
+    print(frontier.drop(columns=['cpu', 'model']).to_string(index=False))
+    if args.table:
+        frontier.to_csv(args.table, index=False)
+
+    if args.min_fps is not None:
+        print_cheapest_configuration(frontier, args.min_fps, args.cost)
+
+
+def correlations(data, args):
+    table = correlation_table(data.performance_results, args.direction, args.tolerance)
+    print(table.to_string(index=False))
+    if args.table:
+        table.to_csv(args.table, index=False)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description='Summaries and charts of the webcam object recognition runs')
+    parser.add_argument('--data-dir', default='data')
+    parser.add_argument('--output-dir', default='charts')
+    parser.add_argument('--formats', nargs='+', default=list(DEFAULT_FORMATS), choices=['png', 'svg', 'pdf'])
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--steady-state', action='store_true', help='Leave out the warm-up of every run')
+    parser.add_argument('--database', default=None,
+                        help='Read the runs from this warehouse (see warehouse.py ingest) instead of --data-dir')
+    parser.add_argument('--profile', default=None, metavar='PREFIX',
+                        help='Profile every stage, writing PREFIX.json and PREFIX.trace.json')
+    parser.add_argument('--profile-memory', action='store_true',
+                        help='With --profile, trace the peak memory of every stage too (slows the stages down)')
+    parser.add_argument('--memory-report', action='store_true',
+                        help='Print the memory held by every loaded part of the data and the peak RSS')
+
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('summary', help='Print the detection time, latency and accuracy summary')
+    subparsers.add_parser('bars', help='Per model and machine bar charts')
+    subparsers.add_parser('normalized', help='Normalized metric bar charts')
+    subparsers.add_parser('lines', help='Resource usage over time')
+    subparsers.add_parser('boxes', help='Power usage and score box plots')
+    subparsers.add_parser('power', help='Power usage over time, power and energy dot charts')
+
+    pareto_parser = subparsers.add_parser('pareto', help='Pareto frontier table and charts')
+    pareto_parser.add_argument('--table', default=None, help='CSV file for the configuration table')
+    pareto_parser.add_argument('--min-fps', type=float, default=None, help='Throughput target')
+    pareto_parser.add_argument('--cost', default='avg_power_usage')
+
+    correlations_parser = subparsers.add_parser(
+        'correlations', help='Correlation of wall power with the resource metrics of every run')
+    correlations_parser.add_argument('--direction', default='nearest', choices=ALIGN_DIRECTIONS,
+                                     help='Power sample joined to each resource sample')
+    correlations_parser.add_argument('--tolerance', type=float, default=None,
+                                     help='Largest gap in ms between joined samples, unlimited by default')
+    correlations_parser.add_argument('--table', default=None, help='CSV file for the correlation table')
+
+    subparsers.add_parser('all', help='Summary and every chart')
+
+    watch_parser = subparsers.add_parser(
+        'watch', help='Render the charts, then re-render the ones affected by new or changed files of --data-dir')
+    watch_parser.add_argument('--interval', type=float, default=DEFAULT_INTERVAL, help='Seconds between polls')
+    watch_parser.add_argument('--groups', nargs='+', default=None, choices=list(CHART_GROUPS))
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.profile:
+        enable_profiling(memory=args.profile_memory)
+
+    if args.command == 'watch':
+        watch(IncrementalReport(args.data_dir, args.output_dir, args.formats, args.groups, args.workers,
+                                args.steady_state), args.interval)
+        return
+
+    # Workbooks are read on first use and shared by everything the command draws
+    data = ReportData(args.data_dir, args.workers, args.steady_state, args.database)
+
+    if args.command in ('summary', 'all'):
+        summary(data, args)
+    if args.command == 'pareto':
+        pareto(data, args)
+    if args.command == 'correlations':
+        correlations(data, args)
+
+    if args.command in COMMAND_GROUPS:
+        written_files = render_groups(data, args.output_dir, args.formats, COMMAND_GROUPS[args.command])
+        print(f'{len(written_files)} files saved in {args.output_dir}')
+
+    if args.memory_report:
+        print_memory_footprint(data.loaded_parts())
+    if args.profile:
+        print_stage_summary()
+        write_profile(args.profile)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+import numpy as np
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+# Timestamps keep float64: float32 has 24 bits of mantissa, too few for sub-millisecond steps in long runs
+FULL_PRECISION_COLUMNS = ['elapsed_time']
+BOOLEAN_COLUMNS = ['is_correct']
+
+
+def downcast(df, keep=FULL_PRECISION_COLUMNS):
+    """
+    The sheet with float64 columns as float32, integer columns as the smallest of int8/int16/int32 holding them
+    and 0/1 flags (BOOLEAN_COLUMNS) as bool, about half the size of the frame read from a workbook.
+    Columns in keep and columns with missing flags are left as they are.
+    """
+    dtypes = {}
+    for column, dtype in df.dtypes.items():
+        if column in keep:
+            continue
+        if column in BOOLEAN_COLUMNS and dtype != bool:
+            values = df[column]
+            if values.notna().all() and values.isin([0, 1]).all():
+                dtypes[column] = bool
+        elif dtype == np.float64:
+            dtypes[column] = np.float32
+        elif pd.api.types.is_integer_dtype(dtype) and dtype.itemsize > 4 and len(df):
+            dtypes[column] = pd.to_numeric(df[column], downcast='integer').dtype
+            if dtypes[column].itemsize > 4:
+                del dtypes[column]
+    return df.astype(dtypes) if dtypes else df
+
+
+def run_label(value, length):
+    """A categorical column repeating one run's label (e.g. its model), one byte per row."""
+    return pd.Categorical.from_codes(np.zeros(length, dtype=np.int8), categories=[value])
+
+
+def concat_runs(frames, categories=None):
+    """
+    Concatenate per-run frames into one with an int32 'run' column (the run's position in frames).
+    Categorical columns (see run_label) stay categorical: their categories are merged, sorted, or taken from
+    categories, a {column: categories} dict, instead of turning into one Python string per row.
+    """
+    frames = list(frames)
+    if categories is None:
+        categories = {}
+    if not frames:
+        return pd.DataFrame(columns=['run'])
+
+    categorical_columns = [column for column, dtype in frames[0].dtypes.items()
+                           if isinstance(dtype, pd.CategoricalDtype)]
+    for column in categorical_columns:
+        if column not in categories:
+            categories[column] = sorted(set().union(*(frame[column].cat.categories for frame in frames)))
+    frames = [frame.assign(**{column: frame[column].cat.set_categories(categories[column])
+                              for column in categorical_columns}) for frame in frames]
+
+    combined = pd.concat(frames, ignore_index=True)
+    combined['run'] = np.repeat(np.arange(len(frames), dtype=np.int32), [len(frame) for frame in frames])
+    return combined
+
+
+def memory_footprint(data):
+    """
+    Bytes held by the frames and arrays in data, which may be nested in lists, tuples and dicts
+    (e.g. extract_files_parallel results). Strings in object columns are counted too.
+    """
+    if isinstance(data, pd.DataFrame):
+        return int(data.memory_usage(deep=True).sum())
+    if isinstance(data, pd.Series):
+        return int(data.memory_usage(deep=True))
+    if isinstance(data, np.ndarray):
+        return data.nbytes
+    if isinstance(data, dict):
+        return sum(memory_footprint(value) for value in data.values())
+    if isinstance(data, (list, tuple)):
+        return sum(memory_footprint(value) for value in data)
+    return 0
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB, None where the platform does not report it."""
+    if resource is None:
+        return None
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def print_memory_footprint(parts):
+    """Print the memory_footprint of every (name, data) pair of parts, their total and the peak RSS."""
+    total = 0
+    for name, data in parts:
+        size = memory_footprint(data)
+        total += size
+        print(f'{name:<24} {size / 1024 ** 2:10.2f} MB')
+    print(f'{"total":<24} {total / 1024 ** 2:10.2f} MB')
+
+    rss = peak_rss_mb()
+    if rss is not None:
+        print(f'{"peak RSS":<24} {rss:10.2f} MB')
@@ -0,0 +1,41 @@
+import argparse
+import os
+from functools import partial
+
+from extract_data import extract_performance_data, extract_files_parallel, find_files_by_extension, report_failures
+from trace_format import TRACE_SUFFIX, write_trace
+
+
+def trace_path_for(workbook):
+    return workbook[:-len('_performance.xlsx')] + TRACE_SUFFIX
+
+
+def convert_workbook(file_path, overwrite=False):
+    """
+    Write the binary trace of one _performance.xlsx workbook next to it and return its path.
+    A trace newer than its workbook is kept unless overwrite is set.
+    """
+    trace_path = trace_path_for(file_path)
+    if not overwrite and os.path.exists(trace_path) and os.path.getmtime(trace_path) >= os.path.getmtime(file_path):
+        return trace_path
+    return write_trace(trace_path, extract_performance_data(file_path))
+
+
+def convert_directory(data_directory, overwrite=False, max_workers=None):
+    """Convert every _performance.xlsx workbook of data_directory, returns the paths of their traces."""
+    workbooks = find_files_by_extension(data_directory, '_performance.xlsx')
+    results, failures = extract_files_parallel(workbooks, partial(convert_workbook, overwrite=overwrite),
+                                               max_workers)
+    report_failures(failures)
+    return [trace_path for file_path, trace_path in results]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Convert _performance.xlsx workbooks to binary traces')
+    parser.add_argument('--data-dir', default='data')
+    parser.add_argument('--overwrite', action='store_true', help='Convert workbooks again even if unchanged')
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    trace_paths = convert_directory(args.data_dir, args.overwrite, args.workers)
+    print(f'{len(trace_paths)} traces in {args.data_dir}')
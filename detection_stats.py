@@ -0,0 +1,207 @@
+import numpy as np
+
+from extract_data import extract_accuracy_data
+
+
+class RunningMoments:
+    """
+    Count, sum, mean and sum of squared deviations (M2) of a stream of values.
+    Chunks are folded in with Chan's parallel variant of Welford's update, so partial results
+    computed on different files or processes can be merged without keeping the values around.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.mean = float('nan')
+        self.m2 = 0.0
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if values.size == 0:
+            return self
+
+        chunk = RunningMoments()
+        chunk.count = values.size
+        chunk.total = float(values.sum())
+        chunk.mean = chunk.total / chunk.count
+        chunk.m2 = float(((values - chunk.mean) ** 2).sum())
+        return self.merge(chunk)
+
+    def merge(self, other):
+        if other.count == 0:
+            return self
+        if self.count == 0:
+            self.count, self.total, self.mean, self.m2 = other.count, other.total, other.mean, other.m2
+            return self
+
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta ** 2 * self.count * other.count / count
+        self.count = count
+        self.total += other.total
+        return self
+
+    def variance(self, ddof=1):
+        if self.count <= ddof:
+            return float('nan')
+        return self.m2 / (self.count - ddof)
+
+    def std(self, ddof=1):
+        return float(np.sqrt(self.variance(ddof)))
+
+
+class LatencySketch:
+    """
+    Log-bucketed latency histogram (in the spirit of HDR histograms / DDSketch): every value lands in bucket
+    ceil(log(value) / log(gamma)), so any quantile is returned within `relative_accuracy` of the true value.
+    Memory depends on the range of the values, not on their count, and sketches merge by adding bucket counts.
+    """
+
+    def __init__(self, relative_accuracy=0.01):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = np.log(self.gamma)
+        self.offset = 0
+        self.counts = np.zeros(0, dtype=np.int64)
+        self.zero_count = 0
+        self.count = 0
+        self.min = float('inf')
+        self.max = float('-inf')
+
+    def _add_buckets(self, offset, counts):
+        if counts.size == 0:
+            return
+        if self.counts.size == 0:
+            self.offset, self.counts = offset, counts.astype(np.int64)
+            return
+
+        low = min(self.offset, offset)
+        high = max(self.offset + self.counts.size, offset + counts.size)
+        merged = np.zeros(high - low, dtype=np.int64)
+        merged[self.offset - low:self.offset - low + self.counts.size] += self.counts
+        merged[offset - low:offset - low + counts.size] += counts
+        self.offset, self.counts = low, merged
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if values.size == 0:
+            return self
+
+        self.count += values.size
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+
+        positive = values[values > 0]
+        self.zero_count += values.size - positive.size
+        if positive.size:
+            indices = np.ceil(np.log(positive) / self.log_gamma).astype(np.int64)
+            low = int(indices.min())
+            self._add_buckets(low, np.bincount(indices - low))
+        return self
+
+    def merge(self, other):
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError('Cannot merge latency sketches with different relative accuracy')
+        if other.count == 0:
+            return self
+
+        self._add_buckets(other.offset, other.counts)
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def quantiles(self, qs):
+        qs = np.asarray(qs, dtype=np.float64)
+        if self.count == 0:
+            return np.full(qs.shape, np.nan)
+
+        # Rank of every quantile among the zero bucket followed by the log buckets
+        ranks = qs * (self.count - 1)
+        cumulative = self.zero_count + np.cumsum(self.counts)
+        buckets = np.searchsorted(cumulative, ranks, side='right')
+        buckets = np.minimum(buckets, self.counts.size - 1) if self.counts.size else buckets
+
+        # Bucket i holds (gamma^(i-1), gamma^i], its estimate is the point of equal relative error
+        estimates = 2 * self.gamma ** (self.offset + buckets) / (self.gamma + 1) if self.counts.size \
+            else np.zeros(qs.shape)
+        estimates = np.where(ranks < self.zero_count, 0.0, estimates)
+        return np.clip(estimates, self.min, self.max)
+
+    def quantile(self, q):
+        return float(self.quantiles([q])[0])
+
+
+# Detection time percentiles reported next to the mean
+LATENCY_PERCENTILES = (50, 90, 95, 99)
+
+
+class DetectionStats:
+    """
+    Mergeable statistics of a 'Detections' sheet: detection time and correctness moments,
+    plus score moments restricted to the correct detections.
+    """
+
+    def __init__(self):
+        self.time = RunningMoments()
+        self.is_correct = RunningMoments()
+        self.correct_score = RunningMoments()
+        self.time_sketch = LatencySketch()
+
+    def update(self, detections_df):
+        self.time.update(detections_df['time'])
+        self.time_sketch.update(detections_df['time'])
+        self.is_correct.update(detections_df['is_correct'])
+
+        # Score metrics only take the correct detections into account
+        correct_detections = detections_df['is_correct'] == True
+        self.correct_score.update(detections_df.loc[correct_detections, 'score'])
+        return self
+
+    def merge(self, other):
+        self.time.merge(other.time)
+        self.is_correct.merge(other.is_correct)
+        self.correct_score.merge(other.correct_score)
+        self.time_sketch.merge(other.time_sketch)
+        return self
+
+    def latency_percentiles(self):
+        percentiles = self.time_sketch.quantiles(np.array(LATENCY_PERCENTILES) / 100)
+        latencies = {f'detection_time_p{p}': float(value) for p, value in zip(LATENCY_PERCENTILES, percentiles)}
+        latencies['detection_time_max'] = self.time_sketch.max if self.time_sketch.count else float('nan')
+        return latencies
+
+    def summary(self):
+        return {
+            'average_detection_time': self.time.mean,
+            'detection_time_std': self.time.std(),
+            'average_accuracy': self.is_correct.mean,
+            'average_score': self.correct_score.mean,
+            'score_std': self.correct_score.std(),
+            # FPS as 1 / average detection time
+            'fps': 1 / self.time.mean if self.time.count else float('nan'),
+            **self.latency_percentiles()
+        }
+
+
+def accuracy_file_stats(file_path):
+    """
+    Reduce one accuracy workbook to ((model, cpu), DetectionStats), meant to run in extract_files_parallel workers
+    so that only the small accumulators travel back to the parent process.
+    """
+    data = extract_accuracy_data(file_path, columns={'Detections': ['time', 'is_correct', 'score']})
+    return (data['Main']['model'], data['Main'].get('cpu')), DetectionStats().update(data['Detections'])
+
+
+def merge_stats_by_key(keyed_stats):
+    merged = {}
+    for key, stats in keyed_stats:
+        if key not in merged:
+            merged[key] = DetectionStats()
+        merged[key].merge(stats)
+    return merged
@@ -0,0 +1,95 @@
+import os
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+from extract_data import SECONDS_PER_TIME_UNIT, extract_performance_data, extract_files_parallel, report_failures
+
+ENERGY_COLUMNS = ['duration_s', 'frames', 'energy_j', 'package_energy_j', 'energy_per_frame_j',
+                  'package_energy_per_frame_j', 'frames_per_joule', 'package_frames_per_joule']
+
+
+def integrate_runs(frames, value_column, time_column='elapsed_time'):
+    """
+    Trapezoidal integral of value_column over time_column for many frames in one vectorized pass.
+    Returns (integrals, durations), one entry per frame; frames with fewer than two samples give NaN, and so do
+    frames with a missing value, whose gap would otherwise count as nothing consumed.
+    """
+    lengths = np.array([len(df) for df in frames], dtype=np.int64)
+    if lengths.sum() == 0:
+        return np.full(len(frames), np.nan), np.full(len(frames), np.nan)
+
+    run_ids = np.repeat(np.arange(len(frames)), lengths)
+    times = np.concatenate([df[time_column].to_numpy(dtype=np.float64) for df in frames])
+    values = np.concatenate([df[value_column].to_numpy(dtype=np.float64) for df in frames])
+
+    order = np.lexsort((times, run_ids))
+    run_ids, times, values = run_ids[order], times[order], values[order]
+
+    # Segments between two consecutive samples of the same run
+    same_run = run_ids[1:] == run_ids[:-1]
+    segment_runs = run_ids[1:][same_run]
+    dt = np.diff(times)[same_run]
+    areas = dt * (values[1:][same_run] + values[:-1][same_run]) / 2
+
+    # Without any segment bincount returns integers, which cannot hold the NaN of short runs. A NaN area makes
+    # the sum of its run NaN
+    integrals = np.bincount(segment_runs, weights=areas, minlength=len(frames)).astype(np.float64)
+    durations = np.bincount(segment_runs, weights=dt, minlength=len(frames)).astype(np.float64)
+    integrals[lengths < 2] = np.nan
+    durations[lengths < 2] = np.nan
+    return integrals, durations
+
+
+def energy_from_results(results, seconds_per_time_unit=SECONDS_PER_TIME_UNIT):
+    """
+    Energy metrics per run from extract_performance_data results holding the 'Resource Usages' and
+    'Power Usages' sheets. Frames processed are estimated as the run's FPS times its duration, the span of the
+    power trace the energy is integrated over. Runs with a gap (a missing value) in a trace get NaN for the
+    energies of that trace rather than an underestimate.
+    Returns a frame indexed by absolute file path with ENERGY_COLUMNS.
+    """
+    resource_frames = [data['Resource Usages'] for _, data in results]
+    power_frames = [data['Power Usages'] for _, data in results]
+    fps = np.array([data['Main'].get('fps', np.nan) for _, data in results], dtype=np.float64)
+
+    package_energy, _ = integrate_runs(resource_frames, 'cpu_package_power')
+    energy, power_duration = integrate_runs(power_frames, 'power_watt')
+
+    package_energy_j = package_energy * seconds_per_time_unit
+    energy_j = energy * seconds_per_time_unit
+    duration_s = power_duration * seconds_per_time_unit
+    frames = fps * duration_s
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        energy_df = pd.DataFrame({
+            'duration_s': duration_s,
+            'frames': frames,
+            'energy_j': energy_j,
+            'package_energy_j': package_energy_j,
+            'energy_per_frame_j': energy_j / frames,
+            'package_energy_per_frame_j': package_energy_j / frames,
+            'frames_per_joule': frames / energy_j,
+            'package_frames_per_joule': frames / package_energy_j
+        }, index=pd.Index([os.path.abspath(file_path) for file_path, _ in results], name='path'))
+
+    return energy_df.replace([np.inf, -np.inf], np.nan)
+
+
+def add_energy_columns(run_table, results=None, max_workers=None, seconds_per_time_unit=SECONDS_PER_TIME_UNIT):
+    """
+    Return a copy of the run table (see performance_catalog.load_performance_data) with ENERGY_COLUMNS added.
+    Pass already loaded performance results to avoid reading the traces again.
+    """
+    if results is None:
+        results, failures = extract_files_parallel(
+            run_table['path'],
+            partial(extract_performance_data,
+                    columns={'Resource Usages': ['elapsed_time', 'cpu_package_power'],
+                             'Power Usages': ['elapsed_time', 'power_watt']}),
+            max_workers)
+        report_failures(failures)
+
+    energy_df = energy_from_results(results, seconds_per_time_unit)
+    return run_table.join(energy_df, on='path')
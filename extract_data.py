@@ -1,49 +1,299 @@
+import hashlib
 import os
+import pickle
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
 import pandas as pd
 
+from compact_data import downcast
+from profiling import add_events, event_count, stage, take_events
+from trace_format import TRACE_SUFFIX, read_trace
+
+# Parsed sheets are cached next to the repository so that repeat loads skip openpyxl entirely.
+# Every workbook gets one entry directory named after its absolute path and its (mtime, size) state,
+# holding one Parquet file per sheet ('Main' is a plain dict and is pickled instead).
+CACHE_DIR = os.environ.get('EXTRACT_DATA_CACHE_DIR',
+                           os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'workbooks'))
+CACHE_MAX_BYTES = int(os.environ.get('EXTRACT_DATA_CACHE_MAX_BYTES', 2 * 1024 ** 3))
+CACHE_ENABLED = os.environ.get('EXTRACT_DATA_CACHE', '1') != '0'
+
+ACCURACY_SHEETS = ['Main', 'Detections']
+PERFORMANCE_SHEETS = ['Main', 'Resource Usages', 'Power Usages']
+
+# The recorder writes elapsed_time in milliseconds (the power chart has plotted it in ms from the start),
+# detection times of the accuracy runs in seconds
+SECONDS_PER_TIME_UNIT = 0.001
+
+# Number of worker processes used by extract_files_parallel when max_workers is not given
+DEFAULT_WORKERS = int(os.environ.get('EXTRACT_DATA_WORKERS', os.cpu_count() or 1))
+
+
+def _cache_entry_dir(file_path):
+    abs_path = os.path.abspath(file_path)
+    stat = os.stat(abs_path)
+    path_hash = hashlib.sha1(abs_path.encode('utf-8')).hexdigest()[:16]
+    state_hash = hashlib.sha1(f'{stat.st_mtime_ns}:{stat.st_size}'.encode('utf-8')).hexdigest()[:16]
+    return path_hash, os.path.join(CACHE_DIR, f'{path_hash}-{state_hash}')
+
+
+def _prepare_cache_entry(file_path):
+    path_hash, entry_dir = _cache_entry_dir(file_path)
+    if not os.path.isdir(entry_dir):
+        # The workbook changed (or was never cached): drop entries left over from its previous versions
+        if os.path.isdir(CACHE_DIR):
+            for name in os.listdir(CACHE_DIR):
+                if name.startswith(f'{path_hash}-'):
+                    shutil.rmtree(os.path.join(CACHE_DIR, name), ignore_errors=True)
+        os.makedirs(entry_dir, exist_ok=True)
+    return entry_dir
+
+
+def _cached_sheet_path(entry_dir, sheet_name):
+    file_name = sheet_name.replace(' ', '_')
+    if sheet_name == 'Main':
+        return os.path.join(entry_dir, f'{file_name}.pkl')
+    return os.path.join(entry_dir, f'{file_name}.parquet')
+
+
+def _read_cached_sheet(entry_dir, sheet_name, columns=None):
+    path = _cached_sheet_path(entry_dir, sheet_name)
+    if not os.path.exists(path):
+        return None
+    try:
+        if sheet_name == 'Main':
+            with open(path, 'rb') as f:
+                return pickle.load(f)
+        # Parquet is columnar, so only the requested columns are read from disk
+        return pd.read_parquet(path, columns=None if columns is None else list(columns))
+    except (OSError, ValueError, KeyError, EOFError, pickle.UnpicklingError):
+        # A damaged entry is treated as a miss and rewritten
+        return None
+
+
+def _write_cached_sheet(entry_dir, sheet_name, sheet):
+    path = _cached_sheet_path(entry_dir, sheet_name)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    try:
+        if sheet_name == 'Main':
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(sheet, f, protocol=pickle.HIGHEST_PROTOCOL)
+        else:
+            sheet.to_parquet(tmp_path)
+        os.replace(tmp_path, path)
+    except (ImportError, OSError, ValueError, TypeError, NotImplementedError):
+        # Sheets that cannot be stored (e.g. no Parquet engine, mixed-type columns) are simply not cached
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _evict_cache(max_bytes=None):
+    """
+    Remove least recently used cache entries until the cache fits in max_bytes.
+    Entry directories are touched on every hit, so their mtime is the last access time.
+    """
+    if max_bytes is None:
+        max_bytes = CACHE_MAX_BYTES
+    if not os.path.isdir(CACHE_DIR):
+        return
+
+    entries = []
+    total_size = 0
+    for name in os.listdir(CACHE_DIR):
+        entry_dir = os.path.join(CACHE_DIR, name)
+        try:
+            size = sum(entry.stat().st_size for entry in os.scandir(entry_dir) if entry.is_file())
+            entries.append((os.stat(entry_dir).st_mtime, size, entry_dir))
+        except OSError:
+            continue
+        total_size += size
+
+    for _, size, entry_dir in sorted(entries):
+        if total_size <= max_bytes:
+            break
+        shutil.rmtree(entry_dir, ignore_errors=True)
+        total_size -= size
+
+
+def clear_cache():
+    shutil.rmtree(CACHE_DIR, ignore_errors=True)
+
 
-def extract_accuracy_data(file_path):
-    xls = pd.ExcelFile(file_path)
+def _read_sheet(xls, sheet_name, usecols=None):
+    if sheet_name == 'Main':
+        main_df = pd.read_excel(xls, sheet_name="Main", index_col=0, header=None)
+        return main_df.squeeze().to_dict()
+    return pd.read_excel(xls, sheet_name=sheet_name, usecols=usecols)
 
-    main_df = pd.read_excel(xls, sheet_name="Main", index_col=0, header=None)
 
-    main_data = main_df.squeeze().to_dict()
+def _project(sheet_name, sheet, columns):
+    if sheet_name == 'Main' or columns is None:
+        return sheet
+    return sheet[list(columns)]
 
-    detections_df = pd.read_excel(xls, sheet_name="Detections")
 
-    extracted_data = {
-        'Main': main_data,
-        'Detections': detections_df
-    }
+def _sheet_rows(sheets):
+    return sum(len(sheet) for sheet in sheets.values() if isinstance(sheet, pd.DataFrame))
 
-    return extracted_data
 
+def _parse_workbook(file_path, sheet_names, columns):
+    with stage('excel_parse', file_path) as current:
+        with pd.ExcelFile(file_path) as xls:
+            sheets = {sheet_name: _read_sheet(xls, sheet_name, columns.get(sheet_name)) for sheet_name in sheet_names}
+        current.add_rows(_sheet_rows(sheets))
+    return sheets
 
-def extract_performance_data(file_path):
-    xls = pd.ExcelFile(file_path)
 
-    main_df = pd.read_excel(xls, sheet_name="Main", index_col=0, header=None)
+def _load_sheets(file_path, sheet_names, columns=None):
+    if columns is None:
+        columns = {}
 
-    main_data = main_df.squeeze().to_dict()
+    with stage('extract', file_path) as current:
+        sheets = _load_cached_sheets(file_path, sheet_names, columns)
+        current.add_rows(_sheet_rows(sheets))
+    # Sheets are handed out with compact dtypes (float32, bool is_correct), see compact_data.downcast
+    return {sheet_name: sheet if sheet_name == 'Main' else downcast(sheet) for sheet_name, sheet in sheets.items()}
 
-    resource_df = pd.read_excel(xls, sheet_name="Resource Usages")
 
-    power_df = pd.read_excel(xls, sheet_name="Power Usages")
+def _load_cached_sheets(file_path, sheet_names, columns):
+    if not CACHE_ENABLED:
+        return _parse_workbook(file_path, sheet_names, columns)
 
-    extracted_data = {
-        'Main': main_data,
-        'Resource Usages': resource_df,
-        'Power Usages': power_df
-    }
+    entry_dir = _prepare_cache_entry(file_path)
 
-    return extracted_data
+    sheets = {}
+    missing_sheets = []
+    for sheet_name in sheet_names:
+        sheet = _read_cached_sheet(entry_dir, sheet_name, columns.get(sheet_name))
+        if sheet is None:
+            missing_sheets.append(sheet_name)
+        else:
+            sheets[sheet_name] = sheet
+
+    if missing_sheets:
+        # Whole sheets are cached so that later calls can project different columns out of the same entry
+        parsed_sheets = _parse_workbook(file_path, missing_sheets, {})
+        for sheet_name, sheet in parsed_sheets.items():
+            if sheet_name != 'Main':
+                sheet = downcast(sheet)
+            _write_cached_sheet(entry_dir, sheet_name, sheet)
+            sheets[sheet_name] = _project(sheet_name, sheet, columns.get(sheet_name))
+        _evict_cache()
+    else:
+        os.utime(entry_dir)
+
+    return {sheet_name: sheets[sheet_name] for sheet_name in sheet_names}
+
+
+def _check_sheets(sheets, available_sheets):
+    if sheets is None:
+        return available_sheets
+    unknown_sheets = [sheet_name for sheet_name in sheets if sheet_name not in available_sheets]
+    if unknown_sheets:
+        raise ValueError(f'Unknown sheets {unknown_sheets}, expected some of {available_sheets}')
+    return list(sheets)
+
+
+def extract_accuracy_data(file_path, sheets=None, columns=None):
+    """
+    sheets limits parsing to the given sheets (by default all of ACCURACY_SHEETS),
+    columns maps a sheet name to the columns to keep from it, e.g. {'Detections': ['time', 'is_correct']}.
+    """
+    return _load_sheets(file_path, _check_sheets(sheets, ACCURACY_SHEETS), columns)
+
+
+def extract_performance_data(file_path, sheets=None, columns=None):
+    """
+    sheets limits parsing to the given sheets (by default all of PERFORMANCE_SHEETS),
+    columns maps a sheet name to the columns to keep from it, e.g. {'Power Usages': ['elapsed_time', 'power_watt']}.
+    Binary traces (_performance.trace, see trace_format) are read through their memory map instead of openpyxl.
+    """
+    sheet_names = _check_sheets(sheets, PERFORMANCE_SHEETS)
+    if file_path.endswith(TRACE_SUFFIX):
+        return _load_trace(file_path, sheet_names, columns)
+    return _load_sheets(file_path, sheet_names, columns)
+
+
+def _load_trace(file_path, sheet_names, columns=None):
+    with stage('extract', file_path) as current:
+        sheets = read_trace(file_path, sheet_names, columns)
+        current.add_rows(_sheet_rows(sheets))
+    return sheets
 
 
 def find_files_by_extension(directory, file_extension):
     matching_files = []
-    for root, dirs, files in os.walk(directory):
-        for filename in files:
-            if filename.endswith(file_extension):
-                file_path = os.path.join(root, filename)
-                matching_files.append(file_path)
+    with stage('discover', directory) as current:
+        for root, dirs, files in os.walk(directory):
+            for filename in files:
+                if filename.endswith(file_extension):
+                    file_path = os.path.join(root, filename)
+                    matching_files.append(file_path)
+        current.add_rows(len(matching_files))
     return matching_files
+
+
+def find_performance_files(directory):
+    """
+    The runs of directory: its _performance.xlsx workbooks and _performance.trace files. A workbook converted to
+    a trace (see convert_traces.py) is read from the trace, unless the workbook changed after the conversion.
+    """
+    workbooks = find_files_by_extension(directory, '_performance.xlsx')
+    traces = find_files_by_extension(directory, TRACE_SUFFIX)
+
+    files = []
+    converted = set()
+    for workbook in workbooks:
+        trace = workbook[:-len('_performance.xlsx')] + TRACE_SUFFIX
+        if os.path.exists(trace):
+            converted.add(trace)
+            if os.path.getmtime(trace) >= os.path.getmtime(workbook):
+                workbook = trace
+        files.append(workbook)
+    # Traces without a workbook, e.g. written by a recorder that is still running
+    return files + [trace for trace in traces if trace not in converted]
+
+
+def _extract_safely(extract_func, file_path):
+    # Stage events recorded in a worker travel back with its result
+    since = event_count()
+    try:
+        return extract_func(file_path), None, take_events(since)
+    except Exception as e:
+        return None, f'{type(e).__name__}: {e}', take_events(since)
+
+
+def extract_files_parallel(file_paths, extract_func, max_workers=None):
+    """
+    Run extract_func (e.g. extract_performance_data) over file_paths in a process pool.
+    Returns (results, failures): results is a list of (file_path, data) pairs in the order of file_paths,
+    failures is a list of (file_path, error message) pairs for the files that could not be parsed.
+    extract_func has to be picklable, use functools.partial to pass extra arguments.
+    """
+    file_paths = list(file_paths)
+    if max_workers is None:
+        max_workers = DEFAULT_WORKERS
+    max_workers = min(max_workers, len(file_paths))
+
+    if max_workers <= 1:
+        outcomes = [_extract_safely(extract_func, file_path) for file_path in file_paths]
+    else:
+        chunk_size = max(1, len(file_paths) // (max_workers * 4))
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            outcomes = list(executor.map(partial(_extract_safely, extract_func), file_paths, chunksize=chunk_size))
+
+    results = []
+    failures = []
+    for file_path, (data, error, events) in zip(file_paths, outcomes):
+        add_events(events)
+        if error is None:
+            results.append((file_path, data))
+        else:
+            failures.append((file_path, error))
+    return results, failures
+
+
+def report_failures(failures):
+    for file_path, error in failures:
+        print(f'Skipping {file_path}: {error}')
@@ -0,0 +1,138 @@
+import argparse
+
+import numpy as np
+
+from detection_stats import accuracy_file_stats, merge_stats_by_key
+from extract_data import extract_files_parallel, find_files_by_extension, report_failures
+from performance_catalog import load_performance_data
+
+# Configuration table column -> whether larger values are better
+OBJECTIVES = {
+    'fps': True,
+    'avg_detection_time': False,
+    'avg_cpu_package_power': False,
+    'avg_memory_usage': False,
+    'average_accuracy': True
+}
+
+CONFIG_COLUMNS = ['cpu', 'cpu_short_name', 'model', 'model_short_name', 'runs', 'fps', 'avg_detection_time',
+                  'avg_cpu_package_power', 'avg_power_usage', 'avg_memory_usage', 'average_accuracy']
+
+
+def accuracy_by_config(keyed_stats):
+    """average_accuracy per (model, cpu) from ((model, cpu), DetectionStats) pairs."""
+    merged = merge_stats_by_key(keyed_stats)
+    return {key: stats.is_correct.mean for key, stats in merged.items()}
+
+
+def load_accuracy_by_config(data_directory, max_workers=None):
+    """average_accuracy per (model, cpu), folded from the accuracy workbooks in parallel."""
+    accuracy_files = find_files_by_extension(data_directory, '_accuracy.xlsx')
+    results, failures = extract_files_parallel(accuracy_files, accuracy_file_stats, max_workers)
+    report_failures(failures)
+
+    return accuracy_by_config(file_stats for file_path, file_stats in results)
+
+
+def configuration_table(run_table, accuracy=None):
+    """Mean of every objective per (cpu, model), one row per configuration with CONFIG_COLUMNS."""
+    configs = run_table.groupby(['cpu', 'model'], dropna=False).agg(
+        cpu_short_name=('cpu_short_name', 'first'),
+        model_short_name=('model_short_name', 'first'),
+        runs=('path', 'size'),
+        fps=('fps', 'mean'),
+        avg_detection_time=('avg_detection_time', 'mean'),
+        avg_cpu_package_power=('avg_cpu_package_power', 'mean'),
+        avg_power_usage=('avg_power_usage', 'mean'),
+        avg_memory_usage=('avg_memory_usage', 'mean')
+    ).reset_index()
+
+    accuracy = accuracy or {}
+    configs['average_accuracy'] = [accuracy.get((model, cpu), np.nan)
+                                   for cpu, model in zip(configs['cpu'], configs['model'])]
+    return configs[CONFIG_COLUMNS]
+
+
+def non_dominated_ranks(values, maximize):
+    """
+    Pareto rank of every row of `values` (0 for the frontier, 1 for the frontier of the rest, ...).
+    The dominance relation of all pairs is computed once with broadcasting, then the fronts are peeled off
+    by counting, for every point, how many points still dominate it (fast non-dominated sort).
+    NaN objectives are ignored, so a missing metric neither helps nor hurts a point.
+    """
+    values = np.where(np.asarray(maximize), values, -values)
+    count = len(values)
+    if count == 0:
+        return np.empty(0, dtype=np.int64)
+
+    a = values[:, np.newaxis, :]
+    b = values[np.newaxis, :, :]
+    comparable = ~(np.isnan(a) | np.isnan(b))
+    at_least = ((a >= b) | ~comparable).all(axis=2)
+    better = ((a > b) & comparable).any(axis=2)
+    dominates = at_least & better
+
+    ranks = np.full(count, -1, dtype=np.int64)
+    dominated_by = dominates.sum(axis=0)
+    front = np.flatnonzero(dominated_by == 0)
+    rank = 0
+    while front.size:
+        ranks[front] = rank
+        dominated_by = dominated_by - dominates[front].sum(axis=0)
+        dominated_by[ranks >= 0] = -1
+        front = np.flatnonzero(dominated_by == 0)
+        rank += 1
+    return ranks
+
+
+def pareto_frontier(configs, objectives=None):
+    """Configuration table with pareto_rank and on_frontier columns, sorted by rank then FPS."""
+    objectives = objectives or OBJECTIVES
+    values = configs[list(objectives)].to_numpy(dtype=np.float64)
+
+    configs = configs.copy()
+    configs['pareto_rank'] = non_dominated_ranks(values, list(objectives.values()))
+    configs['on_frontier'] = configs['pareto_rank'] == 0
+    return configs.sort_values(['pareto_rank', 'fps'], ascending=[True, False], ignore_index=True)
+
+
+def cheapest_configuration(frontier, min_fps, cost='avg_power_usage'):
+    """Configuration with the lowest cost among those reaching min_fps, or None."""
+    candidates = frontier[frontier['fps'] >= min_fps]
+    if candidates.empty:
+        return None
+    return candidates.sort_values([cost, 'fps'], ascending=[True, False]).iloc[0]
+
+
+def print_cheapest_configuration(frontier, min_fps, cost='avg_power_usage'):
+    best = cheapest_configuration(frontier, min_fps, cost)
+    if best is None:
+        print(f'No configuration reaches {min_fps} FPS')
+    else:
+        print(f'Cheapest configuration reaching {min_fps} FPS: {best["model_short_name"]} on '
+              f'{best["cpu_short_name"]} ({best["fps"]:.2f} FPS, {best[cost]:.2f} {cost})')
+
+
+def load_pareto_frontier(data_directory, max_workers=None):
+    run_table = load_performance_data(data_directory, max_workers=max_workers)
+    configs = configuration_table(run_table, load_accuracy_by_config(data_directory, max_workers))
+    return pareto_frontier(configs)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Pareto frontier of models and machines')
+    parser.add_argument('--data-dir', default='data')
+    parser.add_argument('--output', default=None, help='CSV file for the configuration table')
+    parser.add_argument('--min-fps', type=float, default=None, help='Throughput target')
+    parser.add_argument('--cost', default='avg_power_usage', help='Column to minimise among configurations '
+                                                                  'meeting the throughput target')
+    args = parser.parse_args()
+
+    frontier = load_pareto_frontier(args.data_dir)
+    print(frontier.drop(columns=['cpu', 'model']).to_string(index=False))
+
+    if args.output:
+        frontier.to_csv(args.output, index=False)
+
+    if args.min_fps is not None:
+        print_cheapest_configuration(frontier, args.min_fps, args.cost)
@@ -0,0 +1,161 @@
+import hashlib
+import os
+
+import pandas as pd
+
+from extract_data import CACHE_DIR, CACHE_ENABLED, extract_performance_data, extract_files_parallel, \
+    find_performance_files, report_failures
+from steady_state import restrict_to_steady_state
+
+# Run tables are persisted per data directory, next to the workbook cache
+CATALOG_DIR = os.path.join(os.path.dirname(CACHE_DIR), 'catalogs')
+
+CPU_SHORT_NAMES = {
+    'Intel(R) Core(TM) i5-4200H CPU @ 2.80GHz': 'PC1',
+    'Intel(R) Core(TM) i5-6300U CPU @ 2.40GHz': 'PC2',
+    'AMD Ryzen 5 5600 6-Core Processor': 'PC3',
+    'AMD Ryzen 5 2600 Six-Core Processor': 'PC4'
+}
+
+MODEL_SHORT_NAMES = {
+    'yolov8s': 'yolo v8 s',
+    'ssd_mobilenet_v2_fpnlite_320x320': 'mobile net v2',
+    'efficient_det_lite1': 'efficient det lite 1',
+    'efficient_det_lite2': 'efficient det lite 2',
+    'efficient_det_lite3': 'efficient det lite 3',
+    'faster_rcnn_resnet101_v1_640x640': 'faster rcnn'
+}
+
+# Run table column -> key in the 'Main' sheet
+METRIC_FIELDS = {
+    'avg_detection_time': 'average_detection_time',
+    'avg_cpu_usage': 'avg_cpu_usage',
+    'cpu_usage_std': 'cpu_usage_std',
+    'cpu_freq_avg': 'cpu_freq_avg',
+    'cpu_freq_std': 'cpu_freq_std',
+    'avg_cpu_package_power': 'avg_cpu_package_power',
+    'cpu_package_power_std': 'cpu_package_power_std',
+    'avg_cpu_package_temp': 'avg_cpu_package_temp',
+    'cpu_package_temp_std': 'cpu_package_temp_std',
+    'avg_memory_usage': 'avg_memory_usage',
+    'memory_usage_std': 'memory_usage_std',
+    'avg_power_usage': 'avg_power_usage',
+    'power_usage_std': 'power_usage_std',
+    'fps': 'fps'
+}
+
+RUN_TABLE_COLUMNS = ['date', 'cpu', 'cpu_short_name', 'model', 'model_short_name'] + list(METRIC_FIELDS) + \
+                    ['file', 'path']
+
+# File state used to decide whether a catalogued run has to be re-read
+_STATE_COLUMNS = ['mtime_ns', 'size']
+
+
+def _catalog_path(directory):
+    directory_hash = hashlib.sha1(os.path.abspath(directory).encode('utf-8')).hexdigest()[:16]
+    return os.path.join(CATALOG_DIR, f'{directory_hash}.parquet')
+
+
+def _file_state(file_path):
+    stat = os.stat(file_path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _main_record(main_data):
+    record = {
+        'date': main_data.get('date'),
+        'cpu': main_data.get('cpu'),
+        'cpu_short_name': CPU_SHORT_NAMES.get(main_data.get('cpu')),
+        'model': main_data.get('model'),
+        'model_short_name': MODEL_SHORT_NAMES.get(main_data.get('model')),
+    }
+    for column, key in METRIC_FIELDS.items():
+        record[column] = main_data.get(key)
+    return record
+
+
+def _run_record(file_path):
+    return _main_record(extract_performance_data(file_path, sheets=['Main'])['Main'])
+
+
+def _typed(run_table):
+    for column in ['date', 'cpu', 'cpu_short_name', 'model', 'model_short_name', 'file', 'path']:
+        run_table[column] = run_table[column].map(lambda value: None if pd.isna(value) else str(value))
+    for column in METRIC_FIELDS:
+        run_table[column] = pd.to_numeric(run_table[column], errors='coerce').astype('float64')
+    for column in _STATE_COLUMNS:
+        run_table[column] = run_table[column].astype('int64')
+    return run_table
+
+
+def _read_catalog(catalog_path):
+    if not os.path.exists(catalog_path):
+        return None
+    try:
+        return pd.read_parquet(catalog_path)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_catalog(run_table, catalog_path):
+    os.makedirs(os.path.dirname(catalog_path), exist_ok=True)
+    tmp_path = f'{catalog_path}.{os.getpid()}.tmp'
+    run_table.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, catalog_path)
+
+
+def load_performance_data(directory, persist=CACHE_ENABLED, max_workers=None, steady_state=False):
+    """
+    Build the run table (one row per performance run, see find_performance_files, columns RUN_TABLE_COLUMNS) for a data directory.
+    The table is persisted, so later calls only read the 'Main' sheet of files that are new or changed since,
+    and drop the rows of files that disappeared.
+    With steady_state, resource and power statistics only cover each run's steady-state window
+    (see steady_state.restrict_to_steady_state) and STEADY_STATE_COLUMNS are added.
+    """
+    files = find_performance_files(directory)
+    paths = [os.path.abspath(file) for file in files]
+    states = {path: _file_state(path) for path in paths}
+
+    catalog_path = _catalog_path(directory)
+    catalog = _read_catalog(catalog_path) if persist else None
+
+    known_rows = {}
+    if catalog is not None:
+        for row in catalog.to_dict('records'):
+            if states.get(row['path']) == (row['mtime_ns'], row['size']):
+                known_rows[row['path']] = row
+
+    new_paths = [path for path in paths if path not in known_rows]
+    results, failures = extract_files_parallel(new_paths, _run_record, max_workers)
+    report_failures(failures)
+
+    for path, record in results:
+        record['file'] = os.path.basename(path)
+        record['path'] = path
+        record['mtime_ns'], record['size'] = states[path]
+        known_rows[path] = record
+
+    rows = [known_rows[path] for path in paths if path in known_rows]
+    run_table = _typed(pd.DataFrame(rows, columns=RUN_TABLE_COLUMNS + _STATE_COLUMNS))
+
+    if persist and (new_paths or catalog is None or len(catalog) != len(run_table)):
+        _write_catalog(run_table, catalog_path)
+
+    run_table = run_table[RUN_TABLE_COLUMNS]
+    if steady_state:
+        run_table = restrict_to_steady_state(run_table, max_workers=max_workers)
+    return run_table
+
+
+def run_table_from_results(results):
+    """Run table (columns RUN_TABLE_COLUMNS) of already loaded extract_performance_data results."""
+    rows = []
+    for file_path, data in results:
+        record = _main_record(data['Main'])
+        record['file'] = os.path.basename(file_path)
+        record['path'] = os.path.abspath(file_path)
+        rows.append(record)
+
+    run_table = pd.DataFrame(rows, columns=RUN_TABLE_COLUMNS)
+    run_table[_STATE_COLUMNS] = 0
+    return _typed(run_table)[RUN_TABLE_COLUMNS]
@@ -1,15 +1,13 @@
+from functools import partial
 import matplotlib.pyplot as plt
-from extract_data import extract_accuracy_data, find_files_by_extension
+from extract_data import extract_accuracy_data, extract_files_parallel, find_files_by_extension, report_failures
+from rendering import DEFAULT_FORMATS, show_or_save
 
-if __name__ == "__main__":
-    data_directory = "../data"
-
-    accuracy_files = find_files_by_extension(data_directory, "_accuracy.xlsx")
 
+def count_detections_by_model(results):
     merged_data = {}
 
-    for file_path in accuracy_files:
-        data = extract_accuracy_data(file_path)
+    for file_path, data in results:
         model_name = data['Main'].get('model', 'Unknown Model')
         detections_df = data['Detections']
 
@@ -22,6 +20,10 @@ if __name__ == "__main__":
         else:
             merged_data[model_name] = {'Correct': correct_count, 'Incorrect': incorrect_count}
 
+    return merged_data
+
+
+def plot_accuracy_bars(merged_data, output_dir=None, formats=DEFAULT_FORMATS):
     models = list(merged_data.keys())
     correct_counts = [merged_data[model]['Correct'] for model in models]
     incorrect_counts = [merged_data[model]['Incorrect'] for model in models]
@@ -56,4 +58,20 @@ if __name__ == "__main__":
                  va='center', color='white', fontsize=20)
 
     plt.tight_layout()
-    plt.show()
+    return show_or_save('correct_vs_incorrect_detections', output_dir, formats)
+
+
+def load_detection_counts(data_directory):
+    accuracy_files = find_files_by_extension(data_directory, "_accuracy.xlsx")
+
+    results, failures = extract_files_parallel(accuracy_files,
+                                               partial(extract_accuracy_data, columns={'Detections': ['is_correct']}))
+    report_failures(failures)
+
+    return count_detections_by_model(results)
+
+
+if __name__ == "__main__":
+    data_directory = "../data"
+
+    plot_accuracy_bars(load_detection_counts(data_directory))
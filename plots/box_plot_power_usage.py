@@ -1,18 +1,16 @@
 import os
+from functools import partial
 import matplotlib.pyplot as plt
-import pandas as pd
 import seaborn as sns
-from extract_data import extract_performance_data, find_files_by_extension
+from compact_data import concat_runs, run_label
+from extract_data import extract_performance_data, extract_files_parallel, find_performance_files, report_failures
+from rendering import DEFAULT_FORMATS, show_or_save
 
-if __name__ == "__main__":
-    data_directory = "../data"
-
-    performance_files = find_files_by_extension(data_directory, "_performance.xlsx")
 
+def group_power_data_by_cpu(results):
     power_data_by_cpu = {}
 
-    for file_path in performance_files:
-        data = extract_performance_data(file_path)
+    for file_path, data in results:
         model_name = data['Main'].get('model', 'Unknown Model')
         cpu_type = data['Main'].get('cpu', 'Unknown CPU')
         power_df = data['Power Usages']
@@ -20,34 +18,58 @@ if __name__ == "__main__":
         if cpu_type not in power_data_by_cpu:
             power_data_by_cpu[cpu_type] = []
 
-        power_df['Model'] = model_name
+        power_df = power_df.assign(Model=run_label(model_name, len(power_df)))
 
         power_data_by_cpu[cpu_type].append(power_df)
 
+    return power_data_by_cpu
+
+
+def get_unique_models(power_data_by_cpu):
     unique_models = set()
     for cpu_type, df_list in power_data_by_cpu.items():
         for df in df_list:
             unique_models.update(df['Model'].unique())
-    unique_models = sorted(unique_models)  # Sort models alphabetically
+    return sorted(unique_models)  # Sort models alphabetically
 
+
+def plot_power_boxplot(cpu_type, df_list, unique_models, output_dir=None, formats=DEFAULT_FORMATS):
     colors = sns.color_palette('tab10', n_colors=len(unique_models))
 
     model_colors = {model: colors[i] for i, model in enumerate(unique_models)}
 
-    for cpu_type, df_list in power_data_by_cpu.items():
-        combined_df = pd.concat(df_list, ignore_index=True)
+    combined_df = concat_runs(df_list, categories={'Model': unique_models})
+
+    plt.figure(figsize=(12, 8))
+    plt.title(f'Boxplot of Power Usage for CPU Type: {cpu_type}')
+    plt.xlabel('Model')
+    plt.ylabel('Power Usage (Watt)')
+    plt.xticks(rotation=45)
+    plt.grid(True)
+
+    sns.boxplot(x='Model', y='power_watt', data=combined_df, hue='Model', palette=model_colors, dodge=False,
+                showfliers=False)
 
-        combined_df['Model'] = pd.Categorical(combined_df['Model'], categories=unique_models, ordered=True)
+    plt.tight_layout()
+    return show_or_save(f'power_usage_boxplot_{cpu_type}', output_dir, formats)
 
-        plt.figure(figsize=(12, 8))
-        plt.title(f'Boxplot of Power Usage for CPU Type: {cpu_type}')
-        plt.xlabel('Model')
-        plt.ylabel('Power Usage (Watt)')
-        plt.xticks(rotation=45)
-        plt.grid(True)
 
-        sns.boxplot(x='Model', y='power_watt', data=combined_df, hue='Model', palette=model_colors, dodge=False,
-                    showfliers=False)
+def load_power_data_by_cpu(data_directory):
+    performance_files = find_performance_files(data_directory)
 
-        plt.tight_layout()
-        plt.show()
+    results, failures = extract_files_parallel(
+        performance_files,
+        partial(extract_performance_data, sheets=['Main', 'Power Usages'], columns={'Power Usages': ['power_watt']}))
+    report_failures(failures)
+
+    return group_power_data_by_cpu(results)
+
+
+if __name__ == "__main__":
+    data_directory = "../data"
+
+    power_data_by_cpu = load_power_data_by_cpu(data_directory)
+    unique_models = get_unique_models(power_data_by_cpu)
+
+    for cpu_type, df_list in power_data_by_cpu.items():
+        plot_power_boxplot(cpu_type, df_list, unique_models)
@@ -1,28 +1,30 @@
+from functools import partial
 import matplotlib.pyplot as plt
 import pandas as pd
 import seaborn as sns
-from extract_data import extract_accuracy_data, find_files_by_extension
+from compact_data import concat_runs, run_label
+from extract_data import extract_accuracy_data, extract_files_parallel, find_files_by_extension, report_failures
+from rendering import DEFAULT_FORMATS, show_or_save
 
-if __name__ == "__main__":
-    data_directory = "../data"
-
-    accuracy_files = find_files_by_extension(data_directory, "_accuracy.xlsx")
 
+def combine_detections(results):
     all_detections = []
 
-    for file_path in accuracy_files:
-        data = extract_accuracy_data(file_path)
+    for file_path, data in results:
         model_name = data['Main'].get('model', 'Unknown Model')
         detections_df = data['Detections']
 
-        detections_df['Model'] = model_name
+        all_detections.append(detections_df.assign(Model=run_label(model_name, len(detections_df))))
 
-        all_detections.append(detections_df)
+    return concat_runs(all_detections)
 
-    combined_df = pd.concat(all_detections, ignore_index=True)
 
+def plot_score_boxplot(combined_df, output_dir=None, formats=DEFAULT_FORMATS):
     # Filter out rows where is_correct is 0
     combined_df = combined_df[combined_df['is_correct'] != 0]
+    if isinstance(combined_df['Model'].dtype, pd.CategoricalDtype):
+        # Models left without correct detections would keep their category and be missing from the palette
+        combined_df = combined_df.assign(Model=combined_df['Model'].cat.remove_unused_categories())
 
     unique_models = combined_df['Model'].unique()
     colors = sns.color_palette('tab10', n_colors=len(unique_models))
@@ -42,4 +44,20 @@ if __name__ == "__main__":
 
     plt.legend().set_visible(False)  # Hide legend to comply with the warning
     plt.tight_layout()
-    plt.show()
+    return show_or_save('score_boxplot', output_dir, formats)
+
+
+def load_detections(data_directory):
+    accuracy_files = find_files_by_extension(data_directory, "_accuracy.xlsx")
+
+    results, failures = extract_files_parallel(
+        accuracy_files, partial(extract_accuracy_data, columns={'Detections': ['is_correct', 'score']}))
+    report_failures(failures)
+
+    return combine_detections(results)
+
+
+if __name__ == "__main__":
+    data_directory = "../data"
+
+    plot_score_boxplot(load_detections(data_directory))
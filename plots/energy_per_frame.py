@@ -0,0 +1,62 @@
+from matplotlib import pyplot as plt
+import seaborn as sns
+
+from energy import add_energy_columns
+from performance_catalog import load_performance_data
+from rendering import DEFAULT_FORMATS, show_or_save
+
+
+def draw_energy_charts(df, output_dir=None, formats=DEFAULT_FORMATS):
+    # Compute the average FPS and average energy per frame for each model
+    avg_values = df.groupby('model_short_name').agg(
+        avg_fps=('fps', 'mean'),
+        avg_energy_per_frame=('energy_per_frame_j', 'mean')
+    ).reset_index()
+
+    # Plot the dot chart for FPS vs. energy per frame
+    plt.figure(figsize=(12, 8))
+    sns.scatterplot(
+        data=avg_values,
+        x='avg_energy_per_frame',
+        y='avg_fps',
+        hue='model_short_name',
+        s=200,  # Size of dots
+        edgecolor='w',  # White edge color for better visibility
+        linewidth=0.5
+    )
+    plt.title('Average FPS vs. Average Energy per Frame by Model')
+    plt.xlabel('Average Energy per Frame (J)')
+    plt.ylabel('Average FPS')
+    plt.grid(True, linestyle='--', linewidth=0.7, color='gray')
+    plt.tight_layout()
+    written_files = show_or_save('fps_vs_energy_per_frame', output_dir, formats)
+
+    # Compare frames per joule of every model on every machine
+    frames_per_joule = df.groupby(['model_short_name', 'cpu_short_name'])['frames_per_joule'].mean().reset_index()
+
+    plt.figure(figsize=(12, 8))
+    ax = sns.barplot(
+        data=frames_per_joule,
+        y='model_short_name',
+        x='frames_per_joule',
+        hue='cpu_short_name',
+        orient='h',
+        errorbar=None
+    )
+    plt.title('Frames per Joule')
+    plt.xlabel('Frames per Joule (wall power)')
+    plt.ylabel('Model')
+    plt.grid(axis='x', linestyle='--', linewidth=0.7, color='gray')
+    ax.yaxis.grid(True, linestyle='--', linewidth=0.7, color='gray')
+    plt.legend(bbox_to_anchor=(0.5, -0.1), loc='upper center', ncol=4)
+    plt.tight_layout()
+    written_files += show_or_save('frames_per_joule', output_dir, formats)
+
+    return written_files
+
+
+if __name__ == '__main__':
+    # Load the performance data and integrate the power traces of every run
+    data = add_energy_columns(load_performance_data('../data'))
+
+    draw_energy_charts(data)
@@ -1,68 +1,33 @@
-import os
-import pandas as pd
 from matplotlib import pyplot as plt
 import seaborn as sns
 import numpy as np
 
-from extract_data import extract_performance_data, find_files_by_extension
-
-
-def load_performance_data(directory):
-    files = find_files_by_extension(directory, '_performance.xlsx')
-    data = []
-    cpus = {
-        'Intel(R) Core(TM) i5-4200H CPU @ 2.80GHz': 'PC1',
-        'Intel(R) Core(TM) i5-6300U CPU @ 2.40GHz': 'PC2',
-        'AMD Ryzen 5 5600 6-Core Processor': 'PC3',
-        'AMD Ryzen 5 2600 Six-Core Processor': 'PC4'
-    }
-    models = {
-        'yolov8s': 'yolo v8 s',
-        'ssd_mobilenet_v2_fpnlite_320x320': 'mobile net v2',
-        'efficient_det_lite1': 'efficient det lite 1',
-        'efficient_det_lite2': 'efficient det lite 2',
-        'efficient_det_lite3': 'efficient det lite 3',
-        'faster_rcnn_resnet101_v1_640x640': 'faster rcnn'
-    }
-    for file in files:
-        extracted_data = extract_performance_data(file)
-        main_data = extracted_data['Main']
-
-        # Extracting specific data and adding it to a dictionary
-        performance_data = {
-            'date': main_data.get('date'),
-            'cpu': main_data.get('cpu'),
-            'cpu_short_name': cpus.get(main_data.get('cpu')),
-            'model': main_data.get('model'),
-            'model_short_name': models.get(main_data.get('model')),
-            'avg_detection_time': main_data.get('average_detection_time'),
-            'avg_cpu_usage': main_data.get('avg_cpu_usage'),
-            'cpu_usage_std': main_data.get('cpu_usage_std'),
-            'cpu_freq_avg': main_data.get('cpu_freq_avg'),
-            'cpu_freq_std': main_data.get('cpu_freq_std'),
-            'avg_cpu_package_power': main_data.get('avg_cpu_package_power'),
-            'cpu_package_power_std': main_data.get('cpu_package_power_std'),
-            'avg_cpu_package_temp': main_data.get('avg_cpu_package_temp'),
-            'cpu_package_temp_std': main_data.get('cpu_package_temp_std'),
-            'avg_memory_usage': main_data.get('avg_memory_usage'),
-            'memory_usage_std': main_data.get('memory_usage_std'),
-            'avg_power_usage': main_data.get('avg_power_usage'),
-            'power_usage_std': main_data.get('power_usage_std'),
-            'fps': main_data.get('fps'),
-            'file': os.path.basename(file)
-        }
-
-        data.append(performance_data)
-
-    return pd.DataFrame(data)
-
-
-def draw_dot_charts(df):
-    # Compute the average FPS and average CPU package power for each model
-    avg_values_fps = df.groupby('model_short_name').agg(
-        avg_fps=('fps', 'mean'),
-        avg_cpu_package_power=('avg_cpu_package_power', 'mean')
-    ).reset_index()
+from pareto import configuration_table, load_accuracy_by_config, pareto_frontier
+from performance_catalog import load_performance_data
+from rendering import DEFAULT_FORMATS, show_or_save
+from rollup import ensure_cube, slice_cube
+
+
+def highlight_frontier(points, x, y, frontier_models):
+    # Ring the points of models with at least one configuration on the Pareto frontier
+    on_frontier = points[points['model_short_name'].isin(frontier_models)]
+    plt.scatter(on_frontier[x], on_frontier[y], s=450, facecolors='none', edgecolors='black', linewidths=1.5,
+                label='Pareto frontier')
+    plt.legend()
+
+
+def draw_dot_charts(df, output_dir=None, formats=DEFAULT_FORMATS, frontier=None):
+    # Models with a configuration on the Pareto frontier (see pareto.pareto_frontier), if given
+    frontier_models = set(frontier.loc[frontier['on_frontier'], 'model_short_name']) if frontier is not None \
+        else None
+
+    # df may be a run table or its rollup cube (see rollup.build_cube)
+    per_model = slice_cube(ensure_cube(df), ['model_short_name'],
+                           ['fps', 'avg_detection_time', 'avg_cpu_package_power'])
+
+    # Average FPS and average CPU package power for each model
+    avg_values_fps = per_model[['model_short_name', 'fps', 'avg_cpu_package_power']].rename(
+        columns={'fps': 'avg_fps'})
 
     # Plot the dot chart for FPS vs. CPU Package Power
     plt.figure(figsize=(12, 8))
@@ -75,18 +40,17 @@ def draw_dot_charts(df):
         edgecolor='w',  # White edge color for better visibility
         linewidth=0.5
     )
+    if frontier_models:
+        highlight_frontier(avg_values_fps, 'avg_cpu_package_power', 'avg_fps', frontier_models)
     plt.title('Average FPS vs. Average CPU Package Power by Model')
     plt.xlabel('Average CPU Package Power (Watts)')
     plt.ylabel('Average FPS')
     plt.grid(True, linestyle='--', linewidth=0.7, color='gray')
     plt.tight_layout()
-    plt.show()
+    written_files = show_or_save('fps_vs_cpu_package_power', output_dir, formats)
 
-    # Compute the average detection time and average CPU package power for each model
-    avg_values_detection_time = df.groupby('model_short_name').agg(
-        avg_detection_time=('avg_detection_time', 'mean'),
-        avg_cpu_package_power=('avg_cpu_package_power', 'mean')
-    ).reset_index()
+    # Average detection time and average CPU package power for each model
+    avg_values_detection_time = per_model[['model_short_name', 'avg_detection_time', 'avg_cpu_package_power']]
 
     # Plot the dot chart for Detection Time vs. CPU Package Power
     plt.figure(figsize=(12, 8))
@@ -99,15 +63,60 @@ def draw_dot_charts(df):
         edgecolor='w',  # White edge color for better visibility
         linewidth=0.5
     )
+    if frontier_models:
+        highlight_frontier(avg_values_detection_time, 'avg_cpu_package_power', 'avg_detection_time',
+                           frontier_models)
     plt.title('Average Detection Time vs. Average CPU Package Power by Model')
     plt.xlabel('Average CPU Package Power (Watts)')
     plt.ylabel('Average Detection Time (ms)')
     plt.grid(True, linestyle='--', linewidth=0.7, color='gray')
     plt.tight_layout()
-    plt.show()
+    written_files += show_or_save('detection_time_vs_cpu_package_power', output_dir, formats)
+
+    return written_files
+
+
+def draw_pareto_charts(frontier, output_dir=None, formats=DEFAULT_FORMATS):
+    written_files = []
+    for y, ylabel, better in [('fps', 'Average FPS', 'max'), ('avg_detection_time', 'Average Detection Time', 'min')]:
+        # Every (model, machine) configuration, the Pareto optimal ones ringed
+        plt.figure(figsize=(12, 8))
+        sns.scatterplot(
+            data=frontier,
+            x='avg_cpu_package_power',
+            y=y,
+            hue='model_short_name',
+            style='cpu_short_name',
+            s=200,
+            edgecolor='w',
+            linewidth=0.5
+        )
+        on_frontier = frontier[frontier['on_frontier']]
+        plt.scatter(on_frontier['avg_cpu_package_power'], on_frontier[y], s=450, facecolors='none',
+                    edgecolors='black', linewidths=1.5, label='Pareto frontier (all objectives)')
+
+        # Trade-off curve of the two plotted objectives alone
+        points = frontier[['avg_cpu_package_power', y]].dropna().sort_values('avg_cpu_package_power')
+        best = points[y].cummax() if better == 'max' else points[y].cummin()
+        curve = points[points[y] == best]
+        plt.step(curve['avg_cpu_package_power'], curve[y], where='post', color='black', linestyle='--',
+                 linewidth=1, label='Power trade-off')
+
+        plt.title(f'{ylabel} vs. Average CPU Package Power by Model and Machine')
+        plt.xlabel('Average CPU Package Power (Watts)')
+        plt.ylabel(ylabel)
+        plt.legend(bbox_to_anchor=(1.02, 1), loc='upper left')
+        plt.grid(True, linestyle='--', linewidth=0.7, color='gray')
+        plt.tight_layout()
+        written_files += show_or_save(f'{y}_vs_cpu_package_power_pareto', output_dir, formats)
+
+    return written_files
 
 
-# Load the performance data
-data = load_performance_data('../data')
+if __name__ == '__main__':
+    # Load the performance data
+    data = load_performance_data('../data')
+    frontier = pareto_frontier(configuration_table(data, load_accuracy_by_config('../data')))
 
-draw_dot_charts(data)
\ No newline at end of file
+    draw_dot_charts(data, frontier=frontier)
+    draw_pareto_charts(frontier)
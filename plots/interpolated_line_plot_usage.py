@@ -1,15 +1,23 @@
+import argparse
 import os
+from functools import partial
 import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
-from extract_data import extract_performance_data, find_files_by_extension
+from compact_data import run_label
+from extract_data import extract_performance_data, extract_files_parallel, find_performance_files, report_failures
+from plots.line_plot_usage import METRICS, get_model_colors, group_resource_data_by_cpu, load_resource_data_by_cpu
+from rendering import DEFAULT_FORMATS, show_or_save
+from resampling import RESAMPLING_METHODS, RESOURCE_METRICS, resample_runs
 
 
-def plot_metric_over_time(data_by_cpu, metric, ylabel, title, model_colors):
+def plot_metric_over_time(data_by_cpu, metric, ylabel, title, model_colors, output_dir=None,
+                          formats=DEFAULT_FORMATS):
     unique_models = sorted(
         set(model for df_list in data_by_cpu.values() for df in df_list for model in df['Model'].unique()))
 
+    written_files = []
     for cpu_type, df_list in data_by_cpu.items():
         plt.figure(figsize=(12, 8))
         plt.title(f'{title} for CPU Type: {cpu_type}')
@@ -25,84 +33,117 @@ def plot_metric_over_time(data_by_cpu, metric, ylabel, title, model_colors):
         plt.legend(title='Model', loc='lower right', bbox_to_anchor=(1, 0))
         plt.grid(True)
         plt.tight_layout()
-        plt.show()
+        written_files += show_or_save(f'{metric}_over_time_interpolated_{cpu_type}', output_dir, formats)
+    return written_files
 
 
-def process_and_interpolate_data(df):
+def interpolate_resource_data_by_cpu(resource_data_by_cpu, target_points=240, method='linear'):
     """
-    Process the DataFrame to ensure it has exactly 240 points.
-    If the DataFrame has fewer than 240 points, interpolate the data.
-    If the DataFrame has more than 240 points, downsample the data.
+    Resample every run so that it has exactly target_points points over 0-100 % of its elapsed time.
+    All runs are resampled together in one vectorized pass, see resample_runs for the available methods
+    ('minmax' keeps the peaks that plain downsampling would drop).
     """
-    target_points = 240
-    df = df.sort_values(by='elapsed_time_percent')
-
-    if len(df) < target_points:
-        # Interpolate to get 240 points
-        interp_df = pd.DataFrame({
-            'elapsed_time_percent': np.linspace(0, 100, target_points)
-        })
-        for column in df.columns:
-            if column != 'elapsed_time_percent' and column != 'Model':
-                interp_df[column] = np.interp(interp_df['elapsed_time_percent'], df['elapsed_time_percent'], df[column])
-        interp_df['Model'] = df['Model'].iloc[0]  # Keep the model name consistent
-    elif len(df) > target_points:
-        # Downsample to get 240 points
-        indices = np.linspace(0, len(df) - 1, target_points).astype(int)
-        interp_df = df.iloc[indices].reset_index(drop=True)
-    else:
-        # Already has 240 points
-        interp_df = df
+    runs = [(cpu_type, df) for cpu_type, df_list in resource_data_by_cpu.items() for df in df_list if len(df)]
+    grid, values = resample_runs([df for _, df in runs], RESOURCE_METRICS, target_points, method)
 
-    return interp_df
+    interpolated_data_by_cpu = {cpu_type: [] for cpu_type in resource_data_by_cpu}
+    for (cpu_type, df), run_values in zip(runs, values):
+        interp_df = pd.DataFrame(run_values, columns=RESOURCE_METRICS)
+        interp_df.insert(0, 'elapsed_time_percent', grid)
+        interp_df['Model'] = run_label(df['Model'].iloc[0], len(interp_df))  # Keep the model name consistent
+        interpolated_data_by_cpu[cpu_type].append(interp_df)
 
+    return interpolated_data_by_cpu
 
-if __name__ == "__main__":
-    data_directory = "../data"
 
-    performance_files = find_files_by_extension(data_directory, "_performance.xlsx")
+def compute_metric_bands(resource_data_by_cpu, percentiles=(10, 90), target_points=240, method='linear'):
+    """
+    Aggregate all runs of every (cpu, model) pair on a common elapsed time grid.
+    Returns (grid, bands) where bands maps (cpu, model) to a dict with the number of runs and the
+    'mean', 'lower' and 'upper' percentile curves, each of shape (target_points, len(RESOURCE_METRICS)).
+    """
+    runs = [((cpu_type, df['Model'].iloc[0]), df)
+            for cpu_type, df_list in resource_data_by_cpu.items() for df in df_list if len(df)]
+    grid, values = resample_runs([df for _, df in runs], RESOURCE_METRICS, target_points, method)
+
+    group_keys = list(dict.fromkeys(key for key, _ in runs))
+    group_index = {key: i for i, key in enumerate(group_keys)}
+    group_ids = np.array([group_index[key] for key, _ in runs], dtype=np.int64)
+
+    bands = {}
+    for group_id, key in enumerate(group_keys):
+        group_values = values[group_ids == group_id]
+        lower, upper = np.nanpercentile(group_values, percentiles, axis=0)
+        bands[key] = {
+            'runs': len(group_values),
+            'mean': np.nanmean(group_values, axis=0),
+            'lower': lower,
+            'upper': upper
+        }
+
+    return grid, bands
+
+
+def plot_metric_bands(grid, bands, metric, ylabel, title, model_colors, output_dir=None, formats=DEFAULT_FORMATS):
+    """
+    One mean line and one percentile band per model, whatever the number of runs behind them.
+    """
+    metric_index = RESOURCE_METRICS.index(metric)
+    cpu_types = list(dict.fromkeys(cpu_type for cpu_type, _ in bands))
 
-    resource_data_by_cpu = {}
+    written_files = []
+    for cpu_type in cpu_types:
+        plt.figure(figsize=(12, 8))
+        plt.title(f'{title} for CPU Type: {cpu_type}')
+        plt.xlabel('Elapsed Time (%)')
+        plt.ylabel(ylabel)
 
-    for file_path in performance_files:
-        data = extract_performance_data(file_path)
-        model_name = data['Main'].get('model', 'Unknown Model')
-        cpu_type = data['Main'].get('cpu', 'Unknown CPU')
-        resource_df = data['Resource Usages']
-        resource_df['Model'] = model_name
+        for (band_cpu_type, model), band in sorted(bands.items()):
+            if band_cpu_type != cpu_type:
+                continue
+            color = model_colors[model]
+            plt.plot(grid, band['mean'][:, metric_index], label=f'{model} ({band["runs"]} runs)', color=color)
+            plt.fill_between(grid, band['lower'][:, metric_index], band['upper'][:, metric_index], color=color,
+                             alpha=0.2, linewidth=0)
 
-        # Convert elapsed time to percentage of completion
-        max_elapsed_time = resource_df['elapsed_time'].max()
-        resource_df['elapsed_time_percent'] = (resource_df['elapsed_time'] / max_elapsed_time) * 100
+        plt.legend(title='Model', loc='lower right', bbox_to_anchor=(1, 0))
+        plt.grid(True)
+        plt.tight_layout()
+        written_files += show_or_save(f'{metric}_over_time_bands_{cpu_type}', output_dir, formats)
+    return written_files
 
-        # Process and interpolate data
-        resource_df = process_and_interpolate_data(resource_df)
 
-        if cpu_type not in resource_data_by_cpu:
-            resource_data_by_cpu[cpu_type] = []
+def load_interpolated_resource_data_by_cpu(data_directory, method='linear'):
+    performance_files = find_performance_files(data_directory)
 
-        resource_data_by_cpu[cpu_type].append(resource_df)
+    results, failures = extract_files_parallel(performance_files,
+                                               partial(extract_performance_data, sheets=['Main', 'Resource Usages']))
+    report_failures(failures)
 
-    unique_models = set()
-    for cpu_type, df_list in resource_data_by_cpu.items():
-        for df in df_list:
-            unique_models.update(df['Model'].unique())
-    unique_models = sorted(unique_models)
+    return interpolate_resource_data_by_cpu(group_resource_data_by_cpu(results), method=method)
 
-    colors = sns.color_palette('tab10', n_colors=len(unique_models))
-    model_colors = {model: colors[i] for i, model in enumerate(unique_models)}
 
-    # Plot memory usage over time
-    plot_metric_over_time(resource_data_by_cpu, 'memory_mb', 'Memory Usage (MB)', 'Memory Usage Over Time',
-                          model_colors)
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--method', default='linear', choices=RESAMPLING_METHODS)
+    parser.add_argument('--bands', action='store_true',
+                        help='draw the mean and a percentile band per model instead of one line per run')
+    parser.add_argument('--percentiles', nargs=2, type=float, default=[10, 90])
+    args = parser.parse_args()
 
-    # Plot CPU usage over time
-    plot_metric_over_time(resource_data_by_cpu, 'cpu_usage', 'CPU Usage (%)', 'CPU Usage Over Time', model_colors)
+    data_directory = "../data"
 
-    # Plot package power usage over time
-    plot_metric_over_time(resource_data_by_cpu, 'cpu_package_power', 'Package Power Usage (Watt)',
-                          'Package Power Usage Over Time', model_colors)
+    resource_data_by_cpu = load_resource_data_by_cpu(data_directory)
+    model_colors = get_model_colors(resource_data_by_cpu)
 
-    # Plot CPU package temperature over time
-    plot_metric_over_time(resource_data_by_cpu, 'cpu_package_temp', 'CPU Package Temperature (°C)',
-                          'CPU Package Temperature Over Time', model_colors)
+    if args.bands:
+        grid, bands = compute_metric_bands(resource_data_by_cpu, args.percentiles, method=args.method)
+    else:
+        resource_data_by_cpu = interpolate_resource_data_by_cpu(resource_data_by_cpu, method=args.method)
+
+    # Plot memory usage, CPU usage, package power usage and CPU package temperature over time
+    for metric, ylabel, title in METRICS:
+        if args.bands:
+            plot_metric_bands(grid, bands, metric, ylabel, title, model_colors)
+        else:
+            plot_metric_over_time(resource_data_by_cpu, metric, ylabel, title, model_colors)
@@ -1,74 +1,122 @@
 import os
+from functools import partial
 import matplotlib.pyplot as plt
 import seaborn as sns
-from extract_data import extract_performance_data, find_files_by_extension
-
-
-def plot_metric_over_time(data_by_cpu, metric, ylabel, title, model_colors):
-    unique_models = sorted(
-        set(model for df_list in data_by_cpu.values() for df in df_list for model in df['Model'].unique()))
-
-    for cpu_type, df_list in data_by_cpu.items():
+from compact_data import run_label
+from extract_data import extract_performance_data, extract_files_parallel, find_performance_files, report_failures
+from rendering import DEFAULT_FORMATS, show_or_save
+from trace_pyramid import DEFAULT_MAX_POINTS, TracePyramid, plot_envelope
+
+# (metric, y axis label, title) of every usage over time chart
+METRICS = [
+    ('memory_mb', 'Memory Usage (MB)', 'Memory Usage Over Time'),
+    ('cpu_usage', 'CPU Usage (%)', 'CPU Usage Over Time'),
+    ('cpu_package_power', 'Package Power Usage (Watt)', 'Package Power Usage Over Time'),
+    ('cpu_package_temp', 'CPU Package Temperature (°C)', 'CPU Package Temperature Over Time')
+]
+
+
+def plot_metric_over_time(pyramids_by_cpu, metric, ylabel, title, model_colors, output_dir=None,
+                          formats=DEFAULT_FORMATS, max_points=DEFAULT_MAX_POINTS):
+    """pyramids_by_cpu as returned by group_resource_pyramids, built once and shared by every metric."""
+    unique_models = sorted(set(model for pyramids in pyramids_by_cpu.values() for model, _ in pyramids))
+
+    written_files = []
+    for cpu_type, pyramids in pyramids_by_cpu.items():
         plt.figure(figsize=(12, 8))
         plt.title(f'{title} for CPU Type: {cpu_type}')
         plt.xlabel('Elapsed Time (%)')
         plt.ylabel(ylabel)
 
         for model in unique_models:
-            for df in df_list:
-                if model in df['Model'].unique():
-                    sns.lineplot(x='elapsed_time_percent', y=metric, data=df[df['Model'] == model], label=model,
-                                 color=model_colors[model])
+            for run_model, pyramid in pyramids:
+                if run_model == model and metric in pyramid.metrics:
+                    # Long traces are drawn from their min/max/mean decimation, spikes included
+                    plot_envelope(plt.gca(), pyramid.query(metric, max_points=max_points), label=model,
+                                  color=model_colors[model], time_column='elapsed_time_percent')
 
         plt.legend(title='Model', loc='lower right', bbox_to_anchor=(1, 0))
         plt.grid(True)
         plt.tight_layout()
-        plt.show()
+        written_files += show_or_save(f'{metric}_over_time_{cpu_type}', output_dir, formats)
+    return written_files
 
 
-if __name__ == "__main__":
-    data_directory = "../data"
+def resource_frame(data):
+    """(cpu, model, 'Resource Usages') of one run, the sheet labelled with its Model and elapsed_time_percent."""
+    model_name = data['Main'].get('model', 'Unknown Model')
+    cpu_type = data['Main'].get('cpu', 'Unknown CPU')
+    resource_df = data['Resource Usages']
 
-    performance_files = find_files_by_extension(data_directory, "_performance.xlsx")
+    # Convert elapsed time to percentage of completion
+    max_elapsed_time = resource_df['elapsed_time'].max()
+    resource_df = resource_df.assign(Model=run_label(model_name, len(resource_df)),
+                                     elapsed_time_percent=(resource_df['elapsed_time'] / max_elapsed_time) * 100)
+    return cpu_type, model_name, resource_df
 
-    resource_data_by_cpu = {}
 
-    for file_path in performance_files:
-        data = extract_performance_data(file_path)
-        model_name = data['Main'].get('model', 'Unknown Model')
-        cpu_type = data['Main'].get('cpu', 'Unknown CPU')
-        resource_df = data['Resource Usages']
-        resource_df['Model'] = model_name
+def group_resource_data_by_cpu(results):
+    resource_data_by_cpu = {}
 
-        # Convert elapsed time to percentage of completion
-        max_elapsed_time = resource_df['elapsed_time'].max()
-        resource_df['elapsed_time_percent'] = (resource_df['elapsed_time'] / max_elapsed_time) * 100
+    for file_path, data in results:
+        cpu_type, model_name, resource_df = resource_frame(data)
 
         if cpu_type not in resource_data_by_cpu:
             resource_data_by_cpu[cpu_type] = []
 
         resource_data_by_cpu[cpu_type].append(resource_df)
 
-    unique_models = set()
-    for cpu_type, df_list in resource_data_by_cpu.items():
-        for df in df_list:
-            unique_models.update(df['Model'].unique())
-    unique_models = sorted(unique_models)
+    return resource_data_by_cpu
+
+
+def resource_pyramid(data):
+    """(cpu, model, TracePyramid) of one run's resource usage over every metric of METRICS it recorded."""
+    cpu_type, model_name, resource_df = resource_frame(data)
+    metrics = [metric for metric, _, _ in METRICS if metric in resource_df]
+    return cpu_type, model_name, TracePyramid(resource_df, metrics, time_column='elapsed_time_percent')
+
+
+def group_resource_pyramids(results):
+    """{cpu: [(model, TracePyramid)]} with one pyramid per run, see resource_pyramid."""
+    pyramids_by_cpu = {}
+    for file_path, data in results:
+        cpu_type, model_name, pyramid = resource_pyramid(data)
+        pyramids_by_cpu.setdefault(cpu_type, []).append((model_name, pyramid))
+    return pyramids_by_cpu
+
+
+def get_model_colors(data_by_cpu):
+    return color_models(model for df_list in data_by_cpu.values() for df in df_list for model in df['Model'].unique())
+
+
+def color_models(models):
+    unique_models = sorted(set(models))
 
     colors = sns.color_palette('tab10', n_colors=len(unique_models))
-    model_colors = {model: colors[i] for i, model in enumerate(unique_models)}
+    return {model: colors[i] for i, model in enumerate(unique_models)}
+
+
+def load_resource_results(data_directory):
+    performance_files = find_performance_files(data_directory)
+
+    results, failures = extract_files_parallel(performance_files,
+                                               partial(extract_performance_data, sheets=['Main', 'Resource Usages']))
+    report_failures(failures)
 
-    # Plot memory usage over time
-    plot_metric_over_time(resource_data_by_cpu, 'memory_mb', 'Memory Usage (MB)', 'Memory Usage Over Time',
-                          model_colors)
+    return results
 
-    # Plot CPU usage over time
-    plot_metric_over_time(resource_data_by_cpu, 'cpu_usage', 'CPU Usage (%)', 'CPU Usage Over Time', model_colors)
 
-    # Plot package power usage over time
-    plot_metric_over_time(resource_data_by_cpu, 'cpu_package_power', 'Package Power Usage (Watt)',
-                          'Package Power Usage Over Time', model_colors)
+def load_resource_data_by_cpu(data_directory):
+    return group_resource_data_by_cpu(load_resource_results(data_directory))
+
+
+if __name__ == "__main__":
+    data_directory = "../data"
+
+    # One pyramid per run, built as the runs are loaded and shared by the charts of every metric
+    resource_pyramids_by_cpu = group_resource_pyramids(load_resource_results(data_directory))
+    model_colors = color_models(model for pyramids in resource_pyramids_by_cpu.values() for model, _ in pyramids)
 
-    # Plot CPU package temperature over time
-    plot_metric_over_time(resource_data_by_cpu, 'cpu_package_temp', 'CPU Package Temperature (°C)',
-                          'CPU Package Temperature Over Time', model_colors)
+    # Plot memory usage, CPU usage, package power usage and CPU package temperature over time
+    for metric, ylabel, title in METRICS:
+        plot_metric_over_time(resource_pyramids_by_cpu, metric, ylabel, title, model_colors)
@@ -1,47 +1,30 @@
+import argparse
 import os
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
-from extract_data import extract_performance_data, find_files_by_extension
-
-
-def load_performance_data(directory):
-    files = find_files_by_extension(directory, '_performance.xlsx')
-    data = []
-    for file in files:
-        extracted_data = extract_performance_data(file)
-        main_data = extracted_data['Main']
-
-        # Extracting specific data and adding it to a dictionary
-        performance_data = {
-            'date': main_data.get('date'),
-            'cpu': main_data.get('cpu'),
-            'model': main_data.get('model'),
-            'avg_detection_time': main_data.get('average_detection_time'),
-            'avg_cpu_usage': main_data.get('avg_cpu_usage'),
-            'cpu_usage_std': main_data.get('cpu_usage_std'),
-            'cpu_freq_avg': main_data.get('cpu_freq_avg'),
-            'cpu_freq_std': main_data.get('cpu_freq_std'),
-            'avg_cpu_package_power': main_data.get('avg_cpu_package_power'),
-            'cpu_package_power_std': main_data.get('cpu_package_power_std'),
-            'avg_cpu_package_temp': main_data.get('avg_cpu_package_temp'),
-            'cpu_package_temp_std': main_data.get('cpu_package_temp_std'),
-            'avg_memory_usage': main_data.get('avg_memory_usage'),
-            'memory_usage_std': main_data.get('memory_usage_std'),
-            'avg_power_usage': main_data.get('avg_power_usage'),
-            'power_usage_std': main_data.get('power_usage_std'),
-            'file': os.path.basename(file)  # Add file name for reference
-        }
-
-        data.append(performance_data)
-
-    return pd.DataFrame(data)
-
-
-def plot_metrics(data, metric, std_metric, output_dir):
+from performance_catalog import load_performance_data
+from rendering import DEFAULT_FORMATS, show_or_save
+from rollup import build_cube, ensure_cube, slice_cube
+
+METRICS = {
+    'avg_detection_time': None,
+    'avg_cpu_usage': 'cpu_usage_std',
+    'cpu_freq_avg': 'cpu_freq_std',
+    'avg_cpu_package_power': 'cpu_package_power_std',
+    'avg_cpu_package_temp': 'cpu_package_temp_std',
+    'avg_memory_usage': 'memory_usage_std',
+    'avg_power_usage': 'power_usage_std'
+}
+
+
+def plot_metrics(data, metric, std_metric, output_dir, formats=DEFAULT_FORMATS):
+    # data may be a run table or its rollup cube (see rollup.build_cube)
+    cube = ensure_cube(data)
+
     plt.figure(figsize=(10, 8))  # Adjust figure size for horizontal plot
-    unique_cpus = data['cpu'].unique()
-    unique_models = data['model'].unique()
+    unique_cpus = cube['cpu'].unique()
+    unique_models = cube['model'].unique()
     bar_height = 0.2
     y_positions = range(len(unique_cpus))
 
@@ -51,8 +34,13 @@ def plot_metrics(data, metric, std_metric, output_dir):
         pc_label = f'PC{i + 1}'
         cpu_mapping[pc_label] = cpu
 
+    # One bar per (cpu, model) pair whatever its number of runs, pairs without runs are left empty
+    values = slice_cube(cube, ['cpu', 'model'], [metric, std_metric], dropna=False).set_index(['cpu', 'model'])
+    grid = pd.MultiIndex.from_product([unique_cpus, unique_models], names=['cpu', 'model'])
+    values = values.reindex(grid)
+
     for j, model in enumerate(unique_models):
-        model_data = data[data['model'] == model]
+        model_data = values.xs(model, level='model')
         offsets = [i + j * bar_height for i in y_positions]
         x_values = model_data[metric].values
         if std_metric:
@@ -76,36 +64,32 @@ def plot_metrics(data, metric, std_metric, output_dir):
 
     plt.legend(title='Model', fontsize=14)
     plt.tight_layout()
-    plt.savefig(os.path.join(output_dir, f'{metric}_comparison.png'))
-    plt.close()
+    written_files = show_or_save(f'{metric}_comparison', output_dir, formats)
 
     # Print correspondence between PC labels and CPU types
     print("PC Label Correspondence:")
     for pc_label, cpu_type in cpu_mapping.items():
         print(f"{pc_label}: {cpu_type}")
 
+    return written_files
 
-def main(data_directory, output_directory):
+
+def main(data_directory, output_directory, steady_state=False):
     if not os.path.exists(output_directory):
         os.makedirs(output_directory)
 
-    performance_data = load_performance_data(data_directory)
-
-    metrics = {
-        'avg_detection_time': None,
-        'avg_cpu_usage': 'cpu_usage_std',
-        'cpu_freq_avg': 'cpu_freq_std',
-        'avg_cpu_package_power': 'cpu_package_power_std',
-        'avg_cpu_package_temp': 'cpu_package_temp_std',
-        'avg_memory_usage': 'memory_usage_std',
-        'avg_power_usage': 'power_usage_std'
-    }
+    cube = build_cube(load_performance_data(data_directory, steady_state=steady_state))
 
-    for metric, std_metric in metrics.items():
-        plot_metrics(performance_data, metric, std_metric, output_directory)
+    for metric, std_metric in METRICS.items():
+        plot_metrics(cube, metric, std_metric, output_directory)
 
 
 if __name__ == '__main__':
     data_directory = '../data'
     output_directory = '../output'
-    main(data_directory, output_directory)
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--steady-state', action='store_true', help='Leave out the warm-up of every run')
+    args = parser.parse_args()
+
+    main(data_directory, output_directory, args.steady_state)
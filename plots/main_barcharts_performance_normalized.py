@@ -1,55 +1,40 @@
+import argparse
 import os
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
-from extract_data import extract_performance_data, find_files_by_extension
+from performance_catalog import load_performance_data
+from rendering import DEFAULT_FORMATS, show_or_save
+from rollup import build_cube, ensure_cube, metric_range, slice_cube
 
-def load_performance_data(directory):
-    files = find_files_by_extension(directory, '_performance.xlsx')
-    data = []
-    for file in files:
-        extracted_data = extract_performance_data(file)
-        main_data = extracted_data['Main']
-
-        # Extracting specific data and adding it to a dictionary
-        performance_data = {
-            'date': main_data.get('date'),
-            'cpu': main_data.get('cpu'),
-            'model': main_data.get('model'),
-            'avg_detection_time': main_data.get('average_detection_time'),
-            'avg_cpu_usage': main_data.get('avg_cpu_usage'),
-            'cpu_usage_std': main_data.get('cpu_usage_std'),
-            'cpu_freq_avg': main_data.get('cpu_freq_avg'),
-            'cpu_freq_std': main_data.get('cpu_freq_std'),
-            'avg_cpu_package_power': main_data.get('avg_cpu_package_power'),
-            'cpu_package_power_std': main_data.get('cpu_package_power_std'),
-            'avg_cpu_package_temp': main_data.get('avg_cpu_package_temp'),
-            'cpu_package_temp_std': main_data.get('cpu_package_temp_std'),
-            'avg_memory_usage': main_data.get('avg_memory_usage'),
-            'memory_usage_std': main_data.get('memory_usage_std'),
-            'avg_power_usage': main_data.get('avg_power_usage'),
-            'power_usage_std': main_data.get('power_usage_std'),
-            'file': os.path.basename(file)  # Add file name for reference
-        }
-
-        data.append(performance_data)
-
-    return pd.DataFrame(data)
+METRICS = [
+    'avg_detection_time',
+    'avg_cpu_usage',
+    'cpu_freq_avg',
+    'avg_cpu_package_power',
+    'avg_cpu_package_temp',
+    'avg_memory_usage',
+    'avg_power_usage'
+]
 
 def normalize_data(df, metric):
     df[f'{metric}_normalized'] = (df[metric] - df[metric].min()) / (df[metric].max() - df[metric].min())
     return df
 
-def plot_normalized_metrics(data, metric, output_dir):
+def plot_normalized_metrics(data, metric, output_dir, formats=DEFAULT_FORMATS):
+    # data may be a run table or its rollup cube (see rollup.build_cube). The mean of the min-max normalized
+    # runs of a model (see normalize_data) is its normalized mean, so it comes straight from the cube
+    cube = ensure_cube(data)
+    minimum, maximum = metric_range(cube, metric)
+    means = slice_cube(cube, ['model'], [metric], dropna=False).set_index('model')[metric]
+
     plt.figure(figsize=(10, 8))  # Adjust figure size for horizontal plot
-    unique_models = data['model'].unique()
+    unique_models = cube['model'].unique()
     bar_height = 0.4
     y_positions = range(len(unique_models))
 
     for i, model in enumerate(unique_models):
-        model_data = data[data['model'] == model]
-        normalized_metric = f'{metric}_normalized'
-        plt.barh(y_positions[i], model_data[normalized_metric].mean(), height=bar_height, label=model)
+        plt.barh(y_positions[i], (means[model] - minimum) / (maximum - minimum), height=bar_height, label=model)
 
     plt.yticks(y_positions, unique_models)
     plt.title(f'Normalized Comparison of {metric} across Models')
@@ -57,30 +42,24 @@ def plot_normalized_metrics(data, metric, output_dir):
     plt.ylabel('Model')
     plt.legend(title='Model')
     plt.tight_layout()
-    plt.savefig(os.path.join(output_dir, f'{metric}_normalized_comparison.png'))
-    plt.close()
+    return show_or_save(f'{metric}_normalized_comparison', output_dir, formats)
 
-def main(data_directory, output_directory):
+def main(data_directory, output_directory, steady_state=False):
     if not os.path.exists(output_directory):
         os.makedirs(output_directory)
 
-    performance_data = load_performance_data(data_directory)
+    performance_data = load_performance_data(data_directory, steady_state=steady_state)
 
-    metrics = [
-        'avg_detection_time',
-        'avg_cpu_usage',
-        'cpu_freq_avg',
-        'avg_cpu_package_power',
-        'avg_cpu_package_temp',
-        'avg_memory_usage',
-        'avg_power_usage'
-    ]
-
-    for metric in metrics:
-        performance_data = normalize_data(performance_data, metric)
-        plot_normalized_metrics(performance_data, metric, output_directory)
+    cube = build_cube(performance_data)
+    for metric in METRICS:
+        plot_normalized_metrics(cube, metric, output_directory)
 
 if __name__ == '__main__':
     data_directory = '../data'
     output_directory = '../output_normalized_horizontal'
-    main(data_directory, output_directory)
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--steady-state', action='store_true', help='Leave out the warm-up of every run')
+    args = parser.parse_args()
+
+    main(data_directory, output_directory, args.steady_state)
@@ -1,73 +1,28 @@
-import os
-import pandas as pd
+import argparse
 from matplotlib import pyplot as plt
 import seaborn as sns
-import numpy as np
-
-from extract_data import extract_performance_data, find_files_by_extension
-
-
-def load_performance_data(directory):
-    files = find_files_by_extension(directory, '_performance.xlsx')
-    data = []
-    cpus = {
-        'Intel(R) Core(TM) i5-4200H CPU @ 2.80GHz': 'PC1',
-        'Intel(R) Core(TM) i5-6300U CPU @ 2.40GHz': 'PC2',
-        'AMD Ryzen 5 5600 6-Core Processor': 'PC3',
-        'AMD Ryzen 5 2600 Six-Core Processor': 'PC4'
-    }
-    models = {
-        'yolov8s': 'yolo v8 s',
-        'ssd_mobilenet_v2_fpnlite_320x320': 'mobile net v2',
-        'efficient_det_lite1': 'efficient det lite 1',
-        'efficient_det_lite2': 'efficient det lite 2',
-        'efficient_det_lite3': 'efficient det lite 3',
-        'faster_rcnn_resnet101_v1_640x640': 'faster rcnn'
-    }
-    for file in files:
-        extracted_data = extract_performance_data(file)
-        main_data = extracted_data['Main']
-
-        # Extracting specific data and adding it to a dictionary
-        performance_data = {
-            'date': main_data.get('date'),
-            'cpu': main_data.get('cpu'),
-            'cpu_short_name': cpus.get(main_data.get('cpu')),
-            'model': main_data.get('model'),
-            'model_short_name': models.get(main_data.get('model')),
-            'avg_detection_time': main_data.get('average_detection_time'),
-            'avg_cpu_usage': main_data.get('avg_cpu_usage'),
-            'cpu_usage_std': main_data.get('cpu_usage_std'),
-            'cpu_freq_avg': main_data.get('cpu_freq_avg'),
-            'cpu_freq_std': main_data.get('cpu_freq_std'),
-            'avg_cpu_package_power': main_data.get('avg_cpu_package_power'),
-            'cpu_package_power_std': main_data.get('cpu_package_power_std'),
-            'avg_cpu_package_temp': main_data.get('avg_cpu_package_temp'),
-            'cpu_package_temp_std': main_data.get('cpu_package_temp_std'),
-            'avg_memory_usage': main_data.get('avg_memory_usage'),
-            'memory_usage_std': main_data.get('memory_usage_std'),
-            'avg_power_usage': main_data.get('avg_power_usage'),
-            'power_usage_std': main_data.get('power_usage_std'),
-            'fps': main_data.get('fps'),
-            'file': os.path.basename(file)
-        }
 
-        data.append(performance_data)
+from performance_catalog import load_performance_data
+from rendering import DEFAULT_FORMATS, show_or_save
+from rollup import ensure_cube, slice_cube
+
+BAR_CHART_STATS = {
+    'avg_cpu_usage': 'cpu_usage_std',
+    'cpu_freq_avg': 'cpu_freq_std',
+    'avg_cpu_package_power': 'cpu_package_power_std',
+    'avg_cpu_package_temp': 'cpu_package_temp_std',
+    'avg_memory_usage': 'memory_usage_std',
+    'avg_power_usage': 'power_usage_std',
+    'fps': None
+}
 
-    return pd.DataFrame(data)
 
+def aggregate_stat(df, stat, std):
+    # Mean of the stat and pooled standard deviation sqrt(mean(std ** 2)) per model and machine
+    return slice_cube(ensure_cube(df), ['model_short_name', 'cpu_short_name'], [stat, std])
 
-def draw_bar_charts(df, titles=None, x_labels=None, output_dir='horizontal_bar_plots_v2'):
-    stats = {
-        'avg_cpu_usage': 'cpu_usage_std',
-        'cpu_freq_avg': 'cpu_freq_std',
-        'avg_cpu_package_power': 'cpu_package_power_std',
-        'avg_cpu_package_temp': 'cpu_package_temp_std',
-        'avg_memory_usage': 'memory_usage_std',
-        'avg_power_usage': 'power_usage_std',
-        'fps': None
-    }
 
+def draw_bar_charts(df, titles=None, x_labels=None, output_dir=None, formats=DEFAULT_FORMATS, stats=None):
     # Set default titles if none are provided
     if titles is None:
         titles = {
@@ -92,21 +47,21 @@ def draw_bar_charts(df, titles=None, x_labels=None, output_dir='horizontal_bar_p
             'fps': 'Frames Per Second'
         }
 
-    for stat, std in stats.items():
-        plt.figure(figsize=(12, 8))
+    # Draw every chart unless a subset of BAR_CHART_STATS is requested
+    if stats is None:
+        stats = list(BAR_CHART_STATS)
 
-        if std:  # If there is a standard deviation column for the stat
-            # Compute the mean values
-            grouped = df.groupby(['model_short_name', 'cpu_short_name'])
-            mean_values = grouped[stat].mean().reset_index()
+    # df may be a run table or its rollup cube (see rollup.build_cube), every chart is a slice of the cube
+    cube = ensure_cube(df)
 
-            # Compute the average standard deviation using the formula
-            std_squared = grouped[std].apply(lambda x: np.mean(x ** 2)).reset_index(name='std_squared')
-            avg_std = np.sqrt(std_squared['std_squared'])
+    written_files = []
+    for stat in stats:
+        std = BAR_CHART_STATS[stat]
+        plt.figure(figsize=(12, 8))
 
-            # Add the average standard deviation to the mean values
-            mean_values[std] = avg_std
+        mean_values = aggregate_stat(cube, stat, std)
 
+        if std:  # If there is a standard deviation column for the stat
             # Plot the bars with error bars
             ax = sns.barplot(
                 data=mean_values,
@@ -132,10 +87,6 @@ def draw_bar_charts(df, titles=None, x_labels=None, output_dir='horizontal_bar_p
                     zorder=5  # Ensure error bars are drawn on top of bars
                 )
         else:
-            # Compute only the mean values if no std exists
-            mean_values = df.groupby(['model_short_name', 'cpu_short_name'])[stat].mean().reset_index()
-            mean_values[std] = np.nan  # Placeholder for std to avoid errors
-
             ax = sns.barplot(
                 data=mean_values,
                 y='model_short_name',
@@ -161,7 +112,9 @@ def draw_bar_charts(df, titles=None, x_labels=None, output_dir='horizontal_bar_p
         plt.legend(bbox_to_anchor=(0.5, -0.1), loc='upper center', ncol=4)
 
         plt.tight_layout()
-        plt.show()
+        written_files += show_or_save(f'{stat}_bar_chart', output_dir, formats)
+
+    return written_files
 
 custom_titles = {
     'avg_cpu_usage': 'Średnie zużycie procesora',
@@ -183,8 +136,13 @@ custom_x_labels = {
     'fps': 'Średnia ilość FPS'
 }
 
-# Load the performance data
-data = load_performance_data('../data')
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Draw the per model and machine bar charts')
+    parser.add_argument('--steady-state', action='store_true', help='Leave out the warm-up of every run')
+    args = parser.parse_args()
+
+    # Load the performance data
+    data = load_performance_data('../data', steady_state=args.steady_state)
 
-# Draw the bar charts with custom titles and x-axis labels
-draw_bar_charts(data, titles=custom_titles, x_labels=custom_x_labels)
\ No newline at end of file
+    # Draw the bar charts with custom titles and x-axis labels
+    draw_bar_charts(data, titles=custom_titles, x_labels=custom_x_labels)
@@ -1,51 +1,75 @@
-import os
+import argparse
+from functools import partial
 import matplotlib.pyplot as plt
-from extract_data import extract_performance_data, find_files_by_extension
+from extract_data import extract_performance_data, extract_files_parallel, find_performance_files, report_failures
+from rendering import DEFAULT_FORMATS, show_or_save
+from trace_pyramid import DEFAULT_MAX_POINTS, TracePyramid, plot_envelope
 
-if __name__ == "__main__":
-    data_directory = "../data"
-    output_directory = "../line_power_usages_plots"
-
-    # Create output directory if it doesn't exist
-    if not os.path.exists(output_directory):
-        os.makedirs(output_directory)
-
-    performance_files = find_files_by_extension(data_directory, "_performance.xlsx")
 
+def group_power_usage_data(results):
     power_usage_data = {}
 
-    for file_path in performance_files:
-        data = extract_performance_data(file_path)
+    for file_path, data in results:
         model_name = data['Main'].get('model', 'Unknown Model')
         cpu_type = data['Main'].get('cpu', 'Unknown CPU')
         power_df = data['Power Usages']
 
-        # Filter the data to include only the first x milliseconds
-        filtered_power_df = power_df[power_df['elapsed_time'] <= 100]
+        # Full length traces are kept as min/max/mean pyramids, plots only read as many points as they draw
+        pyramid = TracePyramid(power_df, ['power_watt'])
 
         if cpu_type not in power_usage_data:
             power_usage_data[cpu_type] = []
 
-        power_usage_data[cpu_type].append((model_name, filtered_power_df))
+        power_usage_data[cpu_type].append((model_name, pyramid))
 
-    for cpu_type, model_data_list in power_usage_data.items():
-        plt.figure(figsize=(10, 6))
-        plt.title(f'Power Usage Over Time for {cpu_type}')
-        plt.xlabel('Elapsed Time (ms)')
-        plt.ylabel('Power Usage (Watt)')
+    return power_usage_data
+
+
+def plot_power_usage(cpu_type, model_data_list, output_dir, formats=DEFAULT_FORMATS, time_range=(None, None),
+                     max_points=DEFAULT_MAX_POINTS):
+    plt.figure(figsize=(10, 6))
+    plt.title(f'Power Usage Over Time for {cpu_type}')
+    plt.xlabel('Elapsed Time (ms)')
+    plt.ylabel('Power Usage (Watt)')
+
+    start, end = time_range
+    for model_name, pyramid in model_data_list:
+        plot_envelope(plt.gca(), pyramid.query('power_watt', start, end, max_points), label=model_name)
+
+    plt.legend(loc='lower right', bbox_to_anchor=(1, 0))
+    plt.grid(True)
+    plt.tight_layout()
 
-        for model_name, df in model_data_list:
-            plt.plot(df['elapsed_time'], df['power_watt'], label=model_name)
+    # Save the plot to a file in the output directory and close it to free up memory
+    return show_or_save(f"{cpu_type}_power_usage_plot", output_dir, formats)
 
-        plt.legend(loc='lower right', bbox_to_anchor=(1, 0))
-        plt.grid(True)
-        plt.tight_layout()
 
-        # Save the plot to a file in the output directory
-        output_filename = os.path.join(output_directory, f"{cpu_type}_power_usage_plot.png")
-        plt.savefig(output_filename)
+def load_power_usage_data(data_directory):
+    performance_files = find_performance_files(data_directory)
 
-        # Close the current plot to free up memory
-        plt.close()
+    results, failures = extract_files_parallel(
+        performance_files,
+        partial(extract_performance_data, sheets=['Main', 'Power Usages'],
+                columns={'Power Usages': ['elapsed_time', 'power_watt']}))
+    report_failures(failures)
+
+    return group_power_usage_data(results)
+
+
+if __name__ == "__main__":
+    data_directory = "../data"
+    output_directory = "../line_power_usages_plots"
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--start', type=float, default=None, help='Zoom in from this elapsed time')
+    parser.add_argument('--end', type=float, default=None, help='Zoom in up to this elapsed time')
+    parser.add_argument('--max-points', type=int, default=DEFAULT_MAX_POINTS, help='Points drawn per trace')
+    args = parser.parse_args()
+
+    power_usage_data = load_power_usage_data(data_directory)
+
+    for cpu_type, model_data_list in power_usage_data.items():
+        plot_power_usage(cpu_type, model_data_list, output_directory, time_range=(args.start, args.end),
+                         max_points=args.max_points)
 
     print(f"Plots saved in {output_directory}")
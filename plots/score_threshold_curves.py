@@ -0,0 +1,70 @@
+from functools import partial
+import matplotlib.pyplot as plt
+import seaborn as sns
+from extract_data import extract_accuracy_data, extract_files_parallel, find_files_by_extension, report_failures
+from performance_catalog import CPU_SHORT_NAMES
+from rendering import DEFAULT_FORMATS, show_or_save
+from score_thresholds import best_thresholds, threshold_curves
+
+
+def plot_threshold_curves(curves, output_dir=None, formats=DEFAULT_FORMATS):
+    unique_models = sorted(curves['model'].unique())
+    colors = sns.color_palette('tab10', n_colors=len(unique_models))
+    model_colors = {model: colors[i] for i, model in enumerate(unique_models)}
+
+    # Accuracy and acceptance rate of every model, averaged over the machines
+    plt.figure(figsize=(12, 8))
+    for model in unique_models:
+        model_curves = curves[curves['model'] == model]
+        pooled = model_curves.groupby('threshold')[['acceptance_rate', 'accuracy']].mean().reset_index()
+        plt.plot(pooled['threshold'], pooled['accuracy'], color=model_colors[model], label=f'{model} accuracy')
+        plt.plot(pooled['threshold'], pooled['acceptance_rate'], color=model_colors[model], linestyle='--',
+                 label=f'{model} acceptance rate')
+
+    plt.title('Accuracy and Acceptance Rate vs. Score Threshold', fontsize=20)
+    plt.xlabel('Score Threshold', fontsize=20)
+    plt.ylabel('Fraction of Detections', fontsize=20)
+    plt.grid(True)
+    plt.legend()
+    plt.tight_layout()
+    written_files = show_or_save('accuracy_vs_score_threshold', output_dir, formats)
+
+    # Correct detections per second of every model on every machine, best threshold marked
+    best = best_thresholds(curves)
+    for cpu, cpu_curves in curves.groupby('cpu'):
+        plt.figure(figsize=(12, 8))
+        for model, model_curve in cpu_curves.groupby('model'):
+            plt.plot(model_curve['threshold'], model_curve['correct_per_second'], color=model_colors[model],
+                     label=model)
+            model_best = best[(best['cpu'] == cpu) & (best['model'] == model)]
+            plt.scatter(model_best['threshold'], model_best['correct_per_second'], color=model_colors[model],
+                        edgecolors='black', s=120, zorder=5)
+
+        cpu_name = CPU_SHORT_NAMES.get(cpu, cpu)
+        plt.title(f'Correct Detections per Second vs. Score Threshold for {cpu_name}', fontsize=20)
+        plt.xlabel('Score Threshold', fontsize=20)
+        plt.ylabel('Correct Detections per Second', fontsize=20)
+        plt.grid(True)
+        plt.legend(title='Model')
+        plt.tight_layout()
+        written_files += show_or_save(f'correct_per_second_vs_score_threshold_{cpu_name}', output_dir, formats)
+
+    return written_files
+
+
+def load_threshold_curves(data_directory):
+    accuracy_files = find_files_by_extension(data_directory, "_accuracy.xlsx")
+
+    results, failures = extract_files_parallel(
+        accuracy_files, partial(extract_accuracy_data, columns={'Detections': ['time', 'is_correct', 'score']}))
+    report_failures(failures)
+
+    return threshold_curves(results)
+
+
+if __name__ == "__main__":
+    data_directory = "../data"
+
+    curves = load_threshold_curves(data_directory)
+    print(best_thresholds(curves).to_string(index=False))
+    plot_threshold_curves(curves)
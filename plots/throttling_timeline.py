@@ -0,0 +1,48 @@
+import matplotlib.pyplot as plt
+import seaborn as sns
+
+from rendering import DEFAULT_FORMATS, show_or_save
+from throttling import load_throttling, throttling_table
+
+
+def plot_throttling_timeline(runs_df, episodes_df, output_dir=None, formats=DEFAULT_FORMATS, model_colors=None):
+    """model_colors maps model short names to colors, by default assigned over the models of runs_df."""
+    if runs_df.empty:
+        return []
+
+    if model_colors is None:
+        unique_models = sorted(runs_df['model_short_name'].dropna().unique())
+        colors = sns.color_palette('tab10', n_colors=len(unique_models))
+        model_colors = {model: colors[i] for i, model in enumerate(unique_models)}
+
+    written_files = []
+    for cpu_short_name, cpu_runs in runs_df.groupby('cpu_short_name'):
+        cpu_runs = cpu_runs.sort_values(['model_short_name', 'file'])
+
+        plt.figure(figsize=(12, max(4, 0.5 * len(cpu_runs) + 2)))
+        ax = plt.gca()
+
+        # One row per run, its throttling episodes drawn as spans over the elapsed time the run was recorded in
+        for row, run in enumerate(cpu_runs.itertuples()):
+            ax.broken_barh([(run.start, run.duration)], (row - 0.4, 0.8), facecolors='lightgray')
+            run_episodes = episodes_df[episodes_df['path'] == run.path]
+            ax.broken_barh(list(zip(run_episodes['start'], run_episodes['duration'])), (row - 0.4, 0.8),
+                           facecolors=model_colors[run.model_short_name])
+
+        ax.set_yticks(range(len(cpu_runs)))
+        ax.set_yticklabels([f'{run.model_short_name} ({run.file})' for run in cpu_runs.itertuples()])
+        plt.title(f'Thermal Throttling Episodes for {cpu_short_name}')
+        plt.xlabel('Elapsed Time (ms)')
+        plt.ylabel('Run')
+        plt.grid(axis='x', linestyle='--', linewidth=0.7, color='gray')
+        plt.tight_layout()
+        written_files += show_or_save(f'throttling_timeline_{cpu_short_name}', output_dir, formats)
+
+    return written_files
+
+
+if __name__ == '__main__':
+    runs_df, episodes_df = load_throttling('../data')
+
+    print(throttling_table(runs_df, episodes_df).to_string(index=False))
+    plot_throttling_timeline(runs_df, episodes_df)
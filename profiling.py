@@ -0,0 +1,196 @@
+import json
+import os
+import threading
+import time
+import tracemalloc
+
+# Stage profiling is off unless PROFILE_STAGES=1 or enable() is called; worker processes inherit the setting
+PROFILING_ENABLED = os.environ.get('PROFILE_STAGES', '0') == '1'
+# Peak memory of the stages is only traced with PROFILE_MEMORY=1 or enable(memory=True): tracemalloc hooks every
+# allocation and slows the stages down several times, their timings are only meaningful without it
+MEMORY_PROFILING_ENABLED = os.environ.get('PROFILE_MEMORY', '0') == '1'
+
+STAGE_COLUMNS = ['stage', 'calls', 'wall_time', 'cpu_time', 'rows', 'peak_memory']
+
+_events = []
+_stack = threading.local()
+
+
+class _NullStage:
+    # Shared by every stage while profiling is off, entering and leaving it does nothing
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        return False
+
+    def add_rows(self, rows):
+        pass
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage:
+
+    def __init__(self, name, file, trace_memory):
+        self.name = name
+        self.file = file
+        self.trace_memory = trace_memory
+        self.rows = 0
+        self.child_peak = 0
+
+    def add_rows(self, rows):
+        self.rows += int(rows)
+
+    def __enter__(self):
+        stack = _stages()
+        if self.trace_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            if stack:
+                # Peaks of nested stages are reported to their parent when they end
+                stack[-1].child_peak = max(stack[-1].child_peak, tracemalloc.get_traced_memory()[1])
+            self.start_memory = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        stack.append(self)
+
+        self.start_ns = time.time_ns()
+        self.start_wall = time.perf_counter()
+        self.start_cpu = time.process_time()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        wall_time = time.perf_counter() - self.start_wall
+        cpu_time = time.process_time() - self.start_cpu
+        peak_memory = None
+        stack = _stages()
+        stack.pop()
+        if self.trace_memory:
+            peak = max(tracemalloc.get_traced_memory()[1], self.child_peak)
+            peak_memory = max(peak - self.start_memory, 0)
+            if stack:
+                stack[-1].child_peak = max(stack[-1].child_peak, peak)
+
+        _events.append({
+            'stage': self.name,
+            'file': self.file,
+            'start_ns': self.start_ns,
+            'wall_time': wall_time,
+            'cpu_time': cpu_time,
+            'rows': self.rows,
+            'peak_memory': peak_memory,
+            'pid': os.getpid(),
+            'tid': threading.get_ident(),
+            'error': None if exc_type is None else exc_type.__name__
+        })
+        return False
+
+
+def _stages():
+    if not hasattr(_stack, 'stages'):
+        _stack.stages = []
+    return _stack.stages
+
+
+def enable(memory=False):
+    """Profile the stages of this process and of the workers it starts, their peak memory too if memory is set."""
+    global PROFILING_ENABLED, MEMORY_PROFILING_ENABLED
+    PROFILING_ENABLED = True
+    os.environ['PROFILE_STAGES'] = '1'
+    if memory:
+        MEMORY_PROFILING_ENABLED = True
+        os.environ['PROFILE_MEMORY'] = '1'
+
+
+def stage(name, file=None):
+    """
+    Context manager timing one stage (e.g. 'discover', 'extract', 'aggregate', 'render') of one file or chart:
+    wall time, CPU time, rows reported through add_rows() and, when memory profiling is enabled as well, peak
+    traced memory above the stage's start (None otherwise).
+
+        with stage('extract', file_path) as current:
+            current.add_rows(len(df))
+    """
+    if not PROFILING_ENABLED:
+        return _NULL_STAGE
+    return _Stage(name, file, MEMORY_PROFILING_ENABLED)
+
+
+def event_count():
+    return len(_events)
+
+
+def take_events(since=0):
+    """
+    Remove and return the events recorded in this process after the first `since` ones, for workers to send
+    back to the parent. Forked workers inherit the events the parent recorded before the fork, so jobs take
+    only what they recorded themselves: since is event_count() at the start of the job.
+    """
+    events = _events[since:]
+    del _events[since:]
+    return events
+
+
+def add_events(events):
+    _events.extend(events)
+
+
+def events():
+    return list(_events)
+
+
+def stage_summary(recorded_events=None):
+    """
+    Totals per stage: calls, wall and CPU time, rows and the highest peak memory (None if it was not traced),
+    with STAGE_COLUMNS.
+    """
+    totals = {}
+    for event in events() if recorded_events is None else recorded_events:
+        total = totals.setdefault(event['stage'], {'stage': event['stage'], 'calls': 0, 'wall_time': 0.0,
+                                                   'cpu_time': 0.0, 'rows': 0, 'peak_memory': None})
+        total['calls'] += 1
+        total['wall_time'] += event['wall_time']
+        total['cpu_time'] += event['cpu_time']
+        total['rows'] += event['rows']
+        if event['peak_memory'] is not None:
+            total['peak_memory'] = max(total['peak_memory'] or 0, event['peak_memory'])
+    return sorted(totals.values(), key=lambda total: total['wall_time'], reverse=True)
+
+
+def write_json(file_path):
+    with open(file_path, 'w') as f:
+        json.dump({'stages': stage_summary(), 'events': events()}, f, indent=2)
+
+
+def write_chrome_trace(file_path):
+    """Events in the Chrome trace event format, viewable in chrome://tracing or Perfetto."""
+    trace_events = [{
+        'name': event['stage'] if event['file'] is None else f'{event["stage"]} {os.path.basename(event["file"])}',
+        'cat': event['stage'],
+        'ph': 'X',
+        'ts': event['start_ns'] / 1000,
+        'dur': event['wall_time'] * 1e6,
+        'pid': event['pid'],
+        'tid': event['tid'],
+        'args': {key: event[key] for key in ['file', 'cpu_time', 'rows', 'peak_memory', 'error']}
+    } for event in events()]
+
+    with open(file_path, 'w') as f:
+        json.dump({'traceEvents': trace_events, 'displayTimeUnit': 'ms'}, f)
+
+
+def print_stage_summary():
+    print(f'{"stage":<24}{"calls":>8}{"wall (s)":>12}{"cpu (s)":>12}{"rows":>12}{"peak (MB)":>12}')
+    for total in stage_summary():
+        peak = '-' if total['peak_memory'] is None else f'{total["peak_memory"] / 1024 ** 2:.1f}'
+        print(f'{total["stage"]:<24}{total["calls"]:>8}{total["wall_time"]:>12.3f}{total["cpu_time"]:>12.3f}'
+              f'{total["rows"]:>12}{peak:>12}')
+
+
+def write_profile(prefix):
+    """Write <prefix>.json (stage totals and events) and <prefix>.trace.json (Chrome trace)."""
+    write_json(f'{prefix}.json')
+    write_chrome_trace(f'{prefix}.trace.json')
+    return [f'{prefix}.json', f'{prefix}.trace.json']
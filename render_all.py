@@ -0,0 +1,412 @@
+import argparse
+from functools import partial
+import os
+
+import pandas as pd
+
+from detection_stats import DetectionStats, accuracy_file_stats
+from extract_data import PERFORMANCE_SHEETS, extract_accuracy_data, extract_files_parallel, \
+    extract_performance_data, find_files_by_extension, find_performance_files, report_failures
+from energy import energy_from_results
+from pareto import accuracy_by_config, configuration_table, pareto_frontier
+from performance_catalog import load_performance_data, run_table_from_results
+from plots import box_plot_power_usage, interpolated_line_plot_usage, line_plot_usage, plot_power_usage
+from plots.bar_chart_accuracy import count_detections_by_model, plot_accuracy_bars
+from plots.box_plot_scores import combine_detections, plot_score_boxplot
+from plots.energy_per_frame import draw_energy_charts
+from plots.fps_per_package_power import draw_dot_charts, draw_pareto_charts
+from plots.main_barcharts_performance_horizotnal import METRICS as HORIZONTAL_METRICS, plot_metrics
+from plots.main_barcharts_performance_normalized import METRICS as NORMALIZED_METRICS, plot_normalized_metrics
+from plots.performance_bar_charts_horizontal_v2 import BAR_CHART_STATS, custom_titles, custom_x_labels, \
+    draw_bar_charts
+from plots.score_threshold_curves import plot_threshold_curves
+from plots.throttling_timeline import plot_throttling_timeline
+from performance_catalog import MODEL_SHORT_NAMES
+from profiling import enable as enable_profiling, print_stage_summary, stage, write_profile
+from rendering import DEFAULT_FORMATS, render_jobs, use_headless_backend
+from rollup import build_cube, update_cube
+from score_thresholds import threshold_curves
+from steady_state import restrict_to_steady_state
+from throttling import collect_episodes, run_throttling
+from warehouse import load_results
+
+
+# Run kind -> (function finding its files in a data directory, extract function)
+RUN_SOURCES = {
+    'performance': (find_performance_files, extract_performance_data),
+    'accuracy': (partial(find_files_by_extension, file_extension='_accuracy.xlsx'),
+                 partial(extract_accuracy_data, columns={'Detections': ['time', 'is_correct', 'score']}))
+}
+
+# Run kind -> parts of ReportData rebuilt from its results on next use after apply_changes. The run table, run
+# energy and cube are patched for the changed runs instead (see ReportData._patch_runs)
+DERIVED_PARTS = {
+    'performance': ['frontier', 'resource_pyramids'],
+    'accuracy': ['detection_stats', 'frontier']
+}
+
+
+def extract_runs(kind, file_paths, max_workers=None):
+    results, failures = extract_files_parallel(file_paths, RUN_SOURCES[kind][1], max_workers)
+    report_failures(failures)
+    return results
+
+
+def run_key(data):
+    """(cpu, model) of one run, with the defaults the per-cpu charts group unlabelled runs under."""
+    return data['Main'].get('cpu', 'Unknown CPU'), data['Main'].get('model', 'Unknown Model')
+
+
+def load_performance_results(data_directory, max_workers=None):
+    return extract_runs('performance', find_performance_files(data_directory), max_workers)
+
+
+def load_accuracy_results(data_directory, max_workers=None):
+    return extract_runs('accuracy', RUN_SOURCES['accuracy'][0](data_directory), max_workers)
+
+
+class ReportData:
+    """
+    Everything the charts are drawn from, each part loaded from the data directory on first use only,
+    so a report reads every workbook once however many charts it draws.
+    """
+
+    def __init__(self, data_directory, max_workers=None, steady_state=False, database=None):
+        self.data_directory = data_directory
+        self.max_workers = max_workers
+        self.steady_state = steady_state
+        # Read the runs from this warehouse (see warehouse.ingest) instead of the workbooks
+        self.database = database
+        self._loaded = {}
+        # Accuracy file path -> ((model, cpu), DetectionStats), kept across apply_changes for unchanged files
+        self._detection_stats_by_file = {}
+        # Performance file path -> (cpu, model, TracePyramid) of its resource usage, kept the same way
+        self._resource_pyramids_by_file = {}
+
+    def _get(self, name, load):
+        if name not in self._loaded:
+            with stage('load', name):
+                self._loaded[name] = load()
+        return self._loaded[name]
+
+    def apply_changes(self, kind, results=(), removed=()):
+        """
+        Fold re-extracted files of one run kind ('performance' or 'accuracy') into the loaded results:
+        results replace the entries of the same files or are appended, removed files are dropped.
+        The run table, run energy and cube only have the rows of these files replaced; the other parts derived
+        from that kind are rebuilt on next use, the detection statistics and resource pyramids of unchanged
+        files excepted. Returns the run_key of every run added, changed (before and after) or removed.
+        """
+        results = dict(results)
+        loaded = dict(self._loaded.get(f'{kind}_results', []))
+        keys = {run_key(loaded[file_path]) for file_path in list(results) + list(removed) if file_path in loaded}
+        keys.update(run_key(data) for data in results.values())
+        for file_path in removed:
+            loaded.pop(file_path, None)
+        loaded.update(results)
+        self._loaded[f'{kind}_results'] = list(loaded.items())
+
+        by_file = self._detection_stats_by_file if kind == 'accuracy' else self._resource_pyramids_by_file
+        for file_path in list(results) + list(removed):
+            by_file.pop(file_path, None)
+        if kind == 'performance':
+            self._patch_runs(results, removed)
+        for name in DERIVED_PARTS[kind]:
+            self._loaded.pop(name, None)
+        return keys
+
+    def _patch_runs(self, results, removed):
+        # Replace the rows of the changed and removed runs in the loaded run parts, keeping the order of the runs
+        paths = {os.path.abspath(file_path) for file_path in list(results) + list(removed)}
+        order = [os.path.abspath(file_path) for file_path, _ in self.performance_results]
+        results = list(results.items())
+
+        if 'run_table' in self._loaded:
+            run_table = self._loaded['run_table']
+            changed_rows = run_table[run_table['path'].isin(paths)]
+            run_table = run_table[~run_table['path'].isin(paths)]
+            if results:
+                run_table = pd.concat([run_table, self._run_rows(results)], ignore_index=True)
+            self._loaded['run_table'] = run_table.set_index('path', drop=False).loc[order].reset_index(drop=True)
+
+            if 'cube' in self._loaded:
+                keys = set(zip(changed_rows['model'], changed_rows['cpu']))
+                new_rows = self._loaded['run_table'][self._loaded['run_table']['path'].isin(paths)]
+                keys.update(zip(new_rows['model'], new_rows['cpu']))
+                self._loaded['cube'] = update_cube(self._loaded['cube'], self._loaded['run_table'], keys)
+
+        if 'run_energy' in self._loaded:
+            run_energy = self._loaded['run_energy']
+            run_energy = run_energy[~run_energy.index.isin(paths)]
+            if results:
+                run_energy = pd.concat([run_energy, energy_from_results(results)])
+            self._loaded['run_energy'] = run_energy.reindex(pd.Index(order, name=run_energy.index.name))
+
+    def run_models(self):
+        """Models of the performance runs, sorted. The per-cpu charts color them alike whichever cpus they show."""
+        return sorted({run_key(data)[1] for _, data in self.performance_results})
+
+    def loaded_parts(self):
+        """(name, data) of every part loaded so far, e.g. for compact_data.print_memory_footprint."""
+        return list(self._loaded.items())
+
+    @property
+    def performance_results(self):
+        if self.database:
+            return self._get('performance_results',
+                             lambda: load_results('performance', PERFORMANCE_SHEETS, self.database))
+        return self._get('performance_results',
+                         lambda: load_performance_results(self.data_directory, self.max_workers))
+
+    @property
+    def accuracy_results(self):
+        if self.database:
+            return self._get('accuracy_results',
+                             lambda: load_results('accuracy', ['Main', 'Detections'], self.database))
+        return self._get('accuracy_results', lambda: load_accuracy_results(self.data_directory, self.max_workers))
+
+    def _run_rows(self, results):
+        run_table = run_table_from_results(results)
+        if self.steady_state:
+            run_table = restrict_to_steady_state(run_table, results)
+        return run_table
+
+    @property
+    def run_table(self):
+        def load():
+            if 'performance_results' in self._loaded:
+                return self._run_rows(self.performance_results)
+            if self.database:
+                sheets = PERFORMANCE_SHEETS if self.steady_state else ['Main']
+                return self._run_rows(load_results('performance', sheets, self.database))
+            # Only the 'Main' sheets are needed, and the persisted catalog only reads those of new or changed files
+            return load_performance_data(self.data_directory, max_workers=self.max_workers,
+                                         steady_state=self.steady_state)
+        return self._get('run_table', load)
+
+    @property
+    def run_energy(self):
+        """Energy metrics of every performance run indexed by its absolute path, see energy.energy_from_results."""
+        return self._get('run_energy', lambda: energy_from_results(self.performance_results))
+
+    @property
+    def cube(self):
+        """Rollup cube of the run table (see rollup.build_cube) the aggregated charts are sliced from."""
+        return self._get('cube', lambda: build_cube(self.run_table))
+
+    @property
+    def detection_stats(self):
+        """((model, cpu), DetectionStats) of every accuracy file."""
+        def load():
+            by_file = self._detection_stats_by_file
+            if 'accuracy_results' in self._loaded or self.database:
+                for file_path, data in self.accuracy_results:
+                    if file_path not in by_file:
+                        by_file[file_path] = ((data['Main'].get('model'), data['Main'].get('cpu')),
+                                              DetectionStats().update(data['Detections']))
+                return [by_file[file_path] for file_path, data in self.accuracy_results]
+
+            # Every workbook is reduced to its accumulators in the workers, its detections never reach this process
+            accuracy_files = RUN_SOURCES['accuracy'][0](self.data_directory)
+            new_files = [file_path for file_path in accuracy_files if file_path not in by_file]
+            results, failures = extract_files_parallel(new_files, accuracy_file_stats, self.max_workers)
+            report_failures(failures)
+            by_file.update(results)
+            return [by_file[file_path] for file_path in accuracy_files if file_path in by_file]
+        return self._get('detection_stats', load)
+
+    @property
+    def resource_pyramids(self):
+        """{cpu: [(model, TracePyramid)]} of the resource usage of every performance run, one pyramid per run."""
+        def load():
+            by_file = self._resource_pyramids_by_file
+            for file_path, data in self.performance_results:
+                if file_path not in by_file:
+                    by_file[file_path] = line_plot_usage.resource_pyramid(data)
+
+            pyramids_by_cpu = {}
+            for file_path, _ in self.performance_results:
+                cpu_type, model_name, pyramid = by_file[file_path]
+                pyramids_by_cpu.setdefault(cpu_type, []).append((model_name, pyramid))
+            return pyramids_by_cpu
+        return self._get('resource_pyramids', load)
+
+    @property
+    def frontier(self):
+        return self._get('frontier', lambda: pareto_frontier(
+            configuration_table(self.run_table, accuracy_by_config(self.detection_stats))))
+
+
+def _runs_of(results, cpus):
+    """The results of the runs of the given cpus, all of them when cpus is None."""
+    if cpus is None:
+        return results
+    return [(file_path, data) for file_path, data in results if run_key(data)[0] in cpus]
+
+
+def _dot_jobs(data, add_job, cpus=None):
+    add_job(draw_dot_charts, (data.cube,), 'dots', frontier=data.frontier)
+    add_job(draw_energy_charts, (data.run_table.join(data.run_energy, on='path'),), 'energy')
+
+
+def _pareto_jobs(data, add_job, cpus=None):
+    add_job(draw_pareto_charts, (data.frontier,), 'dots')
+
+
+def _bar_jobs(data, add_job, cpus=None):
+    for stat in BAR_CHART_STATS:
+        add_job(draw_bar_charts, (data.cube, custom_titles, custom_x_labels), 'bars', stats=[stat])
+    for metric, std_metric in HORIZONTAL_METRICS.items():
+        add_job(plot_metrics, (data.cube, metric, std_metric), 'horizontal')
+
+
+def _normalized_jobs(data, add_job, cpus=None):
+    for metric in NORMALIZED_METRICS:
+        add_job(plot_normalized_metrics, (data.cube, metric), 'normalized')
+
+
+def _line_jobs(data, add_job, cpus=None):
+    # Resource usage over time: raw, interpolated and as per model bands
+    resource_data_by_cpu = line_plot_usage.group_resource_data_by_cpu(_runs_of(data.performance_results, cpus))
+    interpolated_data_by_cpu = interpolated_line_plot_usage.interpolate_resource_data_by_cpu(resource_data_by_cpu)
+    grid, bands = interpolated_line_plot_usage.compute_metric_bands(resource_data_by_cpu)
+    model_colors = line_plot_usage.color_models(data.run_models())
+    resource_pyramids = data.resource_pyramids
+    for metric, ylabel, title in line_plot_usage.METRICS:
+        for cpu_type in resource_data_by_cpu:
+            add_job(line_plot_usage.plot_metric_over_time,
+                    ({cpu_type: resource_pyramids[cpu_type]}, metric, ylabel, title, model_colors), 'lines',
+                    cpu=cpu_type)
+            add_job(interpolated_line_plot_usage.plot_metric_over_time,
+                    ({cpu_type: interpolated_data_by_cpu[cpu_type]}, metric, ylabel, title, model_colors),
+                    'lines_interpolated', cpu=cpu_type)
+            cpu_bands = {key: band for key, band in bands.items() if key[0] == cpu_type}
+            add_job(interpolated_line_plot_usage.plot_metric_bands,
+                    (grid, cpu_bands, metric, ylabel, title, model_colors), 'lines_bands', cpu=cpu_type)
+
+
+def _box_jobs(data, add_job, cpus=None):
+    power_data_by_cpu = box_plot_power_usage.group_power_data_by_cpu(_runs_of(data.performance_results, cpus))
+    unique_models = data.run_models()
+    for cpu_type, df_list in power_data_by_cpu.items():
+        add_job(box_plot_power_usage.plot_power_boxplot, (cpu_type, df_list, unique_models), 'boxes', cpu=cpu_type)
+    if data.accuracy_results:
+        add_job(plot_score_boxplot, (combine_detections(data.accuracy_results),), 'accuracy')
+
+
+def _power_jobs(data, add_job, cpus=None):
+    power_usage_data = plot_power_usage.group_power_usage_data(_runs_of(data.performance_results, cpus))
+    for cpu_type, model_data_list in power_usage_data.items():
+        add_job(plot_power_usage.plot_power_usage, (cpu_type, model_data_list), 'power', cpu=cpu_type)
+
+
+def _throttling_jobs(data, add_job, cpus=None):
+    runs_df, episodes_df = collect_episodes(
+        (file_path, run_throttling(results)) for file_path, results in _runs_of(data.performance_results, cpus))
+    model_colors = line_plot_usage.color_models(MODEL_SHORT_NAMES.get(model, model) for model in data.run_models())
+    for cpu_type, cpu_runs in runs_df.groupby('cpu'):
+        add_job(plot_throttling_timeline, (cpu_runs, episodes_df[episodes_df['path'].isin(cpu_runs['path'])]),
+                'throttling', cpu=cpu_type, model_colors=model_colors)
+
+
+def _accuracy_jobs(data, add_job, cpus=None):
+    if data.accuracy_results:
+        add_job(plot_accuracy_bars, (count_detections_by_model(data.accuracy_results),), 'accuracy')
+        add_job(plot_threshold_curves, (threshold_curves(data.accuracy_results),), 'accuracy')
+
+
+# Chart group -> job builders, every group can be rendered on its own
+CHART_GROUPS = {
+    'dots': [_dot_jobs],
+    'bars': [_bar_jobs],
+    'normalized': [_normalized_jobs],
+    'lines': [_line_jobs],
+    'boxes': [_box_jobs],
+    'power': [_power_jobs],
+    'pareto': [_pareto_jobs],
+    'throttling': [_throttling_jobs],
+    'accuracy': [_accuracy_jobs]
+}
+
+
+# Chart group -> run kinds its charts are drawn from
+GROUP_KINDS = {
+    'dots': {'performance', 'accuracy'},
+    'bars': {'performance'},
+    'normalized': {'performance'},
+    'lines': {'performance'},
+    'boxes': {'performance', 'accuracy'},
+    'power': {'performance'},
+    'pareto': {'performance', 'accuracy'},
+    'throttling': {'performance'},
+    'accuracy': {'accuracy'}
+}
+
+
+def affected_groups(kinds, groups=None):
+    """The chart groups (among groups, all by default) drawn from any of the given run kinds."""
+    return [group for group in groups or CHART_GROUPS if GROUP_KINDS[group] & set(kinds)]
+
+
+def build_scoped_jobs(data, output_dir, formats=DEFAULT_FORMATS, groups=None, cpus=None):
+    """
+    (scope, job) pairs of the requested CHART_GROUPS (all by default). The scope of a job is (group, cpu) for
+    the charts of a single cpu and (group, None) for charts drawn from the runs of every cpu. With cpus, the
+    per-cpu charts of the other cpus are left out; the charts drawn from every cpu are always built.
+    """
+    scoped_jobs = []
+
+    def add_job(func, args, sub_dir, cpu=None, **kwargs):
+        job = (func, args, {'output_dir': os.path.join(output_dir, sub_dir), 'formats': formats, **kwargs})
+        scoped_jobs.append(((group, cpu), job))
+
+    for group in groups or CHART_GROUPS:
+        for build_jobs in CHART_GROUPS[group]:
+            with stage('aggregate', group):
+                build_jobs(data, add_job, cpus)
+    return scoped_jobs
+
+
+def build_render_jobs(data, output_dir, formats=DEFAULT_FORMATS, groups=None):
+    """
+    One (func, args, kwargs) job per independent figure (or small group of figures) of the requested
+    CHART_GROUPS (all by default), each job carrying only the data its figure needs.
+    """
+    return [job for _, job in build_scoped_jobs(data, output_dir, formats, groups)]
+
+
+def render_groups(data, output_dir, formats=DEFAULT_FORMATS, groups=None):
+    use_headless_backend()
+    jobs = build_render_jobs(data, output_dir, formats, groups)
+    written_files, failures = render_jobs(jobs, data.max_workers)
+    for func_name, error in failures:
+        print(f'Rendering {func_name} failed: {error}')
+    return written_files
+
+
+def render_all(data_directory, output_dir, formats=DEFAULT_FORMATS, max_workers=None, steady_state=False):
+    return render_groups(ReportData(data_directory, max_workers, steady_state), output_dir, formats)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Render every chart to disk without opening any window')
+    parser.add_argument('--data-dir', default='data')
+    parser.add_argument('--output-dir', default='charts')
+    parser.add_argument('--formats', nargs='+', default=list(DEFAULT_FORMATS), choices=['png', 'svg', 'pdf'])
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--steady-state', action='store_true', help='Leave out the warm-up of every run')
+    parser.add_argument('--profile', default=None, metavar='PREFIX',
+                        help='Profile every stage, writing PREFIX.json and PREFIX.trace.json')
+    parser.add_argument('--profile-memory', action='store_true',
+                        help='With --profile, trace the peak memory of every stage too (slows the stages down)')
+    args = parser.parse_args()
+
+    if args.profile:
+        enable_profiling(memory=args.profile_memory)
+
+    written_files = render_all(args.data_dir, args.output_dir, args.formats, args.workers, args.steady_state)
+    print(f'{len(written_files)} files saved in {args.output_dir}')
+
+    if args.profile:
+        print_stage_summary()
+        write_profile(args.profile)
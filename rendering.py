@@ -0,0 +1,90 @@
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib
+from matplotlib import pyplot as plt
+
+from extract_data import DEFAULT_WORKERS
+from profiling import add_events, event_count, stage, take_events
+
+DEFAULT_FORMATS = ('png',)
+
+
+def use_headless_backend():
+    matplotlib.use('Agg')
+
+
+def safe_file_name(name):
+    # CPU names such as 'Intel(R) Core(TM) i5-4200H CPU @ 2.80GHz' end up in file names
+    return re.sub(r'[<>:"/\\|?*]+', '_', str(name)).strip()
+
+
+def show_or_save(file_name, output_dir=None, formats=DEFAULT_FORMATS):
+    """
+    Show the current figure, or when output_dir is given save it there once per format and close it.
+    Returns the list of written files.
+    """
+    if output_dir is None:
+        plt.show()
+        return []
+
+    os.makedirs(output_dir, exist_ok=True)
+    written_files = []
+    for file_format in formats:
+        file_path = os.path.join(output_dir, f'{safe_file_name(file_name)}.{file_format}')
+        with stage('encode', file_path):
+            plt.savefig(file_path, format=file_format)
+        written_files.append(file_path)
+    plt.close()
+    return written_files
+
+
+def _render_safely(job):
+    func, args, kwargs = job
+    since = event_count()
+    try:
+        with stage('render', func.__name__):
+            written_files = func(*args, **kwargs) or []
+        return written_files, None, take_events(since)
+    except Exception as e:
+        plt.close('all')
+        return [], f'{type(e).__name__}: {e}', take_events(since)
+
+
+def render_job_outcomes(jobs, max_workers=None):
+    """(written files, error message or None) of every job of render_jobs, in the order of jobs."""
+    jobs = list(jobs)
+    if max_workers is None:
+        max_workers = DEFAULT_WORKERS
+    max_workers = min(max_workers, len(jobs))
+
+    if max_workers <= 1:
+        use_headless_backend()
+        outcomes = [_render_safely(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=use_headless_backend) as executor:
+            outcomes = list(executor.map(_render_safely, jobs))
+
+    job_outcomes = []
+    for job_files, error, events in outcomes:
+        add_events(events)
+        job_outcomes.append((job_files, error))
+    return job_outcomes
+
+
+def render_jobs(jobs, max_workers=None):
+    """
+    Render independent figures concurrently. Every job is a (func, args, kwargs) tuple whose function draws
+    and saves its figures through show_or_save with an output_dir, returning the written files.
+    Workers use the non-interactive Agg backend. Returns (written files, failures) where failures is a list of
+    (function name, error message) pairs; a failing job does not stop the others.
+    """
+    jobs = list(jobs)
+    written_files = []
+    failures = []
+    for (func, _, _), (job_files, error) in zip(jobs, render_job_outcomes(jobs, max_workers)):
+        written_files.extend(job_files)
+        if error is not None:
+            failures.append((func.__name__, error))
+    return written_files, failures
@@ -0,0 +1,123 @@
+import numpy as np
+
+RESOURCE_METRICS = ['cpu_usage', 'cpu_freq', 'cpu_package_power', 'cpu_package_temp', 'memory_mb']
+POWER_METRICS = ['power_watt']
+
+RESAMPLING_METHODS = ('linear', 'mean', 'minmax')
+
+# Runs are laid out one after another on a single axis, run i covering [i * _RUN_SPAN, i * _RUN_SPAN + 100],
+# so a single np.interp call per metric interpolates every run at once
+_RUN_SPAN = 200.0
+
+
+def _stack_runs(frames, metrics, time_column):
+    lengths = np.array([len(df) for df in frames], dtype=np.int64)
+    run_ids = np.repeat(np.arange(len(frames)), lengths)
+    times = np.concatenate([df[time_column].to_numpy(dtype=np.float64) for df in frames])
+    values = np.column_stack([np.concatenate([df[metric].to_numpy(dtype=np.float64) for df in frames])
+                              for metric in metrics])
+
+    # Elapsed time as a percentage of each run's duration
+    max_times = np.full(len(frames), np.nan)
+    non_empty = lengths > 0
+    max_times[non_empty] = np.fmax.reduceat(times, (np.cumsum(lengths) - lengths)[non_empty])
+    percent = times / max_times[run_ids] * 100
+    percent[~np.isfinite(percent)] = 0
+
+    # Recorded traces are normally already in time order, only sort when they are not
+    keys = run_ids * _RUN_SPAN + percent
+    if np.any(keys[1:] < keys[:-1]):
+        order = np.argsort(keys, kind='stable')
+        run_ids, percent, values = run_ids[order], percent[order], values[order]
+    return run_ids, percent, values, lengths
+
+
+def _interpolate(run_ids, percent, values, run_count, grid):
+    keys = run_ids * _RUN_SPAN + percent
+
+    # Grid positions outside a run's sampled range take the run's first/last value instead of the neighbour's
+    first_percent = np.full(run_count, np.inf)
+    last_percent = np.full(run_count, -np.inf)
+    np.minimum.at(first_percent, run_ids, percent)
+    np.maximum.at(last_percent, run_ids, percent)
+    query = np.clip(grid[np.newaxis, :], first_percent[:, np.newaxis], last_percent[:, np.newaxis])
+    query = (query + np.arange(run_count)[:, np.newaxis] * _RUN_SPAN).ravel()
+
+    result = np.empty((run_count, len(grid), values.shape[1]))
+    for k in range(values.shape[1]):
+        result[:, :, k] = np.interp(query, keys, values[:, k]).reshape(run_count, len(grid))
+    return result
+
+
+def _bin_indices(run_ids, percent, bins):
+    bin_ids = np.minimum((percent / 100 * bins).astype(np.int64), bins - 1)
+    return run_ids * bins + bin_ids
+
+
+def resample_runs(frames, metrics, points=240, method='linear', time_column='elapsed_time'):
+    """
+    Resample the time series of many runs (e.g. 'Resource Usages' or 'Power Usages' frames) onto one grid of
+    `points` positions spanning 0-100 % of each run's duration, in a single vectorized pass over all samples.
+
+    method:
+        'linear' - linear interpolation at evenly spaced positions
+        'mean'   - mean of the samples falling in each of `points` equal bins (empty bins are interpolated)
+        'minmax' - points // 2 bins, each contributing its minimum followed by its maximum, so peaks survive
+
+    Returns (grid, values): grid holds the `points` positions in percent, values has shape
+    (len(frames), points, len(metrics)). Runs without samples are all NaN.
+    """
+    if method not in RESAMPLING_METHODS:
+        raise ValueError(f'Unknown resampling method {method!r}, expected one of {RESAMPLING_METHODS}')
+    if method == 'minmax' and points % 2:
+        raise ValueError('minmax resampling needs an even number of points')
+
+    run_count = len(frames)
+    metric_count = len(metrics)
+    if run_count == 0:
+        return np.linspace(0, 100, points), np.empty((0, points, metric_count))
+
+    run_ids, percent, values, lengths = _stack_runs(frames, metrics, time_column)
+    if len(percent) == 0:
+        return np.linspace(0, 100, points), np.full((run_count, points, metric_count), np.nan)
+
+    if method == 'linear':
+        grid = np.linspace(0, 100, points)
+        result = _interpolate(run_ids, percent, values, run_count, grid)
+
+    elif method == 'mean':
+        grid = (np.arange(points) + 0.5) * 100 / points
+        flat_bins = _bin_indices(run_ids, percent, points)
+        counts = np.bincount(flat_bins, minlength=run_count * points)
+
+        result = np.empty((run_count, points, metric_count))
+        for k in range(metric_count):
+            sums = np.bincount(flat_bins, weights=values[:, k], minlength=run_count * points)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                result[:, :, k] = (sums / counts).reshape(run_count, points)
+
+        empty_bins = np.isnan(result)
+        if empty_bins.any():
+            result[empty_bins] = _interpolate(run_ids, percent, values, run_count, grid)[empty_bins]
+
+    else:
+        bins = points // 2
+        bin_centers = (np.arange(bins) + 0.5) * 100 / bins
+        grid = np.repeat(bin_centers, 2)
+        flat_bins = _bin_indices(run_ids, percent, bins)
+
+        result = np.empty((run_count, points, metric_count))
+        for k in range(metric_count):
+            minima = np.full(run_count * bins, np.inf)
+            maxima = np.full(run_count * bins, -np.inf)
+            np.minimum.at(minima, flat_bins, values[:, k])
+            np.maximum.at(maxima, flat_bins, values[:, k])
+            result[:, 0::2, k] = minima.reshape(run_count, bins)
+            result[:, 1::2, k] = maxima.reshape(run_count, bins)
+
+        empty_bins = ~np.isfinite(result)
+        if empty_bins.any():
+            result[empty_bins] = _interpolate(run_ids, percent, values, run_count, grid)[empty_bins]
+
+    result[lengths == 0] = np.nan
+    return grid, result
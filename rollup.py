@@ -0,0 +1,110 @@
+import numpy as np
+import pandas as pd
+
+from performance_catalog import METRIC_FIELDS
+
+# Dimensions of a cube cell. Short names depend on the long ones, they are carried along for the charts
+CUBE_DIMENSIONS = ['model', 'model_short_name', 'cpu', 'cpu_short_name', 'date']
+
+# Moments stored for every metric, as columns named f'{metric}_{moment}' -> how cells combine them
+MOMENTS = {'count': 'sum', 'sum': 'sum', 'sumsq': 'sum', 'min': 'min', 'max': 'max'}
+
+
+def build_cube(run_table):
+    """
+    Roll a run table up to one row per (model, cpu, day) cell holding the number of runs and, for every metric
+    of METRIC_FIELDS, the count of its known values, their sum, sum of squares, minimum and maximum.
+    Any coarser aggregate (see slice_cube) can be derived from these moments without going back to the runs.
+    """
+    runs = run_table[CUBE_DIMENSIONS[:-1]].copy()
+    runs['date'] = pd.to_datetime(run_table['date'], errors='coerce').dt.strftime('%Y-%m-%d')
+
+    metrics = run_table[list(METRIC_FIELDS)].astype(np.float64)
+    moments = {}
+    for metric in METRIC_FIELDS:
+        values = metrics[metric]
+        moments[f'{metric}_count'] = values.notna().astype(np.int64)
+        moments[f'{metric}_sum'] = values
+        moments[f'{metric}_sumsq'] = values ** 2
+        moments[f'{metric}_min'] = values
+        moments[f'{metric}_max'] = values
+    runs = pd.concat([runs, pd.DataFrame(moments, index=runs.index)], axis=1)
+    runs['runs'] = 1
+
+    return _aggregate(runs, CUBE_DIMENSIONS, sort=False)
+
+
+def _cell_keys(data):
+    # (model, cpu) of every row, missing values as None so that cube cells and run table rows compare equal
+    return [tuple(None if pd.isna(value) else value for value in key) for key in zip(data['model'], data['cpu'])]
+
+
+def update_cube(cube, run_table, keys):
+    """
+    The cube with the cells of the given (model, cpu) keys rolled up again from their runs in run_table,
+    e.g. after a few runs were added, changed or removed; cells of other keys are kept as they are.
+    """
+    keys = {tuple(None if pd.isna(value) else value for value in key) for key in keys}
+    kept = cube[[key not in keys for key in _cell_keys(cube)]]
+    runs = run_table[[key in keys for key in _cell_keys(run_table)]]
+    if runs.empty:
+        return kept.reset_index(drop=True)
+    return pd.concat([kept, build_cube(runs)], ignore_index=True)
+
+
+def _aggregate(cells, by, metrics=METRIC_FIELDS, sort=True, dropna=False):
+    # Only the moments of the given metrics are combined, the other columns of the cells are dropped
+    aggregations = {'runs': 'sum'}
+    for metric in metrics:
+        aggregations.update({f'{metric}_{moment}': combine for moment, combine in MOMENTS.items()})
+    return cells.groupby(by, sort=sort, dropna=dropna).agg(aggregations).reset_index()
+
+
+def is_cube(data):
+    return 'runs' in data and all(f'{metric}_sum' in data for metric in METRIC_FIELDS)
+
+
+def ensure_cube(data):
+    """data if it already is a cube, otherwise the cube of data as a run table."""
+    return data if is_cube(data) else build_cube(data)
+
+
+def slice_cube(cube, by, metrics=None, since=None, until=None, model=None, cpu=None, dropna=True):
+    """
+    Aggregate the cube over the dimensions in by (sorted by them), optionally restricted to one model, one cpu
+    and a [since, until) date range. Every metric (all of METRIC_FIELDS by default) becomes a column holding
+    its mean over the runs; *_std metrics hold the pooled standard deviation sqrt(mean(std ** 2)) instead,
+    the spread of a run put together from runs of the same length. 'runs' counts the runs of every row.
+    Rows whose by values are missing are left out unless dropna is False, as in a pandas groupby.
+    """
+    if metrics is None:
+        metrics = list(METRIC_FIELDS)
+    metrics = [metric for metric in metrics if metric]
+
+    selected = pd.Series(True, index=cube.index)
+    if model is not None:
+        selected &= cube['model'] == model
+    if cpu is not None:
+        selected &= cube['cpu'] == cpu
+    # Cells without a date are left out of any date range
+    if since is not None:
+        selected &= cube['date'].notna() & (cube['date'].fillna('') >= str(since))
+    if until is not None:
+        selected &= cube['date'].notna() & (cube['date'].fillna('') < str(until))
+
+    rolled = _aggregate(cube[selected], list(by), metrics, sort=True, dropna=dropna)
+
+    sliced = rolled[list(by) + ['runs']].copy()
+    with np.errstate(invalid='ignore', divide='ignore'):
+        for metric in metrics:
+            count = rolled[f'{metric}_count'].to_numpy(dtype=np.float64)
+            if metric.endswith('_std'):
+                sliced[metric] = np.sqrt(rolled[f'{metric}_sumsq'].to_numpy(dtype=np.float64) / count)
+            else:
+                sliced[metric] = rolled[f'{metric}_sum'].to_numpy(dtype=np.float64) / count
+    return sliced
+
+
+def metric_range(cube, metric):
+    """(minimum, maximum) of one metric over every run of the cube."""
+    return cube[f'{metric}_min'].min(), cube[f'{metric}_max'].max()
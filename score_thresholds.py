@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+
+CURVE_COLUMNS = ['model', 'cpu', 'threshold', 'acceptance_rate', 'accuracy', 'correct_rate', 'fps',
+                 'correct_per_second', 'incorrect_per_second']
+
+
+def threshold_sweep(scores, is_correct, thresholds):
+    """
+    Accepted and correctly accepted detection counts for every threshold (a detection is accepted when its
+    score >= threshold), from one sort of the scores and a cumulative sum of is_correct over them.
+    Returns (accepted, correct_accepted) arrays aligned with thresholds.
+    """
+    scores = np.asarray(scores, dtype=np.float64)
+    is_correct = np.asarray(is_correct, dtype=np.float64)
+    valid = ~(np.isnan(scores) | np.isnan(is_correct))
+    scores, is_correct = scores[valid], is_correct[valid]
+
+    order = np.argsort(scores, kind='stable')
+    correct_before = np.concatenate([[0.0], np.cumsum(is_correct[order])])
+
+    # Detections below the threshold are the ones sorted before its insertion point
+    rejected = np.searchsorted(scores[order], thresholds, side='left')
+    accepted = len(scores) - rejected
+    correct_accepted = correct_before[-1] - correct_before[rejected]
+    return accepted, correct_accepted
+
+
+def threshold_curves(accuracy_results, thresholds=None):
+    """
+    Acceptance rate, accuracy of the accepted detections and correct / incorrect detections per second against
+    the score threshold, per (model, cpu) of extract_accuracy_data results ('Detections' needs time, is_correct
+    and score). Detections per second is the run's FPS, 1 / mean detection time.
+    Returns a frame with CURVE_COLUMNS.
+    """
+    if thresholds is None:
+        thresholds = np.linspace(0, 1, 101)
+    thresholds = np.asarray(thresholds, dtype=np.float64)
+
+    detections_by_config = {}
+    for file_path, data in accuracy_results:
+        key = (data['Main'].get('model', 'Unknown Model'), data['Main'].get('cpu', 'Unknown CPU'))
+        detections_by_config.setdefault(key, []).append(data['Detections'][['time', 'is_correct', 'score']])
+
+    curves = []
+    for (model, cpu), frames in detections_by_config.items():
+        detections = pd.concat(frames, ignore_index=True)
+        accepted, correct_accepted = threshold_sweep(detections['score'], detections['is_correct'], thresholds)
+        total = len(detections)
+        fps = 1 / detections['time'].mean() if total else np.nan
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            curves.append(pd.DataFrame({
+                'model': model,
+                'cpu': cpu,
+                'threshold': thresholds,
+                'acceptance_rate': accepted / total,
+                'accuracy': correct_accepted / accepted,
+                'correct_rate': correct_accepted / total,
+                'fps': fps,
+                'correct_per_second': fps * correct_accepted / total,
+                'incorrect_per_second': fps * (accepted - correct_accepted) / total
+            }))
+
+    if not curves:
+        return pd.DataFrame(columns=CURVE_COLUMNS)
+    return pd.concat(curves, ignore_index=True)[CURVE_COLUMNS]
+
+
+def best_thresholds(curves, min_accuracy=0.9):
+    """
+    Per (model, cpu), the threshold giving the most correct detections per second while the accepted
+    detections stay at least min_accuracy correct (the most accurate threshold when none reaches it).
+    """
+    rows = []
+    for (model, cpu), curve in curves.groupby(['model', 'cpu'], sort=False):
+        eligible = curve[curve['accuracy'] >= min_accuracy]
+        if eligible.empty:
+            best = curve.loc[curve['accuracy'].idxmax()] if curve['accuracy'].notna().any() else curve.iloc[0]
+        else:
+            best = eligible.loc[eligible['correct_per_second'].idxmax()]
+        rows.append(best)
+    return pd.DataFrame(rows, columns=CURVE_COLUMNS).reset_index(drop=True)
@@ -0,0 +1,128 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from extract_data import extract_performance_data, extract_files_parallel, report_failures
+
+STEADY_STATE_SIGNALS = ['cpu_freq', 'cpu_package_temp', 'cpu_usage']
+
+# Run table column -> (sheet, trace column, statistic) recomputed over the steady-state window
+STEADY_STATE_FIELDS = {
+    'avg_cpu_usage': ('Resource Usages', 'cpu_usage', 'mean'),
+    'cpu_usage_std': ('Resource Usages', 'cpu_usage', 'std'),
+    'cpu_freq_avg': ('Resource Usages', 'cpu_freq', 'mean'),
+    'cpu_freq_std': ('Resource Usages', 'cpu_freq', 'std'),
+    'avg_cpu_package_power': ('Resource Usages', 'cpu_package_power', 'mean'),
+    'cpu_package_power_std': ('Resource Usages', 'cpu_package_power', 'std'),
+    'avg_cpu_package_temp': ('Resource Usages', 'cpu_package_temp', 'mean'),
+    'cpu_package_temp_std': ('Resource Usages', 'cpu_package_temp', 'std'),
+    'avg_memory_usage': ('Resource Usages', 'memory_mb', 'mean'),
+    'memory_usage_std': ('Resource Usages', 'memory_mb', 'std'),
+    'avg_power_usage': ('Power Usages', 'power_watt', 'mean'),
+    'power_usage_std': ('Power Usages', 'power_watt', 'std')
+}
+
+STEADY_STATE_COLUMNS = ['steady_state_start', 'steady_state_end']
+
+
+def _rolling_means(values, window):
+    # Trailing mean of `window` samples along axis 0, from a single cumulative sum
+    cumulative = np.cumsum(np.vstack([np.zeros((1, values.shape[1])), values]), axis=0)
+    return (cumulative[window:] - cumulative[:-window]) / window
+
+
+def find_steady_state(resource_df, signals=STEADY_STATE_SIGNALS, window_fraction=0.05, tolerance=3.0,
+                      relative_tolerance=0.02, max_warm_up_fraction=0.5, time_column='elapsed_time'):
+    """
+    Elapsed time (start, end) of a run's steady-state window.
+
+    Every trailing window (window_fraction of the samples) is compared with the window right after it. The
+    warm-up ends at the first window from which, for `window` windows in a row, no signal's mean moves by more
+    than `tolerance` times its expected noise (or relative_tolerance of its level, whichever is larger).
+    Noise is estimated from the median absolute sample-to-sample change, so later steps such as throttling do
+    not inflate it. The warm-up never exceeds max_warm_up_fraction of the run.
+    """
+    resource_df = resource_df.dropna(subset=[time_column])
+    if not resource_df[time_column].is_monotonic_increasing:
+        resource_df = resource_df.sort_values(time_column, kind='stable')
+    times = resource_df[time_column].to_numpy(dtype=np.float64)
+    if len(times) == 0:
+        return np.nan, np.nan
+
+    values = resource_df[[signal for signal in signals if signal in resource_df]].to_numpy(dtype=np.float64)
+    window = max(int(len(times) * window_fraction), 1)
+    if values.shape[1] == 0 or len(times) < 3 * window:
+        return times[0], times[-1]
+
+    # Missing samples take the signal's level, so they never count as a change
+    level = np.nanmedian(values, axis=0)
+    values = np.where(np.isnan(values), level, values)
+    noise = 1.4826 * np.median(np.abs(np.diff(values, axis=0)), axis=0) / np.sqrt(2)
+
+    means = _rolling_means(values, window)
+    changes = np.abs(means[window:] - means[:-window])
+    band = np.maximum(tolerance * noise * np.sqrt(2 / window), relative_tolerance * np.abs(level))
+    stable = (changes <= band).all(axis=1).astype(np.float64)
+
+    # Window k covers samples [k, k + window), it starts the steady state when the next ones are stable too
+    settled = np.flatnonzero(_rolling_means(stable[:, np.newaxis], min(window, len(stable)))[:, 0] == 1)
+    start = settled[0] if settled.size else len(times)
+    start = min(start, int(len(times) * max_warm_up_fraction))
+    return times[start], times[-1]
+
+
+def steady_state_stats(data, time_column='elapsed_time', **detector_options):
+    """
+    STEADY_STATE_FIELDS and STEADY_STATE_COLUMNS of one run from its 'Resource Usages' and 'Power Usages'
+    sheets, restricted to the steady-state window of its resource trace.
+    """
+    start, end = find_steady_state(data['Resource Usages'], time_column=time_column, **detector_options)
+    stats = {'steady_state_start': start, 'steady_state_end': end}
+
+    windows = {}
+    for sheet_name in ['Resource Usages', 'Power Usages']:
+        sheet = data[sheet_name]
+        windows[sheet_name] = sheet[sheet[time_column].between(start, end)]
+
+    for column, (sheet_name, trace_column, statistic) in STEADY_STATE_FIELDS.items():
+        window = windows[sheet_name]
+        if trace_column not in window:
+            stats[column] = np.nan
+        elif statistic == 'mean':
+            stats[column] = window[trace_column].mean()
+        else:
+            stats[column] = window[trace_column].std()
+    return stats
+
+
+def steady_state_file_stats(file_path):
+    data = extract_performance_data(file_path, sheets=['Main', 'Resource Usages', 'Power Usages'])
+    return steady_state_stats(data)
+
+
+def restrict_to_steady_state(run_table, results=None, max_workers=None):
+    """
+    Return a copy of the run table with the resource and power averages and standard deviations recomputed
+    over each run's steady-state window, plus STEADY_STATE_COLUMNS. avg_detection_time and fps keep the
+    'Main' values, the performance workbooks do not record when each detection happened.
+    Pass already loaded performance results to avoid reading the traces again.
+    """
+    if results is None:
+        results, failures = extract_files_parallel(run_table['path'], steady_state_file_stats, max_workers)
+        report_failures(failures)
+    else:
+        results = [(file_path, steady_state_stats(data)) for file_path, data in results]
+
+    steady_df = pd.DataFrame.from_dict({os.path.abspath(file_path): stats for file_path, stats in results},
+                                       orient='index', columns=list(STEADY_STATE_FIELDS) + STEADY_STATE_COLUMNS)
+
+    # Runs whose traces could not be read keep their 'Main' values
+    run_table = run_table.copy()
+    steady_df = steady_df.reindex(run_table['path'])
+    found = steady_df['steady_state_start'].notna().to_numpy()
+    for column in STEADY_STATE_FIELDS:
+        run_table[column] = np.where(found, steady_df[column].to_numpy(dtype=np.float64), run_table[column])
+    for column in STEADY_STATE_COLUMNS:
+        run_table[column] = steady_df[column].to_numpy(dtype=np.float64)
+    return run_table
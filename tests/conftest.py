@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import extract_data
+import performance_catalog
+from trace_format import write_trace
+
+
+@pytest.fixture(autouse=True)
+def isolated_caches(tmp_path_factory, monkeypatch):
+    # Parsed workbooks and run catalogs of the tests stay out of the repository's .cache
+    cache_dir = tmp_path_factory.mktemp('cache')
+    monkeypatch.setattr(extract_data, 'CACHE_DIR', str(cache_dir / 'workbooks'))
+    monkeypatch.setattr(performance_catalog, 'CATALOG_DIR', str(cache_dir / 'catalogs'))
+
+
+def _performance_run(cpu='cpu a', model='yolov8s', samples=120, fps=20.0, seed=None, **main):
+    """
+    One synthetic performance run, {sheet name: data} as extract_performance_data returns it: resource and
+    power samples every 500 ms (elapsed_time is recorded in milliseconds) around steady levels.
+    main adds or overrides 'Main' entries.
+    """
+    rng = np.random.default_rng(samples if seed is None else seed)
+    elapsed_ms = np.arange(samples) * 500.0
+    return {
+        'Main': {'date': '2024-05-01 10:00:00', 'cpu': cpu, 'model': model, 'fps': fps, 'avg_cpu_usage': 50.0,
+                 'avg_power_usage': 60.0, **main},
+        'Resource Usages': pd.DataFrame({
+            'elapsed_time': elapsed_ms,
+            'cpu_usage': rng.uniform(40, 60, samples),
+            'cpu_freq': rng.uniform(2900, 3100, samples),
+            'cpu_package_power': rng.uniform(25, 35, samples),
+            'cpu_package_temp': rng.uniform(65, 75, samples),
+            'memory_mb': rng.uniform(390, 410, samples)
+        }),
+        'Power Usages': pd.DataFrame({'elapsed_time': elapsed_ms, 'power_watt': rng.uniform(55, 65, samples)})
+    }
+
+
+@pytest.fixture
+def performance_run():
+    """Factory of synthetic performance runs, see _performance_run for its options."""
+    return _performance_run
+
+
+@pytest.fixture
+def write_run():
+    """
+    Write a run as the trace directory/{name}_performance.trace and return its path: the given run, or one
+    built by performance_run from the keyword options.
+    """
+    def write(directory, name, run=None, **options):
+        return write_trace(str(directory / f'{name}_performance.trace'), run or _performance_run(**options))
+    return write
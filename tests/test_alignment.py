@@ -0,0 +1,26 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from alignment import align_traces, detection_timeline
+
+
+def test_detections_are_placed_on_the_millisecond_axis():
+    # Detection times are recorded in seconds, elapsed_time in milliseconds
+    timeline = detection_timeline(pd.DataFrame({'time': [0.1, 0.2, 0.3], 'is_correct': [True, False, True],
+                                                'score': [0.9, 0.4, 0.8]}))
+
+    assert timeline['elapsed_time'].tolist() == pytest.approx([100.0, 300.0, 600.0])
+    assert timeline['detection_index'].tolist() == [0, 1, 2]
+
+
+def test_resource_samples_take_the_last_completed_detection():
+    resource_df = pd.DataFrame({'elapsed_time': [0.0, 250.0, 500.0, 750.0], 'cpu_usage': [10.0, 20.0, 30.0, 40.0]})
+    power_df = pd.DataFrame({'elapsed_time': [0.0, 500.0], 'power_watt': [50.0, 60.0]})
+    detections_df = pd.DataFrame({'time': [0.2, 0.4], 'is_correct': [True, False], 'score': [0.9, 0.4]})
+
+    aligned = align_traces(resource_df, power_df, detections_df, direction='backward')
+
+    assert aligned['power_watt'].tolist() == [50.0, 50.0, 60.0, 60.0]
+    assert np.isnan(aligned['detection_index'].iloc[0])
+    assert aligned['detection_index'].iloc[1:].tolist() == [0, 0, 1]
@@ -0,0 +1,22 @@
+import os
+
+import pandas as pd
+
+from plots.box_plot_scores import combine_detections, plot_score_boxplot
+from rendering import use_headless_backend
+
+
+def _accuracy_run(model, is_correct, score):
+    return {'Main': {'model': model}, 'Detections': pd.DataFrame({'is_correct': is_correct, 'score': score})}
+
+
+def test_model_without_correct_detections(tmp_path):
+    use_headless_backend()
+    combined_df = combine_detections([
+        ('a_accuracy.xlsx', _accuracy_run('yolov8s', [True, True, False], [0.9, 0.8, 0.3])),
+        ('b_accuracy.xlsx', _accuracy_run('efficientdet_lite1', [False, False], [0.2, 0.4]))
+    ])
+
+    written_files = plot_score_boxplot(combined_df, output_dir=str(tmp_path))
+
+    assert written_files == [os.path.join(str(tmp_path), 'score_boxplot.png')]
@@ -0,0 +1,45 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from capacity import CAPACITY_COLUMNS, plan_capacity
+
+
+def _run_table(rows):
+    columns = ['cpu', 'cpu_short_name', 'model', 'model_short_name', 'path', 'fps', 'avg_cpu_usage',
+               'avg_memory_usage', 'avg_power_usage', 'avg_cpu_package_power', 'avg_cpu_package_temp']
+    return pd.DataFrame([dict(zip(columns, row)) for row in rows], columns=columns)
+
+
+def test_plan_streams_and_limiting_factor():
+    run_table = _run_table([
+        ('cpu a', 'PC1', 'yolov8s', 'yolo v8 s', 'a', 10.0, 30.0, 500.0, 60.0, 20.0, 60.0),
+        ('cpu a', 'PC1', 'yolov8s', 'yolo v8 s', 'b', 10.0, 30.0, 500.0, 60.0, 20.0, 60.0),
+        ('cpu b', 'PC3', 'yolov8s', 'yolo v8 s', 'c', 40.0, 20.0, 500.0, 80.0, 30.0, 70.0)
+    ])
+
+    plan = plan_capacity(run_table, target_fps=5.0, max_cpu_usage=90.0, memory_budget_mb=2000.0)
+
+    assert list(plan.columns) == CAPACITY_COLUMNS
+    assert plan['cpu_short_name'].tolist() == ['PC3', 'PC1']
+    # cpu b: 90 / (20 * 5 / 40) = 36 streams by cpu, 4 by memory; cpu a: 90 / 15 = 6 by cpu
+    assert plan['max_streams'].tolist() == [4.0, 4.0]
+    assert plan['limiting_factor'].tolist() == ['memory', 'memory']
+    assert plan['runs'].tolist() == [1, 2]
+
+
+def test_configuration_without_fps_gets_no_plan():
+    run_table = _run_table([
+        ('cpu a', 'PC1', 'yolov8s', 'yolo v8 s', 'a', 10.0, 30.0, 500.0, 60.0, 20.0, 60.0),
+        ('cpu b', 'PC3', 'yolov8s', 'yolo v8 s', 'b', np.nan, 20.0, 100.0, 80.0, 30.0, 70.0)
+    ])
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        plan = plan_capacity(run_table, target_fps=5.0, memory_budget_mb=1000.0)
+
+    # Memory alone would allow 10 streams on cpu b, without an fps measurement there is no plan for it
+    assert plan['cpu_short_name'].tolist() == ['PC1', 'PC3']
+    assert plan['max_streams'].iloc[0] == 2.0 and plan['limiting_factor'].iloc[0] == 'memory'
+    assert np.isnan(plan['max_streams'].iloc[1]) and pd.isna(plan['limiting_factor'].iloc[1])
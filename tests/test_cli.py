@@ -0,0 +1,23 @@
+import pandas as pd
+import pytest
+
+import cli
+
+
+def test_correlations_command(tmp_path, capsys, performance_run, write_run):
+    data_dir = tmp_path / 'data'
+    data_dir.mkdir()
+    for name, cpu, seed in [('run0', 'cpu a', 0), ('run1', 'cpu b', 1)]:
+        run = performance_run(cpu=cpu, samples=60, seed=seed)
+        # Wall power follows the package power exactly, sampled at the same times
+        run['Power Usages']['power_watt'] = 20 + 2 * run['Resource Usages']['cpu_package_power']
+        write_run(data_dir, name, run)
+    table_path = tmp_path / 'correlations.csv'
+
+    cli.main(['--data-dir', str(data_dir), '--workers', '1', 'correlations', '--table', str(table_path)])
+
+    table = pd.read_csv(table_path)
+    assert table['file'].tolist() == ['run0_performance.trace', 'run1_performance.trace']
+    assert table['cpu_package_power'].tolist() == pytest.approx([1.0, 1.0])
+    assert (table['cpu_usage'].abs() < 0.5).all()
+    assert 'run1_performance.trace' in capsys.readouterr().out
@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from detection_stats import LATENCY_PERCENTILES, DetectionStats, LatencySketch, RunningMoments, merge_stats_by_key
+
+
+def _detections(rng, size):
+    is_correct = rng.random(size) < 0.7
+    return pd.DataFrame({'time': rng.lognormal(-2.5, 0.4, size), 'is_correct': is_correct,
+                         'score': rng.uniform(0.3, 1.0, size)})
+
+
+def test_merged_moments_match_the_values():
+    rng = np.random.default_rng(0)
+    chunks = [rng.normal(50, 10, size) for size in [1, 500, 37, 0, 2000]]
+    chunks[2][:5] = np.nan
+
+    moments = RunningMoments()
+    for chunk in chunks:
+        moments.merge(RunningMoments().update(chunk))
+
+    values = np.concatenate(chunks)
+    values = values[~np.isnan(values)]
+    assert moments.count == values.size
+    assert moments.total == pytest.approx(values.sum())
+    assert moments.mean == pytest.approx(values.mean())
+    assert moments.std() == pytest.approx(values.std(ddof=1))
+    assert np.isnan(RunningMoments().update([1.0]).std())
+
+
+def test_stats_merged_per_key_match_the_concatenated_detections():
+    rng = np.random.default_rng(1)
+    files = [(('yolov8s', 'cpu a'), _detections(rng, 300)), (('yolov8s', 'cpu a'), _detections(rng, 120)),
+             (('yolov8s', 'cpu b'), _detections(rng, 200))]
+
+    merged = merge_stats_by_key((key, DetectionStats().update(detections)) for key, detections in files)
+
+    assert set(merged) == {('yolov8s', 'cpu a'), ('yolov8s', 'cpu b')}
+    detections = pd.concat([files[0][1], files[1][1]])
+    correct_scores = detections.loc[detections['is_correct'], 'score']
+    summary = merged[('yolov8s', 'cpu a')].summary()
+    assert summary['average_detection_time'] == pytest.approx(detections['time'].mean())
+    assert summary['detection_time_std'] == pytest.approx(detections['time'].std())
+    assert summary['average_accuracy'] == pytest.approx(detections['is_correct'].mean())
+    assert summary['average_score'] == pytest.approx(correct_scores.mean())
+    assert summary['score_std'] == pytest.approx(correct_scores.std())
+    assert summary['fps'] == pytest.approx(1 / detections['time'].mean())
+
+
+def test_latency_quantiles_within_the_relative_accuracy():
+    rng = np.random.default_rng(2)
+    chunks = [rng.lognormal(-2.5, 0.6, size) for size in [5000, 1, 800]]
+
+    sketch = LatencySketch(relative_accuracy=0.01)
+    for chunk in chunks:
+        sketch.merge(LatencySketch(relative_accuracy=0.01).update(chunk))
+
+    values = np.sort(np.concatenate(chunks))
+    assert sketch.count == values.size
+    for q in [0.0, 0.5, 0.9, 0.95, 0.99, 1.0]:
+        # The estimate is that of the value at the quantile's rank, rounded down
+        assert sketch.quantile(q) == pytest.approx(values[int(q * (values.size - 1))], rel=0.01)
+
+
+def test_latency_sketch_with_zeros_and_no_values():
+    sketch = LatencySketch().update([0.0, 0.0, 0.0, 0.1])
+
+    assert sketch.quantile(0.5) == 0.0
+    assert sketch.quantile(1.0) == pytest.approx(0.1, rel=0.01)
+    assert np.isnan(LatencySketch().quantile(0.5))
+    with pytest.raises(ValueError):
+        LatencySketch(relative_accuracy=0.01).merge(LatencySketch(relative_accuracy=0.02).update([1.0]))
+
+
+def test_latency_percentiles_of_the_detections():
+    rng = np.random.default_rng(3)
+    detections = _detections(rng, 2000)
+
+    latencies = DetectionStats().update(detections).latency_percentiles()
+
+    assert list(latencies) == [f'detection_time_p{p}' for p in LATENCY_PERCENTILES] + ['detection_time_max']
+    for p in LATENCY_PERCENTILES:
+        assert latencies[f'detection_time_p{p}'] == pytest.approx(np.percentile(detections['time'], p), rel=0.02)
+    assert latencies['detection_time_max'] == detections['time'].max()
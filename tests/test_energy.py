@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from energy import energy_from_results
+
+
+def _run(elapsed_ms, power_watt, package_power, fps, power_elapsed_ms=None):
+    return ('run_performance.xlsx', {
+        'Main': {'fps': fps},
+        'Resource Usages': pd.DataFrame({'elapsed_time': elapsed_ms, 'cpu_package_power': package_power}),
+        'Power Usages': pd.DataFrame({'elapsed_time': elapsed_ms if power_elapsed_ms is None else power_elapsed_ms,
+                                      'power_watt': power_watt})
+    })
+
+
+def test_energy_of_known_trace_in_joules():
+    # 10 s recorded in milliseconds: 20 W constant, package power ramping linearly from 0 to 30 W
+    elapsed_ms = np.linspace(0, 10_000, 101)
+    energy_df = energy_from_results([_run(elapsed_ms, np.full(101, 20.0), np.linspace(0, 30, 101), fps=25.0)])
+    run = energy_df.iloc[0]
+
+    assert run['duration_s'] == pytest.approx(10.0)
+    assert run['energy_j'] == pytest.approx(200.0)
+    assert run['package_energy_j'] == pytest.approx(150.0)
+    assert run['frames'] == pytest.approx(250.0)
+    assert run['energy_per_frame_j'] == pytest.approx(0.8)
+    assert run['frames_per_joule'] == pytest.approx(1.25)
+
+
+def test_runs_with_a_single_sample_have_no_energy():
+    energy_df = energy_from_results([_run([0.0], [20.0], [10.0], fps=25.0)])
+
+    assert energy_df[['duration_s', 'energy_j', 'frames_per_joule']].isna().all(axis=None)
+
+
+def test_duration_is_the_span_of_the_power_trace():
+    # The power meter recorded 8 s of the 10 s the resource monitor did
+    energy_df = energy_from_results([_run(np.linspace(0, 10_000, 101), np.full(81, 20.0), np.full(101, 15.0),
+                                          fps=25.0, power_elapsed_ms=np.linspace(1_000, 9_000, 81))])
+    run = energy_df.iloc[0]
+
+    assert run['duration_s'] == pytest.approx(8.0)
+    assert run['energy_j'] == pytest.approx(160.0)
+    assert run['energy_per_frame_j'] == pytest.approx(0.8)
+
+
+def test_gaps_in_the_power_trace_are_not_counted_as_zero():
+    elapsed_ms = np.linspace(0, 10_000, 101)
+    power_watt = np.full(101, 20.0)
+    power_watt[40:50] = np.nan
+    energy_df = energy_from_results([_run(elapsed_ms, power_watt, np.full(101, 15.0), fps=25.0),
+                                     _run(elapsed_ms, np.full(101, 20.0), np.full(101, 15.0), fps=25.0)])
+
+    assert energy_df['energy_j'].isna().tolist() == [True, False]
+    assert energy_df['frames_per_joule'].isna().tolist() == [True, False]
+    # The package power trace has no gap, its energy is still known
+    assert energy_df['package_energy_j'].tolist() == pytest.approx([150.0, 150.0])
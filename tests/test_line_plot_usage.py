@@ -0,0 +1,38 @@
+from plots.line_plot_usage import METRICS, color_models, group_resource_pyramids, plot_metric_over_time
+from render_all import ReportData
+
+
+def test_one_pyramid_per_run_over_every_metric(tmp_path, performance_run):
+    results = [('a', performance_run('cpu a', 'yolov8s')), ('b', performance_run('cpu a', 'efficientdet_lite1')),
+               ('c', performance_run('cpu b', 'yolov8s'))]
+
+    pyramids_by_cpu = group_resource_pyramids(results)
+
+    assert {cpu: [model for model, _ in pyramids] for cpu, pyramids in pyramids_by_cpu.items()} == {
+        'cpu a': ['yolov8s', 'efficientdet_lite1'], 'cpu b': ['yolov8s']}
+    _, pyramid = pyramids_by_cpu['cpu a'][0]
+    assert pyramid.metrics == [metric for metric, _, _ in METRICS]
+    assert pyramid.query('cpu_usage', max_points=10)['elapsed_time_percent'].between(0, 100).all()
+
+    model_colors = color_models(['yolov8s', 'efficientdet_lite1'])
+    metric, ylabel, title = METRICS[1]
+    written_files = plot_metric_over_time(pyramids_by_cpu, metric, ylabel, title, model_colors,
+                                          output_dir=str(tmp_path), formats=('png',))
+    assert sorted(map(str, written_files)) == sorted(str(tmp_path / f'cpu_usage_over_time_{cpu}.png')
+                                                     for cpu in ['cpu a', 'cpu b'])
+
+
+def test_report_keeps_the_pyramids_of_unchanged_runs(tmp_path, performance_run, write_run):
+    for name in ['run0', 'run1']:
+        write_run(tmp_path, name, samples=400)
+    data = ReportData(str(tmp_path), max_workers=1)
+
+    before = [pyramid for _, pyramid in data.resource_pyramids['cpu a']]
+    changed = write_run(tmp_path, 'run1', samples=200)
+    data.apply_changes('performance', [(changed, performance_run(samples=200))])
+    after = [pyramid for _, pyramid in data.resource_pyramids['cpu a']]
+
+    # The unchanged run keeps its pyramid, the changed one gets a new pyramid of its new trace
+    kept = [pyramid for pyramid in after if any(pyramid is old for old in before)]
+    assert len(kept) == 1 and len(kept[0]) == 400
+    assert sorted(len(pyramid) for pyramid in after) == [200, 400]
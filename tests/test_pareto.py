@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+
+from pareto import CONFIG_COLUMNS, cheapest_configuration, configuration_table, non_dominated_ranks, \
+    pareto_frontier
+
+
+def _brute_force_ranks(values, maximize):
+    # Peel the fronts off one by one, testing every pair of the remaining points
+    values = np.where(maximize, values, -values)
+    ranks = np.full(len(values), -1)
+    rank = 0
+    while (ranks < 0).any():
+        remaining = np.flatnonzero(ranks < 0)
+        front = [i for i in remaining if not any(
+            (values[j] >= values[i]).all() and (values[j] > values[i]).any() for j in remaining)]
+        ranks[front] = rank
+        rank += 1
+    return ranks
+
+
+def test_ranks_match_a_pairwise_search():
+    rng = np.random.default_rng(0)
+    values = rng.integers(0, 6, size=(60, 3)).astype(np.float64)
+    maximize = np.array([True, False, True])
+
+    np.testing.assert_array_equal(non_dominated_ranks(values, maximize), _brute_force_ranks(values, maximize))
+    assert non_dominated_ranks(np.empty((0, 3)), maximize).size == 0
+
+
+def test_missing_objectives_are_ignored():
+    values = np.array([[10.0, np.nan], [5.0, 1.0], [5.0, 2.0]])
+
+    # The first point is compared on fps alone and dominates both others, the third dominates the second
+    assert non_dominated_ranks(values, [True, True]).tolist() == [0, 2, 1]
+
+
+def test_frontier_of_the_configurations():
+    run_table = pd.DataFrame({
+        'cpu': ['cpu a', 'cpu a', 'cpu a', 'cpu b', 'cpu b'],
+        'cpu_short_name': ['A', 'A', 'A', 'B', 'B'],
+        'model': ['fast', 'fast', 'slow', 'fast', 'slow'],
+        'model_short_name': ['F', 'F', 'S', 'F', 'S'],
+        'path': [f'run{index}' for index in range(5)],
+        'fps': [30.0, 20.0, 10.0, 20.0, 5.0],
+        'avg_detection_time': [0.04, 0.05, 0.1, 0.05, 0.2],
+        'avg_cpu_package_power': [20.0, 20.0, 20.0, 15.0, 25.0],
+        'avg_power_usage': [60.0, 60.0, 55.0, 40.0, 70.0],
+        'avg_memory_usage': [400.0, 400.0, 400.0, 400.0, 400.0]
+    })
+    accuracy = {('fast', 'cpu a'): 0.6, ('slow', 'cpu a'): 0.9, ('fast', 'cpu b'): 0.6, ('slow', 'cpu b'): 0.8}
+
+    configs = configuration_table(run_table, accuracy)
+    assert list(configs.columns) == CONFIG_COLUMNS
+    fast_a = configs[(configs['cpu'] == 'cpu a') & (configs['model'] == 'fast')].iloc[0]
+    assert fast_a['runs'] == 2 and fast_a['fps'] == 25.0
+
+    frontier = pareto_frontier(configs)
+    # Slow on cpu b is slower, less accurate and hungrier than slow on cpu a
+    assert frontier.set_index(['model', 'cpu'])['on_frontier'].to_dict() == {
+        ('fast', 'cpu a'): True, ('fast', 'cpu b'): True, ('slow', 'cpu a'): True, ('slow', 'cpu b'): False}
+    assert frontier['pareto_rank'].is_monotonic_increasing
+
+    assert cheapest_configuration(frontier, min_fps=20)[['model', 'cpu']].tolist() == ['fast', 'cpu b']
+    assert cheapest_configuration(frontier, min_fps=50) is None
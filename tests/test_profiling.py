@@ -0,0 +1,82 @@
+import tracemalloc
+
+import pytest
+
+import profiling
+from extract_data import extract_files_parallel
+from profiling import stage, take_events
+from rendering import render_jobs
+
+
+def _extract(file_path):
+    with stage('extract', file_path) as current:
+        current.add_rows(1)
+    return file_path
+
+
+def _render(name, output_dir=None, formats=None):
+    return [name]
+
+
+@pytest.fixture
+def profiled(monkeypatch):
+    monkeypatch.setattr(profiling, 'PROFILING_ENABLED', True)
+    monkeypatch.setenv('PROFILE_STAGES', '1')
+    take_events()
+    # Events the parent records before the pool starts are inherited by forked workers
+    for index in range(5):
+        with stage('discover', f'before-{index}'):
+            pass
+    yield
+    take_events()
+
+
+def _event_keys(events):
+    return [(event['stage'], event['file'], event['start_ns'], event['pid']) for event in events]
+
+
+def test_parallel_extract_returns_each_event_once(profiled):
+    file_paths = [f'file-{index}' for index in range(8)]
+    results, failures = extract_files_parallel(file_paths, _extract, max_workers=2)
+
+    assert failures == []
+    assert [data for _, data in results] == file_paths
+    keys = _event_keys(profiling.events())
+    assert len(keys) == len(set(keys))
+    assert sorted(event['file'] for event in profiling.events() if event['stage'] == 'extract') == file_paths
+    assert sum(event['stage'] == 'discover' for event in profiling.events()) == 5
+
+
+def test_serial_extract_keeps_parent_events(profiled):
+    extract_files_parallel(['a', 'b'], _extract, max_workers=1)
+
+    keys = _event_keys(profiling.events())
+    assert len(keys) == len(set(keys))
+    assert [event['stage'] for event in profiling.events()].count('discover') == 5
+    assert [event['stage'] for event in profiling.events()].count('extract') == 2
+
+
+def test_parallel_render_returns_each_event_once(profiled):
+    jobs = [(_render, (f'chart-{index}',), {}) for index in range(6)]
+    written_files, failures = render_jobs(jobs, max_workers=2)
+
+    assert failures == []
+    assert sorted(written_files) == [f'chart-{index}' for index in range(6)]
+    keys = _event_keys(profiling.events())
+    assert len(keys) == len(set(keys))
+    assert [event['stage'] for event in profiling.events()].count('render') == 6
+
+
+def test_peak_memory_is_traced_only_when_enabled(profiled, monkeypatch):
+    with stage('aggregate'):
+        values = list(range(100_000))
+    assert profiling.events()[-1]['peak_memory'] is None
+
+    monkeypatch.setattr(profiling, 'MEMORY_PROFILING_ENABLED', True)
+    with stage('aggregate'):
+        values = list(range(100_000))
+    tracemalloc.stop()
+    del values
+    assert profiling.events()[-1]['peak_memory'] > 100_000 * 8
+    aggregate, = [total for total in profiling.stage_summary() if total['stage'] == 'aggregate']
+    assert aggregate['peak_memory'] > 100_000 * 8
@@ -0,0 +1,18 @@
+import pandas as pd
+
+from render_all import ReportData
+
+
+def test_run_table_without_loading_the_full_results(tmp_path, write_run):
+    write_run(tmp_path, 'run0', cpu='cpu a', model='yolov8s')
+    write_run(tmp_path, 'run1', cpu='cpu b', model='efficientdet_lite1', samples=140, fps=10.0)
+    data = ReportData(str(tmp_path), max_workers=1)
+
+    run_table = data.run_table
+
+    # Only the 'Main' sheets are read, through the catalog
+    assert 'performance_results' not in dict(data.loaded_parts())
+    loaded = ReportData(str(tmp_path), max_workers=1)
+    loaded.performance_results
+    pd.testing.assert_frame_equal(run_table.sort_values('path', ignore_index=True),
+                                  loaded.run_table.sort_values('path', ignore_index=True))
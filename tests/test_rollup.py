@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from performance_catalog import METRIC_FIELDS, RUN_TABLE_COLUMNS
+from rollup import build_cube, metric_range, slice_cube, update_cube
+
+
+def _run_table(runs=40, seed=0):
+    rng = np.random.default_rng(seed)
+    run_table = pd.DataFrame({
+        'date': rng.choice(['2024-05-01 10:00:00', '2024-05-01 18:30:00', '2024-05-02 09:15:00'], runs),
+        'cpu': rng.choice(['cpu a', 'cpu b'], runs),
+        'model': rng.choice(['yolov8s', 'efficientdet_lite1', 'ssd_mobilenet_v1'], runs),
+        **{metric: rng.uniform(1, 100, runs) for metric in METRIC_FIELDS},
+        'file': [f'run{index}_performance.trace' for index in range(runs)]
+    })
+    run_table['cpu_short_name'] = run_table['cpu'].str.upper()
+    run_table['model_short_name'] = run_table['model'].str[:4]
+    run_table['path'] = run_table['file']
+    # Runs missing a metric are left out of its count, not of the others
+    run_table.loc[:4, 'fps'] = np.nan
+    return run_table[RUN_TABLE_COLUMNS]
+
+
+def test_slices_match_the_runs():
+    run_table = _run_table()
+    cube = build_cube(run_table)
+
+    sliced = slice_cube(cube, ['model', 'cpu'], ['avg_cpu_usage', 'cpu_usage_std', 'fps']).set_index(['model', 'cpu'])
+
+    grouped = run_table.groupby(['model', 'cpu'])
+    pd.testing.assert_series_equal(sliced['runs'], grouped.size(), check_names=False, check_dtype=False)
+    pd.testing.assert_series_equal(sliced['avg_cpu_usage'], grouped['avg_cpu_usage'].mean(), check_names=False)
+    pd.testing.assert_series_equal(sliced['fps'], grouped['fps'].mean(), check_names=False)
+    pooled_std = grouped['cpu_usage_std'].apply(lambda values: np.sqrt((values ** 2).mean()))
+    pd.testing.assert_series_equal(sliced['cpu_usage_std'], pooled_std, check_names=False)
+    assert list(sliced.columns) == ['runs', 'avg_cpu_usage', 'cpu_usage_std', 'fps']
+    assert metric_range(cube, 'fps') == (run_table['fps'].min(), run_table['fps'].max())
+
+
+def test_slice_of_one_cpu_and_day():
+    run_table = _run_table()
+    cube = build_cube(run_table)
+
+    sliced = slice_cube(cube, ['model'], ['avg_power_usage'], since='2024-05-01', until='2024-05-02', cpu='cpu a')
+
+    runs = run_table[(run_table['cpu'] == 'cpu a') & run_table['date'].str.startswith('2024-05-01')]
+    expected = runs.groupby('model')['avg_power_usage'].mean()
+    assert sliced.set_index('model')['avg_power_usage'].to_dict() == pytest.approx(expected.to_dict())
+
+
+def test_updated_cube_matches_a_fresh_build():
+    run_table = _run_table()
+    cube = build_cube(run_table)
+
+    changed = run_table.copy()
+    changed.loc[changed['model'] == 'yolov8s', 'fps'] *= 2
+    changed = changed[~((changed['model'] == 'ssd_mobilenet_v1') & (changed['cpu'] == 'cpu b'))]
+    keys = {('yolov8s', 'cpu a'), ('yolov8s', 'cpu b'), ('ssd_mobilenet_v1', 'cpu b')}
+
+    cells = ['model', 'cpu', 'date']
+    pd.testing.assert_frame_equal(update_cube(cube, changed, keys).sort_values(cells, ignore_index=True),
+                                  build_cube(changed).sort_values(cells, ignore_index=True))
@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from performance_catalog import run_table_from_results
+from steady_state import STEADY_STATE_COLUMNS, find_steady_state, restrict_to_steady_state
+
+
+def _warming_up(run, warm_up_samples):
+    # Frequency and temperature climbing to their steady level over the first samples, CPU usage 20 points higher
+    resource_df = run['Resource Usages']
+    ramp = np.minimum(np.arange(len(resource_df)) / warm_up_samples, 1.0)
+    resource_df['cpu_freq'] = 2000 + 1000 * ramp + resource_df['cpu_freq'] - 3000
+    resource_df['cpu_package_temp'] = 40 + 30 * ramp + resource_df['cpu_package_temp'] - 70
+    resource_df.loc[:warm_up_samples - 1, 'cpu_usage'] += 20
+    return run
+
+
+def test_warm_up_is_left_out(performance_run):
+    # 200 samples every 500 ms, warming up over the first 20 s
+    run = _warming_up(performance_run(samples=200), warm_up_samples=40)
+
+    start, end = find_steady_state(run['Resource Usages'])
+
+    assert 15_000 <= start <= 25_000
+    assert end == 99_500
+
+
+def test_flat_and_short_runs_are_steady_throughout(performance_run):
+    assert find_steady_state(performance_run(samples=200)['Resource Usages']) == (0, 99_500)
+    assert find_steady_state(performance_run(samples=2)['Resource Usages']) == (0, 500)
+    assert all(np.isnan(find_steady_state(performance_run(samples=0)['Resource Usages'])))
+
+
+def test_run_table_restricted_to_the_steady_state(performance_run):
+    results = [('warm_performance.trace', _warming_up(performance_run(samples=200), warm_up_samples=40)),
+               ('flat_performance.trace', performance_run(samples=200))]
+    run_table = run_table_from_results(results)
+
+    steady_table = restrict_to_steady_state(run_table, results).set_index('file')
+
+    for file, run in results:
+        resource_df = run['Resource Usages']
+        start = steady_table.loc[file, 'steady_state_start']
+        window = resource_df[resource_df['elapsed_time'] >= start]
+        assert steady_table.loc[file, 'avg_cpu_usage'] == pytest.approx(window['cpu_usage'].mean())
+        assert steady_table.loc[file, 'cpu_freq_std'] == pytest.approx(window['cpu_freq'].std())
+    assert steady_table.loc['warm_performance.trace', 'avg_cpu_usage'] == pytest.approx(50, abs=1)
+    # Detection figures keep the 'Main' values
+    assert steady_table['fps'].tolist() == run_table['fps'].tolist()
+    assert set(STEADY_STATE_COLUMNS) <= set(steady_table.columns)
@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from plots.throttling_timeline import plot_throttling_timeline
+from throttling import EPISODE_COLUMNS, RUN_COLUMNS, collect_episodes, load_throttling, run_throttling, \
+    throttling_table
+
+
+def test_collect_episodes_without_runs_keeps_columns():
+    runs_df, episodes_df = collect_episodes([])
+
+    assert runs_df.empty and list(runs_df.columns) == RUN_COLUMNS
+    assert episodes_df.empty and list(episodes_df.columns) == EPISODE_COLUMNS
+
+
+def test_empty_data_directory(tmp_path):
+    runs_df, episodes_df = load_throttling(str(tmp_path), max_workers=1)
+
+    assert throttling_table(runs_df, episodes_df).empty
+    assert plot_throttling_timeline(runs_df, episodes_df, output_dir=str(tmp_path / 'charts')) == []
+
+
+def _throttled_run(elapsed_ms, throttled):
+    return {
+        'Main': {'cpu': 'cpu', 'model': 'model', 'fps': 10.0},
+        'Resource Usages': pd.DataFrame({
+            'elapsed_time': elapsed_ms,
+            'cpu_freq': np.where(throttled, 3000.0, 4000.0),
+            'cpu_package_temp': np.where(throttled, 95.0, 70.0),
+            'cpu_package_power': np.full(len(elapsed_ms), 30.0)
+        })
+    }
+
+
+def test_frames_lost_over_a_trace_recorded_in_milliseconds():
+    # 60 s sampled every 500 ms, the frequency dropping by a quarter at peak temperature from 20 s to 40 s
+    elapsed_ms = np.arange(0, 60_000, 500.0)
+    run, episodes = run_throttling(_throttled_run(elapsed_ms, (elapsed_ms >= 20_000) & (elapsed_ms < 40_000)))
+
+    assert len(episodes) == 1
+    episode = episodes.iloc[0]
+    assert episode['duration'] == pytest.approx(20_000, rel=0.05)
+    # 20 s at a quarter of the nominal FPS lost
+    assert episode['frames_lost'] == pytest.approx(run['nominal_fps'] * 0.25 * 20, rel=0.05)
+
+
+def test_episodes_lie_within_a_run_recorded_from_a_later_start(tmp_path):
+    # Elapsed time counted from the start of the session, the run recorded from 100 s to 160 s
+    elapsed_ms = np.arange(100_000, 160_000, 500.0)
+    result = run_throttling(_throttled_run(elapsed_ms, (elapsed_ms >= 120_000) & (elapsed_ms < 140_000)))
+    runs_df, episodes_df = collect_episodes([('run_performance.trace', result)])
+
+    run = runs_df.iloc[0]
+    assert run['start'] == 100_000 and run['duration'] == 59_500
+    assert len(episodes_df) == 1
+    assert run['start'] <= episodes_df['start'].min() and episodes_df['end'].max() <= run['start'] + run['duration']
+    assert plot_throttling_timeline(runs_df, episodes_df, output_dir=str(tmp_path), formats=('png',)) == [
+        str(tmp_path / 'throttling_timeline_cpu.png')]
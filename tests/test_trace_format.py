@@ -0,0 +1,75 @@
+import os
+
+import numpy as np
+import pytest
+
+from extract_data import extract_performance_data, find_performance_files
+from trace_format import TraceWriter, open_trace, read_header, read_trace, update_main
+
+
+def test_runs_round_trip_through_a_trace(tmp_path, performance_run, write_run):
+    run = performance_run(samples=50)
+    path = write_run(tmp_path, 'run', run)
+
+    data = extract_performance_data(path)
+
+    assert data['Main'] == run['Main']
+    for sheet_name in ['Resource Usages', 'Power Usages']:
+        assert list(data[sheet_name].columns) == list(run[sheet_name].columns)
+        # Usage columns are stored as float32
+        np.testing.assert_allclose(data[sheet_name], run[sheet_name], rtol=1e-6)
+
+
+def test_read_a_time_slice_of_some_columns(tmp_path, write_run):
+    path = write_run(tmp_path, 'run', samples=50)
+
+    data = read_trace(path, ['Power Usages'], {'Power Usages': ['elapsed_time']}, start=1_000, end=3_000)
+
+    assert list(data) == ['Power Usages']
+    assert data['Power Usages']['elapsed_time'].tolist() == [1_000, 1_500, 2_000, 2_500, 3_000]
+
+
+def test_writer_appends_and_drops_a_torn_record(tmp_path):
+    path = str(tmp_path / 'live_performance.trace')
+    with TraceWriter(path, {'model': 'yolov8s', 'fps': np.float32(12.5)}) as writer:
+        writer.append({'elapsed_time': [0.0, 500.0], 'cpu_usage': [40.0, 50.0]})
+        writer.append({'elapsed_time': [250.0], 'power_watt': [60.0]})
+    # A recorder killed halfway through a record
+    with open(path, 'ab') as f:
+        f.write(b'\1' * 7)
+
+    assert len(open_trace(path)[1]) == 3
+    data = read_trace(path)
+    assert data['Main'] == {'model': 'yolov8s', 'fps': 12.5}
+    assert data['Resource Usages']['cpu_usage'].tolist() == [40.0, 50.0]
+    assert data['Power Usages']['elapsed_time'].tolist() == [250.0]
+
+    # Reopening truncates the torn record before appending after the full ones
+    with TraceWriter(path) as writer:
+        writer.append({'elapsed_time': [1_000.0], 'cpu_usage': [45.0]})
+    assert read_trace(path)['Resource Usages']['cpu_usage'].tolist() == [40.0, 50.0, 45.0]
+
+    update_main(path, {'model': 'yolov8s', 'fps': 11.0, 'avg_cpu_usage': 45.0})
+    assert read_header(path)['main']['avg_cpu_usage'] == 45.0
+    assert len(open_trace(path)[1]) == 4
+
+
+def test_other_files_are_rejected(tmp_path):
+    path = tmp_path / 'run_performance.trace'
+    path.write_bytes(b'PK\3\4' + b'\0' * 100)
+
+    with pytest.raises(ValueError, match='not a trace file'):
+        read_header(str(path))
+
+
+def test_traces_replace_the_workbooks_they_were_converted_from(tmp_path, write_run):
+    for name in ['converted', 'stale', 'workbook_only']:
+        (tmp_path / f'{name}_performance.xlsx').write_bytes(b'')
+    write_run(tmp_path, 'converted')
+    stale = write_run(tmp_path, 'stale')
+    os.utime(stale, (0, 0))
+    write_run(tmp_path, 'recording')
+
+    assert sorted(os.path.basename(path) for path in find_performance_files(str(tmp_path))) == [
+        'converted_performance.trace', 'recording_performance.trace', 'stale_performance.xlsx',
+        'workbook_only_performance.xlsx']
@@ -0,0 +1,48 @@
+import os
+
+import numpy as np
+import pytest
+
+from warehouse import ingest, load_results, load_run_table, query
+
+
+def test_ingest_keeps_the_warehouse_in_step_with_the_directory(tmp_path, write_run):
+    data_dir = tmp_path / 'data'
+    data_dir.mkdir()
+    database = str(tmp_path / 'warehouse.sqlite')
+    write_run(data_dir, 'run0', cpu='cpu a', model='yolov8s')
+    write_run(data_dir, 'run1', cpu='cpu b', model='yolov8s', samples=140)
+
+    assert ingest(str(data_dir), database, max_workers=1) == (2, 0, 0)
+    assert ingest(str(data_dir), database, max_workers=1) == (0, 0, 0)
+
+    write_run(data_dir, 'run1', cpu='cpu b', model='yolov8s', samples=160, fps=10.0)
+    os.remove(data_dir / 'run0_performance.trace')
+    assert ingest(str(data_dir), database, max_workers=1) == (0, 1, 1)
+
+    run_table = load_run_table(database)
+    assert run_table['file'].tolist() == ['run1_performance.trace']
+    assert run_table['fps'].tolist() == [10.0]
+    # The samples of replaced and removed runs are deleted with them
+    assert query('SELECT COUNT(*) AS samples FROM resource_usages', database=database)['samples'][0] == 160
+
+
+def test_results_round_trip_the_runs(tmp_path, performance_run, write_run):
+    database = str(tmp_path / 'warehouse.sqlite')
+    runs = {'run0': performance_run('cpu a', 'yolov8s'), 'run1': performance_run('cpu b', 'yolov8s', samples=140),
+            'run2': performance_run('cpu b', 'efficientdet_lite1', samples=100)}
+    for name, run in runs.items():
+        write_run(tmp_path, name, run)
+    ingest(str(tmp_path), database, max_workers=1)
+
+    results = dict(load_results('performance', ['Main', 'Power Usages'], database, cpu='cpu b'))
+
+    assert sorted(map(os.path.basename, results)) == ['run1_performance.trace', 'run2_performance.trace']
+    for path, data in results.items():
+        run = runs[os.path.basename(path).split('_')[0]]
+        assert data['Main']['model'] == run['Main']['model']
+        assert data['Main']['fps'] == pytest.approx(run['Main']['fps'])
+        np.testing.assert_allclose(data['Power Usages']['power_watt'], run['Power Usages']['power_watt'], rtol=1e-6)
+    assert load_run_table(database, model='efficientdet_lite1')['cpu'].tolist() == ['cpu b']
+    assert load_results('accuracy', ['Main', 'Detections'], database) == []
+    assert load_run_table(database, since='2030-01-01').empty
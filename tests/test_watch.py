@@ -0,0 +1,79 @@
+import os
+
+import pandas as pd
+
+from render_all import ReportData
+from watch import IncrementalReport
+
+CPU_A = 'Intel(R) Core(TM) i5-4200H CPU @ 2.80GHz'
+CPU_B = 'AMD Ryzen 5 5600 6-Core Processor'
+
+
+def _chart_files(output_dir):
+    return sorted(os.path.relpath(os.path.join(root, name), output_dir)
+                  for root, _, names in os.walk(output_dir) for name in names)
+
+
+def test_update_renders_only_the_charts_of_changed_cpus(tmp_path, write_run):
+    data_dir = tmp_path / 'data'
+    data_dir.mkdir()
+    output_dir = str(tmp_path / 'charts')
+    write_run(data_dir, 'run0', cpu=CPU_A, model='yolov8s')
+    write_run(data_dir, 'run1', cpu=CPU_A, model='yolov8s', samples=140)
+    write_run(data_dir, 'run2', cpu=CPU_B, model='yolov8s', samples=160)
+
+    report = IncrementalReport(str(data_dir), output_dir, groups=['power', 'throttling'], max_workers=1,
+                               min_age=0)
+    assert len(report.update()) == 4
+    assert _chart_files(output_dir) == [
+        os.path.join('power', f'{CPU_B}_power_usage_plot.png'),
+        os.path.join('power', f'{CPU_A}_power_usage_plot.png'),
+        os.path.join('throttling', 'throttling_timeline_PC1.png'),
+        os.path.join('throttling', 'throttling_timeline_PC3.png')
+    ]
+
+    # A changed run of cpu A only re-renders the charts of cpu A
+    write_run(data_dir, 'run0', cpu=CPU_A, model='yolov8s', samples=180)
+    written_files = report.update()
+    assert sorted(os.path.relpath(file_path, output_dir) for file_path in written_files) == [
+        os.path.join('power', f'{CPU_A}_power_usage_plot.png'),
+        os.path.join('throttling', 'throttling_timeline_PC1.png')
+    ]
+
+    # Nothing changed, nothing rendered
+    assert report.update() == []
+
+    # The charts of a cpu whose last run is removed are deleted
+    os.remove(data_dir / 'run2_performance.trace')
+    assert report.update() == []
+    assert _chart_files(output_dir) == [
+        os.path.join('power', f'{CPU_A}_power_usage_plot.png'),
+        os.path.join('throttling', 'throttling_timeline_PC1.png')
+    ]
+
+
+def test_patched_parts_match_a_fresh_load(tmp_path, write_run):
+    write_run(tmp_path, 'run0', cpu=CPU_A, model='yolov8s')
+    write_run(tmp_path, 'run1', cpu=CPU_A, model='efficientdet_lite1', samples=140)
+    write_run(tmp_path, 'run2', cpu=CPU_B, model='yolov8s', samples=160)
+    data = ReportData(str(tmp_path), max_workers=1)
+    # Load the parts apply_changes patches rather than rebuilds
+    data.run_table, data.cube, data.run_energy
+
+    write_run(tmp_path, 'run1', cpu=CPU_A, model='efficientdet_lite1', samples=200, fps=10.0)
+    write_run(tmp_path, 'run3', cpu=CPU_B, model='efficientdet_lite1')
+    os.remove(tmp_path / 'run2_performance.trace')
+    changed = [str(tmp_path / f'{name}_performance.trace') for name in ['run1', 'run3']]
+    results = [(file_path, run) for file_path, run in ReportData(str(tmp_path), max_workers=1).performance_results
+               if file_path in changed]
+    keys = data.apply_changes('performance', results, [str(tmp_path / 'run2_performance.trace')])
+
+    assert keys == {(CPU_A, 'efficientdet_lite1'), (CPU_B, 'efficientdet_lite1'), (CPU_B, 'yolov8s')}
+
+    fresh = ReportData(str(tmp_path), max_workers=1)
+    pd.testing.assert_frame_equal(data.run_table.sort_values('path', ignore_index=True),
+                                  fresh.run_table.sort_values('path', ignore_index=True))
+    pd.testing.assert_frame_equal(data.run_energy.sort_index(), fresh.run_energy.sort_index())
+    cells = ['model', 'cpu', 'date']
+    pd.testing.assert_frame_equal(data.cube.sort_values(cells, ignore_index=True),
+                                  fresh.cube.sort_values(cells, ignore_index=True))
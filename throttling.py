@@ -0,0 +1,210 @@
+import argparse
+import os
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+from extract_data import SECONDS_PER_TIME_UNIT, extract_performance_data, extract_files_parallel, \
+    find_performance_files, report_failures
+from performance_catalog import CPU_SHORT_NAMES, MODEL_SHORT_NAMES
+
+EPISODE_COLUMNS = ['file', 'cpu', 'cpu_short_name', 'model', 'model_short_name', 'start', 'end', 'duration',
+                   'frequency_drop', 'mean_temp', 'mean_package_power', 'frames_lost', 'path']
+
+RUN_COLUMNS = ['file', 'cpu', 'cpu_short_name', 'model', 'model_short_name', 'path', 'start', 'duration',
+               'nominal_fps', 'episodes']
+
+THROTTLING_TABLE_COLUMNS = ['cpu_short_name', 'model_short_name', 'runs', 'throttled_runs', 'episodes',
+                            'throttled_time', 'throttled_fraction', 'mean_frequency_drop', 'nominal_fps',
+                            'fps_lost', 'fps_lost_percent']
+
+
+def _rolling_mean(values, window):
+    # Centered mean of `window` samples, the edges average what is available
+    cumulative = np.concatenate([[0.0], np.cumsum(values)])
+    half = window // 2
+    upper = np.minimum(np.arange(len(values)) + window - half, len(values))
+    lower = np.maximum(np.arange(len(values)) - half, 0)
+    return (cumulative[upper] - cumulative[lower]) / (upper - lower)
+
+
+def _runs_of(mask):
+    # (first, last + 1) indices of every run of True values
+    edges = np.diff(np.concatenate([[0], mask.astype(np.int8), [0]]))
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+
+def find_throttling_episodes(resource_df, window_fraction=0.02, frequency_drop=0.1, temp_margin=5.0,
+                             power_margin=0.1, min_samples=3, time_column='elapsed_time'):
+    """
+    Throttling episodes of one 'Resource Usages' trace: stretches where the smoothed cpu_freq sits more than
+    `frequency_drop` below the run's sustained frequency (its 95th percentile) while the package temperature
+    is within temp_margin degrees of its peak or the package power within power_margin of its peak.
+    Returns (episodes, reference_frequency); episodes is a frame with start, end, duration, frequency_drop,
+    mean_temp and mean_package_power columns.
+    """
+    resource_df = resource_df.dropna(subset=[time_column, 'cpu_freq'])
+    if not resource_df[time_column].is_monotonic_increasing:
+        resource_df = resource_df.sort_values(time_column, kind='stable')
+
+    columns = ['start', 'end', 'duration', 'frequency_drop', 'mean_temp', 'mean_package_power']
+    if len(resource_df) < 2:
+        return pd.DataFrame(columns=columns), np.nan
+
+    times = resource_df[time_column].to_numpy(dtype=np.float64)
+    window = max(int(len(times) * window_fraction), 1)
+
+    def smoothed(column):
+        if column not in resource_df:
+            return np.full(len(times), np.nan)
+        values = resource_df[column].to_numpy(dtype=np.float64)
+        return _rolling_mean(np.where(np.isnan(values), np.nanmean(values), values), window)
+
+    frequency = smoothed('cpu_freq')
+    temp = smoothed('cpu_package_temp')
+    power = smoothed('cpu_package_power')
+
+    reference_frequency = np.percentile(frequency, 95)
+    with np.errstate(invalid='ignore'):
+        hot = temp >= np.nanmax(temp) - temp_margin if not np.all(np.isnan(temp)) else np.zeros(len(times), bool)
+        power_limited = power >= (1 - power_margin) * np.nanmax(power) if not np.all(np.isnan(power)) \
+            else np.zeros(len(times), bool)
+    throttled = (frequency < (1 - frequency_drop) * reference_frequency) & (hot | power_limited)
+
+    starts, stops = _runs_of(throttled)
+    keep = stops - starts >= min_samples
+    starts, stops = starts[keep], stops[keep]
+
+    # Per episode means from cumulative sums, one pass for all episodes
+    def episode_means(values):
+        cumulative = np.concatenate([[0.0], np.cumsum(np.nan_to_num(values))])
+        return (cumulative[stops] - cumulative[starts]) / (stops - starts)
+
+    # An episode lasts until the sample after its last throttled one (or the end of the run)
+    ends = times[np.minimum(stops, len(times) - 1)]
+    episodes = pd.DataFrame({
+        'start': times[starts],
+        'end': ends,
+        'duration': ends - times[starts],
+        'frequency_drop': 1 - episode_means(frequency) / reference_frequency,
+        'mean_temp': episode_means(temp),
+        'mean_package_power': episode_means(power)
+    }, columns=columns)
+    return episodes, reference_frequency
+
+
+def run_throttling(data, **detector_options):
+    """
+    Throttling episodes of one performance run plus the run level figures needed to estimate FPS lost.
+    Detection throughput is assumed to scale with CPU frequency, so the run would have reached
+    nominal_fps = fps * reference_frequency / mean frequency without throttling, and every episode loses
+    nominal_fps * frequency_drop frames per second of its duration.
+    """
+    resource_df = data['Resource Usages']
+    episodes, reference_frequency = find_throttling_episodes(resource_df, **detector_options)
+
+    fps = pd.to_numeric(data['Main'].get('fps'), errors='coerce')
+    mean_frequency = resource_df['cpu_freq'].mean()
+    nominal_fps = fps * reference_frequency / mean_frequency if mean_frequency else np.nan
+    episodes['frames_lost'] = nominal_fps * episodes['frequency_drop'] * episodes['duration'] * SECONDS_PER_TIME_UNIT
+
+    times = resource_df['elapsed_time']
+    run = {
+        'cpu': data['Main'].get('cpu'),
+        'model': data['Main'].get('model'),
+        'start': times.min(),
+        'duration': times.max() - times.min(),
+        'nominal_fps': nominal_fps
+    }
+    return run, episodes
+
+
+def throttling_file(file_path, **detector_options):
+    data = extract_performance_data(file_path, columns={
+        'Resource Usages': ['elapsed_time', 'cpu_freq', 'cpu_package_temp', 'cpu_package_power']})
+    return run_throttling(data, **detector_options)
+
+
+def collect_episodes(results):
+    """Runs and episodes of (file path, (run, episodes)) results as two frames, labelled with short names."""
+    runs = []
+    episode_frames = []
+    for file_path, (run, episodes) in results:
+        labels = {
+            'file': os.path.basename(file_path),
+            'cpu': run['cpu'],
+            'cpu_short_name': CPU_SHORT_NAMES.get(run['cpu'], run['cpu']),
+            'model': run['model'],
+            'model_short_name': MODEL_SHORT_NAMES.get(run['model'], run['model']),
+            'path': os.path.abspath(file_path)
+        }
+        runs.append({**labels, 'start': run['start'], 'duration': run['duration'],
+                     'nominal_fps': run['nominal_fps'], 'episodes': len(episodes)})
+        episode_frames.append(episodes.assign(**labels))
+
+    runs_df = pd.DataFrame(runs, columns=RUN_COLUMNS)
+    episodes_df = pd.concat(episode_frames, ignore_index=True) if episode_frames else pd.DataFrame()
+    return runs_df, episodes_df.reindex(columns=EPISODE_COLUMNS)
+
+
+def throttling_table(runs_df, episodes_df):
+    """One row per cpu x model with THROTTLING_TABLE_COLUMNS, worst FPS loss first."""
+    if runs_df.empty:
+        return pd.DataFrame(columns=THROTTLING_TABLE_COLUMNS)
+
+    keys = ['cpu_short_name', 'model_short_name']
+    episodes_df = episodes_df.assign(drop_time=episodes_df['frequency_drop'] * episodes_df['duration'])
+    per_run = episodes_df.groupby('path')[['duration', 'frames_lost', 'drop_time']].sum()
+    per_run = per_run.rename(columns={'duration': 'throttled_time'})
+
+    runs_df = runs_df.join(per_run, on='path')
+    runs_df[list(per_run)] = runs_df[list(per_run)].fillna(0)
+    runs_df['throttled'] = runs_df['episodes'] > 0
+    runs_df['nominal_frames'] = runs_df['nominal_fps'] * runs_df['duration'] * SECONDS_PER_TIME_UNIT
+
+    table = runs_df.groupby(keys).agg(
+        runs=('path', 'size'),
+        throttled_runs=('throttled', 'sum'),
+        episodes=('episodes', 'sum'),
+        throttled_time=('throttled_time', 'sum'),
+        duration=('duration', 'sum'),
+        drop_time=('drop_time', 'sum'),
+        nominal_fps=('nominal_fps', 'mean'),
+        nominal_frames=('nominal_frames', 'sum'),
+        frames_lost=('frames_lost', 'sum')
+    ).reset_index()
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        table['throttled_fraction'] = table['throttled_time'] / table['duration']
+        table['mean_frequency_drop'] = table['drop_time'] / table['throttled_time']
+        table['fps_lost_percent'] = table['frames_lost'] / table['nominal_frames'] * 100
+    table['fps_lost'] = table['nominal_fps'] * table['fps_lost_percent'] / 100
+
+    table = table.sort_values('fps_lost_percent', ascending=False, ignore_index=True)
+    return table[THROTTLING_TABLE_COLUMNS]
+
+
+def load_throttling(data_directory, max_workers=None, **detector_options):
+    performance_files = find_performance_files(data_directory)
+    results, failures = extract_files_parallel(performance_files, partial(throttling_file, **detector_options),
+                                               max_workers)
+    report_failures(failures)
+    return collect_episodes(results)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Detect thermal throttling episodes per CPU and model')
+    parser.add_argument('--data-dir', default='data')
+    parser.add_argument('--output', default=None, help='CSV file for the throttling table')
+    parser.add_argument('--episodes-output', default=None, help='CSV file for the individual episodes')
+    args = parser.parse_args()
+
+    runs_df, episodes_df = load_throttling(args.data_dir)
+    table = throttling_table(runs_df, episodes_df)
+    print(table.to_string(index=False))
+
+    if args.output:
+        table.to_csv(args.output, index=False)
+    if args.episodes_output:
+        episodes_df.to_csv(args.episodes_output, index=False)
@@ -0,0 +1,194 @@
+import json
+import os
+import struct
+
+import numpy as np
+import pandas as pd
+
+# A trace is a small header followed by fixed-width little-endian records, one per sample, in time order:
+#   magic (8 bytes) | version (uint32) | header size (uint32) | JSON length (uint32) | JSON | zero padding
+# The JSON holds the record columns and the run's 'Main' data. Records are only ever appended, so a recorder
+# can write them while the run is in progress and readers memory-map whatever full records exist so far.
+TRACE_SUFFIX = '_performance.trace'
+MAGIC = b'WORTRACE'
+VERSION = 1
+HEADER_SIZE = 4096
+_PREAMBLE = struct.Struct('<8sIII')
+
+TRACE_COLUMNS = [
+    ('elapsed_time', '<f8'),
+    ('cpu_usage', '<f4'),
+    ('cpu_freq', '<f4'),
+    ('cpu_package_power', '<f4'),
+    ('cpu_package_temp', '<f4'),
+    ('memory_mb', '<f4'),
+    ('power_watt', '<f4')
+]
+
+# Sheet -> its columns. Both sheets share the records: a record belongs to a sheet when any of the sheet's
+# columns other than elapsed_time is set, the others are NaN
+SHEET_COLUMNS = {
+    'Resource Usages': ['elapsed_time', 'cpu_usage', 'cpu_freq', 'cpu_package_power', 'cpu_package_temp',
+                        'memory_mb'],
+    'Power Usages': ['elapsed_time', 'power_watt']
+}
+
+
+def _json_value(value):
+    return value.item() if isinstance(value, np.generic) else str(value)
+
+
+def _encode_header(main, columns, header_size):
+    payload = json.dumps({'columns': columns, 'main': main}, default=_json_value).encode('utf-8')
+    if _PREAMBLE.size + len(payload) > header_size:
+        raise ValueError(f'Trace header needs {_PREAMBLE.size + len(payload)} bytes, only {header_size} reserved')
+    header = _PREAMBLE.pack(MAGIC, VERSION, header_size, len(payload)) + payload
+    return header.ljust(header_size, b'\0')
+
+
+def read_header(path):
+    """The header of a trace file: {'version', 'header_size', 'dtype' (of its records), 'main'}."""
+    with open(path, 'rb') as f:
+        magic, version, header_size, payload_size = _PREAMBLE.unpack(f.read(_PREAMBLE.size))
+        if magic != MAGIC:
+            raise ValueError(f'{path} is not a trace file')
+        if version > VERSION:
+            raise ValueError(f'{path} has trace format version {version}, this reader knows up to {VERSION}')
+        payload = json.loads(f.read(payload_size).decode('utf-8'))
+
+    return {
+        'version': version,
+        'header_size': header_size,
+        'dtype': np.dtype([tuple(column) for column in payload['columns']]),
+        'main': payload['main']
+    }
+
+
+def update_main(path, main):
+    """Rewrite the 'Main' data of a trace in place, e.g. with the run's averages once it is finished."""
+    header = read_header(path)
+    columns = [[name, header['dtype'][name].str] for name in header['dtype'].names]
+    with open(path, 'r+b') as f:
+        f.write(_encode_header(main, columns, header['header_size']))
+
+
+def _record_count(path, header):
+    return (os.path.getsize(path) - header['header_size']) // header['dtype'].itemsize
+
+
+def open_trace(path):
+    """
+    (header, records) of a trace file, records being a read-only numpy.memmap of its full records: slicing it
+    (see time_slice) or taking a column (records['cpu_usage']) reads nothing until the values are used.
+    """
+    header = read_header(path)
+    count = _record_count(path, header)
+    if count == 0:
+        return header, np.empty(0, dtype=header['dtype'])
+    return header, np.memmap(path, dtype=header['dtype'], mode='r', offset=header['header_size'], shape=(count,))
+
+
+def time_slice(records, start=None, end=None, time_column='elapsed_time'):
+    """The records with start <= time <= end, as a view of records (no copy)."""
+    times = records[time_column]
+    first = 0 if start is None else np.searchsorted(times, start, side='left')
+    last = len(records) if end is None else np.searchsorted(times, end, side='right')
+    return records[first:last]
+
+
+def trace_sheets(records, sheets=None, columns=None):
+    """
+    Split records into their sheets (by default both of SHEET_COLUMNS) as frames, in the layout
+    extract_performance_data returns. columns maps a sheet name to the columns to keep from it.
+    """
+    if columns is None:
+        columns = {}
+
+    frames = {}
+    for sheet_name in SHEET_COLUMNS if sheets is None else sheets:
+        values = [column for column in SHEET_COLUMNS[sheet_name] if column != 'elapsed_time']
+        sampled = np.zeros(len(records), dtype=bool)
+        for column in values:
+            sampled |= ~np.isnan(records[column])
+        frames[sheet_name] = pd.DataFrame({column: records[column][sampled]
+                                           for column in columns.get(sheet_name, SHEET_COLUMNS[sheet_name])})
+    return frames
+
+
+def read_trace(path, sheets=None, columns=None, start=None, end=None):
+    """
+    The run stored in a trace file as {sheet name: data}, like extract_performance_data: 'Main' from the header,
+    the usage sheets from the records between start and end (whole run by default).
+    """
+    sheets = list(sheets or ['Main'] + list(SHEET_COLUMNS))
+    header, records = open_trace(path)
+    data = trace_sheets(time_slice(records, start, end), [sheet for sheet in sheets if sheet != 'Main'], columns)
+    data['Main'] = dict(header['main'])
+    return {sheet_name: data[sheet_name] for sheet_name in sheets}
+
+
+class TraceWriter:
+    """
+    Append samples to a trace file, creating it with main in its header when it does not exist yet.
+    A record cut short by a crash while writing is dropped when the file is opened again.
+
+        with TraceWriter('run_performance.trace', {'model': 'yolov8s', 'cpu': cpu}) as writer:
+            writer.append({'elapsed_time': [0.5], 'power_watt': [41.2]})
+    """
+
+    def __init__(self, path, main=None, header_size=HEADER_SIZE):
+        if not os.path.exists(path):
+            with open(path, 'wb') as f:
+                f.write(_encode_header(main or {}, [list(column) for column in TRACE_COLUMNS], header_size))
+
+        header = read_header(path)
+        self.path = path
+        self.dtype = header['dtype']
+        self._file = open(path, 'r+b')
+        self._file.truncate(header['header_size'] + _record_count(path, header) * self.dtype.itemsize)
+        self._file.seek(0, os.SEEK_END)
+
+    def append(self, samples):
+        """
+        Append samples, a frame or a {column: values} dict of equal length columns, in time order.
+        Columns left out (e.g. the resource columns of power samples) are stored as NaN.
+        """
+        lengths = {len(values) for values in (samples[column] for column in samples) if np.ndim(values)}
+        if len(lengths) > 1:
+            raise ValueError(f'Columns of different lengths {sorted(lengths)}')
+        records = np.empty(lengths.pop() if lengths else 1, dtype=self.dtype)
+        for column in self.dtype.names:
+            records[column] = np.asarray(samples[column]) if column in samples else np.nan
+        self._file.write(records.tobytes())
+        self._file.flush()
+        return len(records)
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def write_trace(path, data, header_size=HEADER_SIZE):
+    """
+    Write one run, {sheet name: data} as returned by extract_performance_data, to a new trace file.
+    The samples of both sheets are interleaved in time order; the file is replaced atomically.
+    """
+    samples = [data[sheet_name].reindex(columns=columns) for sheet_name, columns in SHEET_COLUMNS.items()
+               if sheet_name in data]
+    samples = pd.concat(samples, ignore_index=True) if samples else pd.DataFrame(columns=['elapsed_time'])
+    samples = samples.sort_values('elapsed_time', kind='stable')
+
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    try:
+        with TraceWriter(tmp_path, data.get('Main'), header_size) as writer:
+            writer.append({column: samples[column].to_numpy() for column in samples})
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return path
@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+
+DEFAULT_FACTOR = 4
+DEFAULT_MAX_POINTS = 2000
+
+
+class TracePyramid:
+    """
+    Min/max/mean decimation pyramid of one trace (e.g. a 'Power Usages' or 'Resource Usages' sheet).
+    Level 0 holds the samples, every next level merges `factor` consecutive buckets of the previous one,
+    keeping their time span, minimum, maximum, sum and count, so spikes survive at every resolution.
+    Building costs O(n) and the whole pyramid about 1 / (factor - 1) more than the trace itself.
+    """
+
+    def __init__(self, df, metrics, time_column='elapsed_time', factor=DEFAULT_FACTOR):
+        df = df.dropna(subset=[time_column])
+        if not df[time_column].is_monotonic_increasing:
+            df = df.sort_values(time_column, kind='stable')
+
+        self.metrics = list(metrics)
+        self.time_column = time_column
+        self.factor = factor
+
+        times = df[time_column].to_numpy(dtype=np.float64)
+        level = {'start': times, 'end': times, 'count': np.ones(len(times), dtype=np.int64)}
+        for metric in self.metrics:
+            values = df[metric].to_numpy(dtype=np.float64)
+            level[f'{metric}_min'] = values
+            level[f'{metric}_max'] = values
+            level[f'{metric}_sum'] = np.nan_to_num(values)
+            level[f'{metric}_count'] = (~np.isnan(values)).astype(np.int64)
+        self.levels = [level]
+
+        while len(self.levels[-1]['start']) > 1:
+            self.levels.append(self._reduce(self.levels[-1]))
+
+    def _reduce(self, level):
+        boundaries = np.arange(0, len(level['start']), self.factor)
+        last = np.minimum(boundaries + self.factor, len(level['start'])) - 1
+        reduced = {
+            'start': level['start'][boundaries],
+            'end': level['end'][last],
+            'count': np.add.reduceat(level['count'], boundaries)
+        }
+        for metric in self.metrics:
+            reduced[f'{metric}_min'] = np.fmin.reduceat(level[f'{metric}_min'], boundaries)
+            reduced[f'{metric}_max'] = np.fmax.reduceat(level[f'{metric}_max'], boundaries)
+            reduced[f'{metric}_sum'] = np.add.reduceat(level[f'{metric}_sum'], boundaries)
+            reduced[f'{metric}_count'] = np.add.reduceat(level[f'{metric}_count'], boundaries)
+        return reduced
+
+    def __len__(self):
+        return len(self.levels[0]['start'])
+
+    def query(self, metric, start=None, end=None, max_points=DEFAULT_MAX_POINTS):
+        """
+        The trace between start and end (whole trace by default) at the finest level with at most max_points
+        buckets in that range. Returns a frame with time (bucket middle), min, max and mean columns; on the
+        sample level all three equal the sample.
+        """
+        for level in self.levels:
+            first = 0 if start is None else np.searchsorted(level['end'], start, side='left')
+            last = len(level['start']) if end is None else np.searchsorted(level['start'], end, side='right')
+            if last - first <= max_points:
+                break
+
+        window = slice(first, last)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = level[f'{metric}_sum'][window] / level[f'{metric}_count'][window]
+        return pd.DataFrame({
+            self.time_column: (level['start'][window] + level['end'][window]) / 2,
+            'min': level[f'{metric}_min'][window],
+            'max': level[f'{metric}_max'][window],
+            'mean': mean
+        })
+
+
+def plot_envelope(ax, decimated, label=None, color=None, time_column='elapsed_time'):
+    """
+    Draw a TracePyramid.query result: its mean as a line and, where buckets hold several samples,
+    the min-max range as a band around it so that spikes stay visible.
+    """
+    line, = ax.plot(decimated[time_column], decimated['mean'], label=label, color=color)
+    if (decimated['max'] > decimated['min']).any():
+        ax.fill_between(decimated[time_column], decimated['min'], decimated['max'], color=line.get_color(),
+                        alpha=0.25, linewidth=0)
+    return line
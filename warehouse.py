@@ -0,0 +1,257 @@
+import argparse
+import os
+import sqlite3
+from functools import partial
+
+import pandas as pd
+
+from compact_data import downcast
+from extract_data import CACHE_DIR, extract_accuracy_data, extract_performance_data, extract_files_parallel, \
+    find_files_by_extension, find_performance_files, report_failures
+from performance_catalog import CPU_SHORT_NAMES, METRIC_FIELDS, MODEL_SHORT_NAMES
+
+DEFAULT_DATABASE = os.environ.get('WAREHOUSE_DATABASE', os.path.join(os.path.dirname(CACHE_DIR), 'warehouse.sqlite'))
+
+# Run kind -> (function finding its files in a directory, extract function)
+RUN_KINDS = {
+    'performance': (find_performance_files, extract_performance_data),
+    'accuracy': (partial(find_files_by_extension, file_extension='_accuracy.xlsx'), extract_accuracy_data)
+}
+
+# Sheet -> (table, columns kept from the sheet)
+SHEET_TABLES = {
+    'Detections': ('detections', ['time', 'is_correct', 'score']),
+    'Resource Usages': ('resource_usages', ['elapsed_time', 'cpu_usage', 'cpu_freq', 'cpu_package_power',
+                                            'cpu_package_temp', 'memory_mb']),
+    'Power Usages': ('power_usages', ['elapsed_time', 'power_watt'])
+}
+
+RUN_COLUMNS = ['path', 'file', 'kind', 'date', 'cpu', 'cpu_short_name', 'model', 'model_short_name', 'mtime_ns',
+               'size']
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    file TEXT, kind TEXT, date TEXT, cpu TEXT, cpu_short_name TEXT, model TEXT, model_short_name TEXT,
+    mtime_ns INTEGER, size INTEGER
+);
+CREATE INDEX IF NOT EXISTS runs_model_cpu ON runs (model, cpu);
+CREATE INDEX IF NOT EXISTS runs_date ON runs (date);
+
+CREATE TABLE IF NOT EXISTS main (
+    run_id INTEGER PRIMARY KEY REFERENCES runs (run_id) ON DELETE CASCADE,
+    {', '.join(f'{column} REAL' for column in METRIC_FIELDS)}
+);
+
+CREATE TABLE IF NOT EXISTS detections (
+    run_id INTEGER NOT NULL REFERENCES runs (run_id) ON DELETE CASCADE,
+    detection_index INTEGER, time REAL, is_correct INTEGER, score REAL
+);
+CREATE INDEX IF NOT EXISTS detections_run ON detections (run_id, detection_index);
+
+CREATE TABLE IF NOT EXISTS resource_usages (
+    run_id INTEGER NOT NULL REFERENCES runs (run_id) ON DELETE CASCADE,
+    elapsed_time REAL, cpu_usage REAL, cpu_freq REAL, cpu_package_power REAL, cpu_package_temp REAL,
+    memory_mb REAL
+);
+CREATE INDEX IF NOT EXISTS resource_usages_run ON resource_usages (run_id, elapsed_time);
+
+CREATE TABLE IF NOT EXISTS power_usages (
+    run_id INTEGER NOT NULL REFERENCES runs (run_id) ON DELETE CASCADE,
+    elapsed_time REAL, power_watt REAL
+);
+CREATE INDEX IF NOT EXISTS power_usages_run ON power_usages (run_id, elapsed_time);
+"""
+
+
+def connect(database=DEFAULT_DATABASE):
+    os.makedirs(os.path.dirname(os.path.abspath(database)), exist_ok=True)
+    connection = sqlite3.connect(database)
+    connection.execute('PRAGMA foreign_keys = ON')
+    connection.executescript(_SCHEMA)
+    return connection
+
+
+def _text(value):
+    return None if pd.isna(value) else str(value)
+
+
+def _insert_run(connection, path, kind, state, data):
+    main_data = data['Main']
+    cpu, model = _text(main_data.get('cpu')), _text(main_data.get('model'))
+    run = [path, os.path.basename(path), kind, _text(main_data.get('date')), cpu, CPU_SHORT_NAMES.get(cpu), model,
+           MODEL_SHORT_NAMES.get(model), *state]
+    run_id = connection.execute(
+        f'INSERT INTO runs ({", ".join(RUN_COLUMNS)}) VALUES ({", ".join("?" * len(RUN_COLUMNS))})', run).lastrowid
+
+    if kind == 'performance':
+        metrics = [pd.to_numeric(main_data.get(key), errors='coerce') for key in METRIC_FIELDS.values()]
+        connection.execute(f'INSERT INTO main (run_id, {", ".join(METRIC_FIELDS)}) '
+                           f'VALUES (?, {", ".join("?" * len(METRIC_FIELDS))})',
+                           [run_id] + [None if pd.isna(metric) else float(metric) for metric in metrics])
+
+    for sheet_name, (table, columns) in SHEET_TABLES.items():
+        if sheet_name not in data:
+            continue
+        sheet = data[sheet_name].reindex(columns=columns)
+        if table == 'detections':
+            sheet.insert(0, 'detection_index', range(len(sheet)))
+        sheet.insert(0, 'run_id', run_id)
+        sheet.to_sql(table, connection, if_exists='append', index=False, chunksize=50000)
+
+
+def ingest(data_directory, database=DEFAULT_DATABASE, prune=True, max_workers=None):
+    """
+    Load every performance run (workbook or trace) and _accuracy.xlsx file of data_directory into the database.
+    Files already ingested with the same (mtime, size) are skipped, changed files are replaced and, with prune,
+    runs whose file disappeared are deleted. Returns (added, replaced, removed) file counts.
+    """
+    connection = connect(database)
+    known = {path: (run_id, (mtime_ns, size)) for run_id, path, mtime_ns, size in
+             connection.execute('SELECT run_id, path, mtime_ns, size FROM runs')}
+
+    added = replaced = 0
+    seen = set()
+    try:
+        for kind, (find_files, extract_func) in RUN_KINDS.items():
+            paths = [os.path.abspath(file) for file in find_files(data_directory)]
+            seen.update(paths)
+            states = {}
+            for path in paths:
+                stat = os.stat(path)
+                states[path] = (stat.st_mtime_ns, stat.st_size)
+            new_paths = [path for path in paths if path not in known or known[path][1] != states[path]]
+
+            columns = {sheet_name: columns for sheet_name, (table, columns) in SHEET_TABLES.items()}
+            results, failures = extract_files_parallel(
+                new_paths, partial(_extract_known_columns, extract_func, columns), max_workers)
+            report_failures(failures)
+
+            for path, data in results:
+                with connection:
+                    if path in known:
+                        connection.execute('DELETE FROM runs WHERE run_id = ?', (known[path][0],))
+                        replaced += 1
+                    else:
+                        added += 1
+                    _insert_run(connection, path, kind, states[path], data)
+
+        removed = 0
+        if prune:
+            gone = [(run_id,) for path, (run_id, state) in known.items()
+                    if path not in seen and path.startswith(os.path.abspath(data_directory) + os.sep)]
+            with connection:
+                connection.executemany('DELETE FROM runs WHERE run_id = ?', gone)
+            removed = len(gone)
+    finally:
+        connection.close()
+
+    return added, replaced, removed
+
+
+def _extract_known_columns(extract_func, columns, file_path):
+    # Only keep the columns the warehouse stores, sheets missing some of them are padded with NULLs
+    data = extract_func(file_path)
+    return {sheet_name: sheet if sheet_name == 'Main' else sheet.reindex(columns=columns[sheet_name])
+            for sheet_name, sheet in data.items()}
+
+
+def query(sql, params=(), database=DEFAULT_DATABASE):
+    """Run any SELECT against the warehouse and return its result as a frame."""
+    connection = connect(database)
+    try:
+        return pd.read_sql_query(sql, connection, params=params)
+    finally:
+        connection.close()
+
+
+def _run_filter(model=None, cpu=None, since=None, until=None):
+    conditions, params = [], []
+    for column, operator, value in [('model', '=', model), ('cpu', '=', cpu), ('date', '>=', since),
+                                    ('date', '<', until)]:
+        if value is not None:
+            conditions.append(f'runs.{column} {operator} ?')
+            params.append(str(value))
+    return ''.join(f' AND {condition}' for condition in conditions), params
+
+
+def load_run_table(database=DEFAULT_DATABASE, **filters):
+    """
+    The performance run table (columns performance_catalog.RUN_TABLE_COLUMNS) from the warehouse,
+    optionally filtered by model, cpu and a [since, until) date range.
+    """
+    where, params = _run_filter(**filters)
+    return query(f"""
+        SELECT runs.date, runs.cpu, runs.cpu_short_name, runs.model, runs.model_short_name,
+               {', '.join(f'main.{column}' for column in METRIC_FIELDS)}, runs.file, runs.path
+        FROM runs JOIN main USING (run_id)
+        WHERE runs.kind = 'performance'{where}
+        ORDER BY runs.run_id""", params, database)
+
+
+def load_sheet(sheet_name, database=DEFAULT_DATABASE, **filters):
+    """All rows of one sheet ('Detections', 'Resource Usages' or 'Power Usages') with their run's labels."""
+    table, columns = SHEET_TABLES[sheet_name]
+    where, params = _run_filter(**filters)
+    order = 'detection_index' if table == 'detections' else 'elapsed_time'
+    return query(f"""
+        SELECT runs.path, runs.date, runs.cpu, runs.cpu_short_name, runs.model, runs.model_short_name,
+               {', '.join(f'{table}.{column}' for column in columns)}
+        FROM {table} JOIN runs USING (run_id)
+        WHERE 1 = 1{where}
+        ORDER BY runs.run_id, {table}.{order}""", params, database)
+
+
+def load_results(kind, sheets, database=DEFAULT_DATABASE, **filters):
+    """
+    Runs of one kind ('performance' or 'accuracy') as (path, {sheet name: data}) pairs, the shape returned by
+    extract_files_parallel, so the plot scripts' grouping functions work on warehouse data unchanged.
+    'Main' holds the run's labels (and metrics for performance runs).
+    """
+    where, params = _run_filter(**filters)
+    runs = query(f"""
+        SELECT runs.path, runs.date, runs.cpu, runs.model{''.join(f', main.{column}' for column in METRIC_FIELDS)}
+        FROM runs LEFT JOIN main USING (run_id)
+        WHERE runs.kind = ?{where}
+        ORDER BY runs.run_id""", [kind] + params, database)
+
+    results = {}
+    for run in runs.to_dict('records'):
+        main_data = {key: run[column] for column, key in METRIC_FIELDS.items() if pd.notna(run[column])}
+        main_data.update(date=run['date'], cpu=run['cpu'], model=run['model'])
+        results[run['path']] = {'Main': main_data}
+
+    for sheet_name in sheets:
+        if sheet_name == 'Main':
+            continue
+        sheet = load_sheet(sheet_name, database, **filters)
+        columns = SHEET_TABLES[sheet_name][1]
+        for path, rows in sheet.groupby('path', sort=False):
+            if path in results:
+                results[path][sheet_name] = downcast(rows[columns].reset_index(drop=True))
+
+    empty = {sheet_name: pd.DataFrame(columns=SHEET_TABLES[sheet_name][1])
+             for sheet_name in sheets if sheet_name != 'Main'}
+    return [(path, {**empty, **data}) for path, data in results.items()]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='SQLite warehouse of every run, detection and usage sample')
+    parser.add_argument('--database', default=DEFAULT_DATABASE)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    ingest_parser = subparsers.add_parser('ingest', help='Append new and changed workbooks')
+    ingest_parser.add_argument('--data-dir', default='data')
+    ingest_parser.add_argument('--keep-removed', action='store_true', help='Keep runs whose file disappeared')
+    ingest_parser.add_argument('--workers', type=int, default=None)
+
+    query_parser = subparsers.add_parser('query', help='Run a SQL query and print its result')
+    query_parser.add_argument('sql')
+    args = parser.parse_args()
+
+    if args.command == 'ingest':
+        added, replaced, removed = ingest(args.data_dir, args.database, not args.keep_removed, args.workers)
+        print(f'{added} added, {replaced} replaced, {removed} removed in {args.database}')
+    else:
+        print(query(args.sql, database=args.database).to_string(index=False))
@@ -0,0 +1,190 @@
+import hashlib
+import os
+import threading
+import time
+import traceback
+
+from render_all import RUN_SOURCES, ReportData, affected_groups, build_scoped_jobs, extract_runs
+from rendering import DEFAULT_FORMATS, render_job_outcomes, use_headless_backend
+
+DEFAULT_INTERVAL = 5.0
+# Files modified more recently than this (in seconds) may still be being copied and wait for the next poll
+DEFAULT_MIN_AGE = 2.0
+
+
+def file_digest(file_path, chunk_size=1024 ** 2):
+    digest = hashlib.sha1()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class FileTracker:
+    """
+    (mtime, size, content hash) of every file already ingested, by path. Files whose mtime or size changed are
+    hashed again, so a file that was only touched or copied over with the same content is not ingested twice.
+    """
+
+    def __init__(self):
+        self.files = {}
+
+    def changes(self, file_paths, min_age=0.0):
+        """
+        (changed, removed) among file_paths compared with the ingested files: changed maps every new or modified
+        path to its state, to be passed to mark once ingested; removed lists the ingested paths no longer there.
+        """
+        changed = {}
+        now = time.time()
+        for file_path in file_paths:
+            try:
+                stat = os.stat(file_path)
+            except OSError:
+                continue
+            known = self.files.get(file_path)
+            if known is not None and known[:2] == (stat.st_mtime_ns, stat.st_size):
+                continue
+            if now - stat.st_mtime < min_age:
+                continue
+
+            state = (stat.st_mtime_ns, stat.st_size, file_digest(file_path))
+            if known is not None and known[2] == state[2]:
+                self.files[file_path] = state
+            else:
+                changed[file_path] = state
+
+        present = set(file_paths)
+        removed = [file_path for file_path in self.files if file_path not in present]
+        return changed, removed
+
+    def mark(self, file_path, state):
+        self.files[file_path] = state
+
+    def forget(self, file_path):
+        self.files.pop(file_path, None)
+
+
+class IncrementalReport:
+    """
+    The charts of a data directory kept up to date: every update only extracts the files that are new or
+    changed since the previous one, patches the loaded data for their (cpu, model) keys and re-renders only
+    the charts drawn from those keys. Charts whose runs are all gone are deleted.
+    """
+
+    def __init__(self, data_directory, output_dir, formats=DEFAULT_FORMATS, groups=None, max_workers=None,
+                 steady_state=False, min_age=DEFAULT_MIN_AGE):
+        self.data = ReportData(data_directory, max_workers, steady_state)
+        self.output_dir = output_dir
+        self.formats = formats
+        self.groups = groups
+        self.min_age = min_age
+        self.trackers = {kind: FileTracker() for kind in RUN_SOURCES}
+        # (group, cpu) scope of build_scoped_jobs -> files its jobs wrote on their last render
+        self.outputs = {}
+
+    def update(self):
+        """Ingest the changes of the data directory and re-render what they affect, returns the written files."""
+        changed_kinds = []
+        performance_keys = set()
+        models = self._run_models()
+        for kind, (find_files, extract_func) in RUN_SOURCES.items():
+            tracker = self.trackers[kind]
+            changed, removed = tracker.changes(find_files(self.data.data_directory), self.min_age)
+            if not changed and not removed:
+                continue
+
+            # Files that fail to parse (e.g. still being written) are left unmarked and retried on the next update
+            results = extract_runs(kind, list(changed), self.data.max_workers)
+            for file_path, data in results:
+                tracker.mark(file_path, changed[file_path])
+            for file_path in removed:
+                tracker.forget(file_path)
+
+            if results or removed:
+                keys = self.data.apply_changes(kind, results, removed)
+                if kind == 'performance':
+                    performance_keys |= keys
+                changed_kinds.append(kind)
+                print(f'{len(results)} {kind} files ingested, {len(removed)} removed')
+
+        groups = affected_groups(changed_kinds, self.groups)
+        if not groups:
+            return []
+
+        # The per-cpu charts are drawn from the performance runs, with colors assigned over all their models
+        cpus = {cpu for cpu, _ in performance_keys}
+        if self._run_models() != models:
+            cpus = None
+        written_files = self._render(groups, cpus)
+        print(f'{len(written_files)} files of {", ".join(groups)} saved in {self.output_dir}')
+        return written_files
+
+    def _run_models(self):
+        # Models of the performance runs ingested so far, nothing is loaded before the first update ingests them
+        return self.data.run_models() if 'performance_results' in dict(self.data.loaded_parts()) else []
+
+    def _render(self, groups, cpus):
+        use_headless_backend()
+        scoped_jobs = build_scoped_jobs(self.data, self.output_dir, self.formats, groups, cpus)
+        outcomes = render_job_outcomes([job for _, job in scoped_jobs], self.data.max_workers)
+
+        written = {}
+        failed = set()
+        for (scope, (func, _, _)), (job_files, error) in zip(scoped_jobs, outcomes):
+            written.setdefault(scope, set()).update(job_files)
+            if error is not None:
+                print(f'Rendering {func.__name__} failed: {error}')
+                failed.add(scope)
+
+        # Every scope rendered again, including the ones no job was built for any more (e.g. a cpu whose last run
+        # was removed): files it wrote last time and not this time are stale, unless one of its jobs failed
+        rendered = {scope for scope in self.outputs
+                    if scope[0] in groups and (scope[1] is None or cpus is None or scope[1] in cpus)}
+        for scope in rendered | set(written):
+            files = written.get(scope, set())
+            if scope in failed:
+                files |= self.outputs.get(scope, set())
+            for file_path in self.outputs.get(scope, set()) - files:
+                if os.path.exists(file_path):
+                    os.remove(file_path)
+            if files:
+                self.outputs[scope] = files
+            else:
+                self.outputs.pop(scope, None)
+
+        return [file_path for job_files, _ in outcomes for file_path in job_files]
+
+
+class Watcher(threading.Thread):
+    """Background thread calling report.update every interval seconds until stop is called."""
+
+    def __init__(self, report, interval=DEFAULT_INTERVAL):
+        super().__init__(name='watcher', daemon=True)
+        self.report = report
+        self.interval = interval
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            try:
+                self.report.update()
+            except Exception:
+                # A bad poll must not end the watch, the next one starts from the same tracked state
+                traceback.print_exc()
+
+    def stop(self):
+        self._stopped.set()
+        if self.is_alive() and threading.current_thread() is not self:
+            self.join()
+
+
+def watch(report, interval=DEFAULT_INTERVAL):
+    """Render the report once, then keep it up to date in a Watcher thread until interrupted (Ctrl+C)."""
+    report.update()
+    watcher = Watcher(report, interval)
+    watcher.start()
+    try:
+        while watcher.is_alive():
+            watcher.join(1)
+    except KeyboardInterrupt:
+        watcher.stop()